@@ -0,0 +1,76 @@
+#!/usr/bin/python
+'''
+Measure the import time of the numerical core and the time until the first
+window is shown. Each measure runs in a fresh interpreter.
+
+Usage: python benchmarks/startup_benchmark.py [--repeat N] [--no-window]
+'''
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+_ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_HEAVY_MODULES = ['PyQt5', 'matplotlib', 'imageio', 'PIL', 'skimage', 'scipy']
+
+_IMPORT_SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import root
+elapsed = time.perf_counter() - start
+heavy = [name for name in %r if name in sys.modules]
+print(elapsed, ','.join(heavy))
+''' % _HEAVY_MODULES
+
+_WINDOW_SCRIPT = '''
+import time
+start = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
+app = QApplication([])
+from root.ui import MainWindow
+window = MainWindow()
+def shown():
+    print(time.perf_counter() - start)
+    app.quit()
+QTimer.singleShot(0, shown)
+app.exec_()
+'''
+
+
+def run(script):
+    result = subprocess.run([sys.executable, '-c', script], cwd=_ROOT_PATH,
+                            stdout=subprocess.PIPE, check=True,
+                            universal_newlines=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def measure_import(repeat):
+    times = []
+    for _ in range(repeat):
+        elapsed, heavy = (run(_IMPORT_SCRIPT).split(' ') + [''])[:2]
+        times.append(float(elapsed))
+    return statistics.median(times), heavy
+
+
+def measure_window(repeat):
+    return statistics.median(float(run(_WINDOW_SCRIPT)) for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-window', action='store_true',
+                        help='only measure the import of the core')
+    args = parser.parse_args()
+
+    import_time, heavy = measure_import(args.repeat)
+    print('import root: %.1f ms' % (import_time * 1000))
+    print('heavy modules loaded by import: %s' % (heavy or 'none'))
+    if not args.no_window:
+        print('time to first window: %.1f ms' % (measure_window(args.repeat) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,18 +5,14 @@ from root.converter import ColorConverter as converter
 from root.converter import ScaleConverter as scale
 from root.util import ImageUtil as util
 from root.util import RgbUtil as rgb
-from PyQt5 import QtWidgets, QtGui
-from PyQt5.QtWidgets import *
-from PyQt5.QtCore import *
-from PyQt5.QtGui import *
-import sys
-sys.path.insert(0, sys.path[0]+'\\ui')
-print(sys.path)
-
-from root.ui import MainWindow
 
 
 def main():
+    # The GUI (and PyQt5) is only imported when the editor is started, so the
+    # numerical core can be imported without Qt.
+    from PyQt5.QtWidgets import QApplication
+    from root.ui import MainWindow
+
     app = QApplication([])
     GUI = MainWindow()
     app.exec_()
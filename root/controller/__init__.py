@@ -1,4 +1,6 @@
 from .image_manager import ImageManager
+from .fft_plan import FFTPlan, FFTPlanCache
 from .fourier_manager import FourierManager
 from .transformation_manager import TransformationManager
+from .preview_engine import PreviewEngine
 from .transformation_controller import TransformationController
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+import threading
+
+
+class FFTPlan():
+    '''
+    Precomputed tables (twiddle factors, permutations, chirps...) for the
+    transforms of one length. Tables are computed on first use and kept, so
+    they are shared by every row, every call, and by the forward and inverse
+    transforms.
+    '''
+
+    def __init__(self, n):
+        self.n = n
+        self.tables = {}
+
+    def table(self, key, compute):
+        '''
+        Return the table stored under key, computing it with compute() once.
+        '''
+        table = self.tables.get(key)
+        if table is None:
+            table = self.tables[key] = compute()
+        return table
+
+
+class FFTPlanCache():
+    '''
+    Plans by length. Powers of two (the usual sizes) are always kept; plans
+    of other lengths are kept in a LRU limited to maxsize entries.
+    '''
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self.common = {}
+        self.unusual = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, n):
+        with self.lock:
+            if n & (n - 1) == 0:
+                plan = self.common.get(n)
+                if plan is None:
+                    plan = self.common[n] = FFTPlan(n)
+                return plan
+
+            plan = self.unusual.get(n)
+            if plan is None:
+                plan = self.unusual[n] = FFTPlan(n)
+                if len(self.unusual) > self.maxsize:
+                    self.unusual.popitem(last=False)
+            else:
+                self.unusual.move_to_end(n)
+            return plan
+
+    def clear(self):
+        with self.lock:
+            self.common.clear()
+            self.unusual.clear()
+
+    def __len__(self):
+        return len(self.common) + len(self.unusual)
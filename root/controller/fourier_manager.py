@@ -1,62 +1,152 @@
-from cmath import exp, pi
 from root.controller import ImageManager
+from root.controller import FFTPlanCache
+from root.util import TaskContext
+from root.filter import FrequencyFilter
 import numpy as np
 import cmath
-import math
 _max_pixel = 255
 _images_path = 'images/'
 
 class  FourierManager():
 
-    def __init__(self):
+    # Plans are shared by every FourierManager
+    plans = FFTPlanCache()
+
+    def __init__(self, precision=np.complex128):
         super().__init__()
+        # Type used to keep the spectra returned by fft2/rfft2. complex64
+        # takes half the memory of complex128.
+        self.precision = np.dtype(precision)
+
+    def get_plan(self, n):
+        return self.plans.get(n)
 
-    # def transform_radix2(self,x,bol):
-    #     n = len(x)
-    #     if n == 1:
-    #         return x
-    #     even = self.fft(x[0::2])
-    #     odd = self.fft(x[1::2])
-    #     combined = np.zeros(n,dtype=np.complex)
-    #     for m in range(n//2):
-    #         combined[m] = even[m] + self.omega(n, -m) * odd[m]
-    #         combined[m + n//2] = even[m] - self.omega(n, -m) * odd[m]
-    #     return combined
-
-    # Isso é dft na verdade
+    # The transforms work on the last axis, so every row of a 2-D array
+    # (or any stack of vectors) is transformed at once.
     def fft(self, x):
         return self.transform(x, False)
-        # t = []
-        # N = len(x)
-        # for k in range(N):
-        #     a = 0
-        #     for n in range(N):
-        #         a += x[n]*cmath.exp(-2j*cmath.pi*k*n*(1/N))
-        #     t.append(a)
-        # return t
 
     def omega(self, n, m):
         return cmath.exp((2j * cmath.pi * m) / n)
 
+    def channels_first(self, img):
+        '''
+        Colour images (h, w, c) are transformed as one batch of c planes.
+        '''
+        img = np.asarray(img)
+        if img.ndim == 3:
+            return np.moveaxis(img, -1, 0)
+        return img
+
+    def channels_last(self, planes, ndim):
+        if ndim == 3:
+            return np.moveaxis(planes, 0, -1)
+        return planes
+
     def fft2(self, img):
-        h, w = img.shape
-        print(h)
-        print(w)
-        f = np.zeros((h, w), dtype=np.complex)
-        print(f[:, 0].shape)
-        for i in range(h):
-            f[i, :] = self.fft(img[i, :])
-        f1 = np.rot90(f)
-        f2 = np.zeros(f1.shape, dtype=np.complex)
-        for i in range(w):
-            f2[i, :] = self.fft(f1[i, :])
-        f3 = np.rot90(f2, 3)
-        return f3
+        planes = self.channels_first(img)
+        # Rows first, then columns (by swapping axes instead of rotating)
+        TaskContext.step(0, 2)
+        f = self.fft(planes)
+        TaskContext.step(1, 2)
+        f = self.fft(f.swapaxes(-1, -2)).swapaxes(-1, -2)
+        return self.channels_last(f, planes.ndim).astype(self.precision, copy=False)
+
+    def rfft(self, x):
+        '''
+        Transform of real vectors over the last axis. Only the n//2 + 1 first
+        coefficients are returned, the others are their complex conjugates.
+        '''
+        x = np.asarray(x, dtype=float)
+        n = x.shape[-1]
+        if n % 2:
+            return self.fft(x)[..., :n // 2 + 1]
+        # The even and odd samples are packed as one complex vector of half
+        # the length, transformed once and then separated.
+        half = n // 2
+        z = self.fft(x[..., 0::2] + 1j * x[..., 1::2])
+        indexes = np.arange(half + 1)
+        z_k = z[..., indexes % half]
+        z_mirror = np.conjugate(z[..., (-indexes) % half])
+        even = (z_k + z_mirror) / 2
+        odd = (z_k - z_mirror) / 2j
+        return even + self.get_real_twiddles(self.get_plan(n), False) * odd
+
+    def irfft(self, fu, n):
+        '''
+        Inverse of rfft: rebuild the n real samples from the n//2 + 1 first coefficients.
+        '''
+        fu = np.asarray(fu, dtype=complex)
+        if n % 2:
+            return self.ifft(self.hermitian_extend(fu, n)).real
+        half = n // 2
+        indexes = np.arange(half)
+        fu_k = fu[..., indexes]
+        fu_mirror = np.conjugate(fu[..., half - indexes])
+        even = (fu_k + fu_mirror) / 2
+        odd = (fu_k - fu_mirror) / 2 * self.get_real_twiddles(self.get_plan(n), True)[:half]
+        z = self.ifft(even + 1j * odd)
+        fx = np.empty(fu.shape[:-1] + (n,))
+        fx[..., 0::2] = z.real
+        fx[..., 1::2] = z.imag
+        return fx
+
+    def get_real_twiddles(self, plan, inverse):
+        '''
+        Return exp(-2j*pi*k/n) for k <= n/2 (conjugated for the inverse).
+        '''
+        if inverse:
+            return plan.table(('real_twiddles', True), lambda: self.get_real_twiddles(plan, False).conjugate())
+        return plan.table(('real_twiddles', False), lambda: np.exp(-2j * np.pi * np.arange(plan.n // 2 + 1) / plan.n))
+
+    def hermitian_extend(self, fu, n):
+        '''
+        Complete the n//2 + 1 first coefficients of a real signal spectrum
+        (over the last axis) with their conjugates.
+        '''
+        full = np.empty(fu.shape[:-1] + (n,), dtype=fu.dtype)
+        columns = fu.shape[-1]
+        full[..., :columns] = fu
+        full[..., columns:] = np.conjugate(fu[..., n - np.arange(columns, n)])
+        return full
+
+    def rfft2(self, img):
+        '''
+        2-D transform of a real image keeping half of the spectrum: the result
+        has shape (h, w//2 + 1) or (h, w//2 + 1, c).
+        '''
+        planes = self.channels_first(img)
+        TaskContext.step(0, 2)
+        f = self.rfft(planes)
+        TaskContext.step(1, 2)
+        f = self.fft(f.swapaxes(-1, -2)).swapaxes(-1, -2)
+        return self.channels_last(f, planes.ndim).astype(self.precision, copy=False)
+
+    def irfft2(self, fu, width):
+        planes = self.channels_first(fu)
+        TaskContext.step(0, 2)
+        fx = self.ifft(planes.swapaxes(-1, -2)).swapaxes(-1, -2)
+        TaskContext.step(1, 2)
+        return self.channels_last(self.irfft(fx, width), planes.ndim)
+
+    def full_spectrum(self, fu, width):
+        '''
+        Rebuild the complete 2-D spectrum (h, width) from the half kept by
+        rfft2, using F[u, v] = conj(F[-u, -v]). Works for magnitudes too.
+        '''
+        fu = self.channels_first(fu)
+        height = fu.shape[-2]
+        full = np.empty(fu.shape[:-1] + (width,), dtype=fu.dtype)
+        columns = fu.shape[-1]
+        full[..., :columns] = fu
+        mirrored_rows = fu[..., (-np.arange(height)) % height, :]
+        full[..., columns:] = np.conjugate(mirrored_rows[..., width - np.arange(columns, width)])
+        return self.channels_last(full, fu.ndim)
 
     def fftshift(self, F):
         ''' this shifts the centre of FFT of images/2-d signals'''
 
-        M, N = F.shape
+        M, N = F.shape[:2]
         # med_m = M//2 + M%2
         # med_n = N//2 + N%2
 
@@ -66,14 +156,14 @@ class  FourierManager():
         # sF = np.zeros(F.shape,dtype = F.dtype)
         # sF[med_m: M, med_n: N], sF[0: med_m, 0: med_n] = R1, R4
         # sF[med_m: M, 0: med_n], sF[0: med_m, med_n: N]= R3, R2
-        sF = np.roll(F, M // 2, axis=0)
-        sF = np.roll(sF, N // 2, axis=1)
+        # Channels of colour spectra are not shifted
+        sF = np.roll(F, (M // 2, N // 2), axis=(0, 1))
         return sF
 
     def ifftshift(self, F):
         ''' this shifts the centre of FFT of images/2-d signals'''
 
-        M, N = F.shape
+        M, N = F.shape[:2]
         # med_m = M//2 + M%2
         # med_n = N//2 + N%2
 
@@ -83,157 +173,265 @@ class  FourierManager():
         # sF = np.zeros(F.shape,dtype = F.dtype)
         # sF[med_m: M, med_n: N], sF[0: med_m, 0: med_n] = R1, R4
         # sF[med_m: M, 0: med_n], sF[0: med_m, med_n: N]= R3, R2
-        sF = np.roll(F, -(N // 2), axis=1)
-        sF = np.roll(sF, -(M // 2), axis=0)
+        sF = np.roll(F, (-(M // 2), -(N // 2)), axis=(0, 1))
 
         return sF
 
     def ifft(self, fu):
-        """ use recursive method to speed up"""
         fu = np.asarray(fu, dtype=complex)
         fu_conjugate = np.conjugate(fu)
 
         fx = self.fft(fu_conjugate)
 
         fx = np.conjugate(fx)
-        fx = fx / fu.shape[0]
+        fx = fx / fu.shape[-1]
 
         return fx
 
     def ifft2(self, fu):
-        h, w = fu.shape
+        planes = self.channels_first(fu)
+        TaskContext.step(0, 2)
+        fx = self.ifft(planes)
+        TaskContext.step(1, 2)
+        fx = self.ifft(fx.swapaxes(-1, -2)).swapaxes(-1, -2)
 
-        fx = np.zeros(fu.shape, dtype=complex)
+        fx = np.real(fx)
+        return self.channels_last(fx, planes.ndim)
 
-        if len(fu.shape) == 2:
-            for i in range(h):
-                fx[i, :] = self.ifft(fu[i, :])
+    def lowPassFilter(self, img, radius, kind='ideal', order=2):
+        mask = FrequencyFilter.low_pass(img.shape[:2], radius, kind, order)
+        return self.apply_mask(img, mask)
 
-            for i in range(w):
-                fx[:, i] = self.ifft(fx[:, i])
+    def highPassFilter(self, img, radius, kind='ideal', order=2):
+        mask = FrequencyFilter.high_pass(img.shape[:2], radius, kind, order)
+        return self.apply_mask(img, mask)
 
-        elif len(fu.shape) == 3:
-            for ch in range(3):
-                fx[:, :, ch] = self.ifft(fu[:, :, ch])
+    def bandPassFilter(self, img, radius_minor, radius_major, kind='ideal', order=2):
+        mask = FrequencyFilter.band_pass(img.shape[:2], radius_minor, radius_major, kind, order)
+        return self.apply_mask(img, mask)
 
-        fx = np.real(fx)
-        return fx
+    def bandRejectFilter(self, img, radius_minor, radius_major, kind='ideal', order=2):
+        mask = FrequencyFilter.band_reject(img.shape[:2], radius_minor, radius_major, kind, order)
+        return self.apply_mask(img, mask)
 
-    def create_circular_mask(self, h, w, center=None, radius=None):
-
-        if center is None:  # use the middle of the image
-            center = [int(w / 2), int(h / 2)]
-        if radius is None:  # use the smallest distance between the center and image walls
-            radius = min(center[0], center[1], w - center[0], h - center[1])
-
-        Y, X = np.ogrid[:h, :w]
-        dist_from_center = np.sqrt((X - center[0])**2 + (Y - center[1])**2)
-
-        mask = dist_from_center <= radius
-        return mask
-
-    def lowPassFilter(self, img, radius):
-        h, w = img.shape
-        mask = self.create_circular_mask(h, w, None, radius)
-        print(mask)
-        masked_img = img.copy()
-        masked_img[~mask] = 0
-        return masked_img
-
-    def highPassFilter(self, img, radius):
-        h, w = img.shape
-        mask = self.create_circular_mask(h, w, None, radius)
-        print(mask)
-        masked_img = img.copy()
-        masked_img[mask] = 0
-        return masked_img
-
-    def bandPassFilter(self, img, radius_minor, radius_major):
-        h, w = img.shape
-        mask_minor = self.create_circular_mask(h, w, None, radius_minor)
-        mask_major = self.create_circular_mask(h, w, None, radius_major)
-        masked_img = img.copy()
-        masked_img[~mask_major] = 0
-        masked_img[mask_minor] = 0
-        return masked_img
-
-    import cmath
-    import sys
-    if sys.version_info.major == 2:
-        range = xrange
+    def apply_mask(self, img, mask):
+        return FrequencyFilter.apply(img, mask).astype(img.dtype, copy=False)
 
     def convolve(self, x, y, realoutput=True):
-        assert len(x) == len(y)
-        n = len(x)
+        '''
+        Circular convolution over the last axis. y may be a single vector that
+        is convolved with every row of x.
+        '''
+        x = np.asarray(x, dtype=complex)
+        y = np.asarray(y, dtype=complex)
+        assert x.shape[-1] == y.shape[-1]
+        n = x.shape[-1]
         x = self.transform(x, False)
         y = self.transform(y, False)
-        for i in range(n):
-            x[i] *= y[i]
-        x = self.transform(x, True)
+        x = self.transform(x * y, True)
 
         # Scaling (because this FFT implementation omits it) and postprocessing
         if realoutput:
-            return [(val.real / n) for val in x]
+            return x.real / n
         else:
-            return [(val / n) for val in x]
+            return x / n
+
+    def convolve2d(self, img, kernel, block_size=None):
+        '''
+        Linear 2-D convolution of img (h, w) or (h, w, c) with kernel. The
+        output has the shape of img (zeros outside the image).
+
+        The image is cut in tiles that are transformed together one strip of
+        tiles at a time and the results are added where they overlap
+        (overlap-add), so memory does not grow with the image.
+        '''
+        planes = self.channels_first(np.asarray(img, dtype=float))
+        kernel = np.asarray(kernel, dtype=float)
+        kh, kw = kernel.shape
+        h, w = planes.shape[-2:]
+        size_h, block_h = self.get_block_size(h, kh, block_size)
+        size_w, block_w = self.get_block_size(w, kw, block_size)
+
+        # Transform of the kernel, shared by all tiles
+        padded_kernel = np.zeros((size_h, size_w))
+        padded_kernel[:kh, :kw] = kernel
+        kernel_spectrum = self.fft(self.rfft(padded_kernel).swapaxes(-1, -2)).swapaxes(-1, -2)
+
+        tiles_w = -(-w // block_w)
+        tiles_h = -(-h // block_h)
+        channels = planes.shape[:-2]
+        full = np.zeros(channels + (tiles_h * block_h + size_h, tiles_w * block_w + size_w))
+        for strip in range(tiles_h):
+            TaskContext.step(strip, tiles_h)
+            top = strip * block_h
+            rows = planes[..., top:top + block_h, :]
+            tiles = np.zeros(channels + (tiles_w, size_h, size_w))
+            for tile in range(tiles_w):
+                left = tile * block_w
+                block = rows[..., left:left + block_w]
+                tiles[..., tile, :block.shape[-2], :block.shape[-1]] = block
+            spectrum = self.fft(self.rfft(tiles).swapaxes(-1, -2)).swapaxes(-1, -2)
+            spectrum *= kernel_spectrum
+            result = self.irfft(self.ifft(spectrum.swapaxes(-1, -2)).swapaxes(-1, -2), size_w)
+            for tile in range(tiles_w):
+                left = tile * block_w
+                full[..., top:top + size_h, left:left + size_w] += result[..., tile, :, :]
+
+        top, left = (kh - 1) // 2, (kw - 1) // 2
+        return self.channels_last(full[..., top:top + h, left:left + w], planes.ndim)
+
+    def get_block_size(self, length, kernel_length, block_size=None):
+        '''
+        Return (transform length, tile length) for one axis of convolve2d. The
+        transform length is a power of two at least twice the kernel.
+        '''
+        if block_size is None:
+            # Larger tiles waste less on the overlap but cost more per sample
+            block_size = max(2 * kernel_length, min(8 * kernel_length, 256))
+        size = 1 << (max(block_size, kernel_length) - 1).bit_length()
+        if length + kernel_length - 1 <= size:
+            # A single tile covers the whole axis
+            size = 1 << (length + kernel_length - 2).bit_length()
+            return size, length
+        return size, size - kernel_length + 1
+
+    def bit_reversal(self, levels):
+        '''
+        Return the bit-reversed permutation of range(2 ** levels).
+        '''
+        indexes = np.arange(2 ** levels)
+        reversed_indexes = np.zeros_like(indexes)
+        for bit in range(levels):
+            reversed_indexes |= ((indexes >> bit) & 1) << (levels - 1 - bit)
+        return reversed_indexes
 
     def transform_radix2(self, vector, inverse):
-        # Returns the integer whose value is the reverse of the lowest 'bits' bits of the integer 'x'.
-        def reverse(x, bits):
-            y = 0
-            for i in range(bits):
-                y = (y << 1) | (x & 1)
-                x >>= 1
-            return y
-
         # Initialization
-        n = len(vector)
+        vector = np.asarray(vector, dtype=complex)
+        n = vector.shape[-1]
         levels = n.bit_length() - 1
         if 2**levels != n:
             raise ValueError("Length is not a power of 2")
         # Now, levels = log2(n)
-        coef = (2 if inverse else -2) * cmath.pi / n
-        exptable = [cmath.rect(1, i * coef) for i in range(n // 2)]
+        plan = self.get_plan(n)
+        exptable = self.get_twiddles(plan, inverse)
         # Copy with bit-reversed permutation
-        vector = [vector[reverse(i, levels)] for i in range(n)]
+        permutation = plan.table('bit_reversal', lambda: self.bit_reversal(levels))
+        vector = np.ascontiguousarray(vector[..., permutation])
 
-        # Radix-2 decimation-in-time FFT
+        # Radix-2 decimation-in-time FFT. Each stage runs all the butterflies
+        # of all rows as array operations: the last axis is split into blocks
+        # of "size" elements, whose halves are combined.
         size = 2
         while size <= n:
             halfsize = size // 2
             tablestep = n // size
-            for i in range(0, n, size):
-                k = 0
-                for j in range(i, i + halfsize):
-                    temp = vector[j + halfsize] * exptable[k]
-                    vector[j + halfsize] = vector[j] - temp
-                    vector[j] += temp
-                    k += tablestep
+            blocks = vector.reshape(vector.shape[:-1] + (n // size, size))
+            temp = blocks[..., halfsize:] * exptable[::tablestep]
+            blocks[..., halfsize:] = blocks[..., :halfsize] - temp
+            blocks[..., :halfsize] += temp
             size *= 2
         return vector
 
+    def get_twiddles(self, plan, inverse):
+        '''
+        Return exp(-2j*pi*k/n) for k < n/2 (conjugated for the inverse transform).
+        '''
+        if inverse:
+            return plan.table(('twiddles', True), lambda: self.get_twiddles(plan, False).conjugate())
+        return plan.table(('twiddles', False), lambda: np.exp(-2j * np.pi * np.arange(plan.n // 2) / plan.n))
+
     def transform(self, vector, inverse):
-        n = len(vector)
+        vector = np.asarray(vector, dtype=complex)
+        n = vector.shape[-1]
         if n == 0:
-            return []
+            return vector.copy()
         elif n & (n - 1) == 0:  # Is power of 2
             return self.transform_radix2(vector, inverse)
+        elif self.get_small_factors(n) is not None:  # Only factors 2, 3 and 5
+            return self.transform_mixed_radix(vector, inverse)
         else:  # More complicated algorithm for arbitrary sizes
             return self.transform_bluestein(vector, inverse)
 
+    def get_small_factors(self, n):
+        '''
+        Return the factors of n if they are all 2, 3 or 5, otherwise None.
+        '''
+        def compute():
+            factors = []
+            rest = n
+            for radix in (5, 3, 2):
+                while rest % radix == 0:
+                    factors.append(radix)
+                    rest //= radix
+            return factors if rest == 1 else ()
+        return self.get_plan(n).table('factors', compute) or None
+
+    def transform_mixed_radix(self, vector, inverse):
+        vector = np.asarray(vector, dtype=complex)
+        n = vector.shape[-1]
+        factors = self.get_small_factors(n)
+        if factors is None:
+            raise ValueError("Length has prime factors other than 2, 3 and 5")
+        return self.mixed_radix_step(vector, factors, self.get_plan(n), inverse)
+
+    def mixed_radix_step(self, vector, factors, plan, inverse):
+        # Mixed-radix decimation-in-time Cooley-Tukey FFT. With n = p * m, the
+        # p interleaved sub-sequences vector[j::p] (of length m) are transformed
+        # together, multiplied by the twiddle factors and combined by a small
+        # p-point DFT: X[q*m + k] = sum_j W_p^(j*q) * W_n^(j*k) * X_j[k]
+        n = vector.shape[-1]
+        if n == 1:
+            return vector.copy()
+        p = factors[0]
+        m = n // p
+        subsequences = vector.reshape(vector.shape[:-1] + (m, p)).swapaxes(-1, -2)
+        subsequences = self.mixed_radix_step(subsequences, factors[1:], plan, inverse)
+
+        sign = 1 if inverse else -1
+        twiddles = plan.table(('mixed_twiddles', n, inverse), lambda: np.exp(
+            sign * 2j * np.pi * np.outer(np.arange(p), np.arange(m)) / n))
+        small_dft = plan.table(('small_dft', p, inverse), lambda: np.exp(
+            sign * 2j * np.pi * np.outer(np.arange(p), np.arange(p)) / p))
+        combined = np.matmul(small_dft, subsequences * twiddles)
+        return combined.reshape(combined.shape[:-2] + (n,))
+
+    def get_chirp(self, plan, inverse):
+        '''
+        Return the Bluestein chirp exp(-1j*pi*k^2/n) (conjugated for the inverse).
+        '''
+        if inverse:
+            return plan.table(('chirp', True), lambda: self.get_chirp(plan, False).conjugate())
+        n = plan.n
+        return plan.table(('chirp', False), lambda: np.exp(-1j * np.pi / n * (np.arange(n) ** 2 % (n * 2))))
+
+    def get_chirp_spectrum(self, plan, inverse, m):
+        '''
+        Return the transform of the Bluestein convolution kernel, of length m.
+        '''
+        def compute():
+            n = plan.n
+            exptable = self.get_chirp(plan, inverse)
+            b = np.zeros(m, dtype=complex)
+            b[:n] = exptable
+            b[m - n + 1:] = exptable[:0:-1]
+            return self.transform_radix2(b.conjugate(), False)
+        return plan.table(('chirp_spectrum', inverse), compute)
+
     def transform_bluestein(self, vector, inverse):
         # Find a power-of-2 convolution length m such that m >= n * 2 + 1
-        n = len(vector)
+        vector = np.asarray(vector, dtype=complex)
+        n = vector.shape[-1]
         if n == 0:
-            return []
+            return vector.copy()
         m = 2**((n * 2).bit_length())
 
-        coef = (1 if inverse else -1) * cmath.pi / n
-        exptable = [cmath.rect(1, (i * i % (n * 2)) * coef)
-                    for i in range(n)]  # Trigonometric table
-        a = [(x * y) for (x, y) in zip(vector, exptable)] + \
-            [0] * (m - n)  # Temporary vectors and preprocessing
-        b = exptable[: n] + [0] * (m - (n * 2 - 1)) + exptable[: 0: -1]
-        b = [x.conjugate() for x in b]
-        c = self.convolve(a, b, False)[: n]  # Convolution
-        return [(x * y) for (x, y) in zip(c, exptable)]  # Postprocessing
+        plan = self.get_plan(n)
+        exptable = self.get_chirp(plan, inverse)  # Trigonometric table
+        # Temporary vectors and preprocessing
+        a = np.zeros(vector.shape[:-1] + (m,), dtype=complex)
+        a[..., :n] = vector * exptable
+        # Convolution with the cached kernel spectrum
+        c = self.transform_radix2(self.transform_radix2(a, False) * self.get_chirp_spectrum(plan, inverse, m), True)
+        c = c[..., :n] / m
+        return c * exptable  # Postprocessing
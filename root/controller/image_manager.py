@@ -1,11 +1,7 @@
 #!/usr/bin/python
-import imageio
-import matplotlib.pyplot as plt
 import numpy as np
 import math
 
-from PIL import Image
-
 _max_pixel = 255
 _images_path = 'images/'
 
@@ -17,10 +13,12 @@ class ImageManager():
 
     # Abre um arquivo e retorna ???
     def read_image(self, image_path):
+        import imageio
         return imageio.imread(image_path, as_gray=False, pilmode="RGB")
 
     def save_image(self, name, image_as_byte):
-        import matplotlib
+        import matplotlib.image
+        import matplotlib.cm
         # Correção: com esse código, é possível salvar a imagem e conseguir abrir no windows depois
         matplotlib.image.imsave(_images_path + name,
                                 image_as_byte, cmap=matplotlib.cm.gray)
@@ -0,0 +1,66 @@
+from root.util import ImageUtil as util
+import math
+import threading
+
+
+class PreviewEngine():
+    '''
+    Applies operations to a cached, downscaled copy (proxy) of the image sized
+    to the viewport. This allows parameters to be tuned interactively; the full
+    resolution image is only processed when the parameters are committed.
+    '''
+
+    def __init__(self, width=800, height=600):
+        self.width = width
+        self.height = height
+        # (source, factor, proxy), replaced as a whole: previews run on a
+        # worker thread while the GUI thread may ask for another proxy
+        self.cache = (None, 1, None)
+        self.lock = threading.Lock()
+
+    def set_viewport(self, width, height):
+        width, height = max(int(width), 1), max(int(height), 1)
+        with self.lock:
+            if (width, height) != (self.width, self.height):
+                self.width, self.height = width, height
+                self.cache = (None, 1, None)
+
+    def get_factor(self, height, width):
+        '''
+        Integer downscale factor that makes an image of this size fit the viewport.
+        '''
+        return max(1, math.ceil(height / self.height), math.ceil(width / self.width))
+
+    def get_scaled_proxy(self, image):
+        '''
+        Return the proxy of image and its downscale factor, reusing the cached
+        ones if image did not change. Both come from the same cache entry, so
+        lengths scaled with the factor match the proxy.
+        '''
+        with self.lock:
+            source, factor, proxy = self.cache
+            if image is not source:
+                factor = self.get_factor(*util.get_dimensions(image))
+                proxy = util.block_reduce(image, factor)
+                self.cache = (image, factor, proxy)
+        return proxy, factor
+
+    def get_proxy(self, image):
+        return self.get_scaled_proxy(image)[0]
+
+    @staticmethod
+    def scale_length(length, factor):
+        '''
+        Convert a length in pixels of the full image to pixels of a proxy.
+        '''
+        return length / factor
+
+    def preview(self, image, function, *args):
+        return function(self.get_proxy(image), *args)
+
+    def preview_scaled(self, image, function, *args):
+        '''
+        Like preview, but function also gets the factor of the proxy (after
+        the proxy) to scale its lengths.
+        '''
+        return function(*self.get_scaled_proxy(image), *args)
@@ -1,52 +1,165 @@
 from root.controller import TransformationManager
 import numpy as np
-import matplotlib.pyplot as plt
+import threading
 
 from root.filter import ImageFilter as filter
 from root.filter import RgbFilter as rgbFilter
 from root.filter import ColorFilter as color
 from root.filter import SteganographyTool as stegano
+from root.filter import FrequencyFilter as fourierFilter
+from root.filter import ColorLut
 from root.util import ImageUtil as util
+from root.util import ImageBufferSlot
+from root.util import ImagePyramid
 from root.converter import ColorConverter as converter
+from root.converter import ColorMatrix as colorMatrix
 from root.converter import ScaleConverter as scal
 from root.controller import FourierManager
+from root.controller import PreviewEngine
 
 class TransformationController():
 
+    # The image states are kept as read-only buffers, so current, undo and
+    # redo can share the same pixels without defensive copies.
+    original_image = ImageBufferSlot()
+    current_image = ImageBufferSlot()
+    undo_image = ImageBufferSlot()
+    redo_image = ImageBufferSlot()
+    fourier_image = ImageBufferSlot()
+
     def __init__(self):
         super().__init__()
         self.original_image = self.current_image = self.undo_image  = self.redo_image = None
-        self.complete_fourier  = self.current_complete_fourier = self.fourier_image = self.undo_fourier = self.redo_fourier = None
-        self.fourierManager = FourierManager()
-
-    def update_memory_images(self,image):
-        self.undo_image = self.current_image
-        self.current_image  = image
-        self.redo_image = self.current_image.copy()
-
-    def update_fourier_memory_images(self,image):
-        self.undo_fourier = self.fourier_image
-        self.fourier_image  = image
-        self.redo_fourier = self.fourier_image.copy()
+        self.complete_fourier  = self.current_complete_fourier = self.fourier_image = None
+        self.fourier_source = self.fourier_magnitude = None
+        # Edits of the spectrum: a stack with the product of the masks applied
+        # so far. Undo and redo only move fourier_depth.
+        self.fourier_masks = []
+        self.fourier_depth = 0
+        self.fourier_luminance = False
+        # Spectra are kept in single precision, the images are 8 bits anyway
+        self.fourierManager = FourierManager(np.complex64)
+        self.previewEngine = PreviewEngine()
+        # Changes recorded by the operation running in stage(), per thread
+        self._staging = threading.local()
+        self.pyramid = None
+        # HSI planes of the current image and of its preview proxy, as
+        # (image, planes) pairs
+        self.color_planes = {'image': None, 'proxy': None}
+
+    def defer(self, function, *args):
+        '''
+        Inside stage(), record a change of the controller state for commit()
+        and return True. Otherwise return False, the caller applies it.
+        '''
+        changes = getattr(self._staging, 'changes', None)
+        if changes is None:
+            return False
+        changes.append((function, args))
+        return True
+
+    def update_memory_images(self, image, color_planes=None):
+        '''
+        Store a new current image. color_planes are its HSI planes, when the
+        operation already has them (see get_color_planes).
+        '''
+        if self.defer(self.update_memory_images, image, color_planes):
+            return
+        self._undo_image_buffer = self._current_image_buffer
+        self.current_image = image
+        self._redo_image_buffer = self._current_image_buffer
+        if color_planes is not None:
+            self.color_planes['image'] = (self.current_image, color_planes)
+
+    def stage(self, function, *args):
+        '''
+        Run an operation (on a worker thread) without changing the controller:
+        the images and other state it would store are returned with its
+        result, for commit() to store them on the GUI thread. Operations
+        superseded before commit() then leave the controller untouched.
+        '''
+        self._staging.changes = []
+        try:
+            result = function(*args)
+            return self._staging.changes, result
+        finally:
+            self._staging.changes = None
+
+    def commit(self, staged):
+        '''
+        Apply the changes of a staged operation. Returns the new current image,
+        or the result of the operation when it did not change the image.
+        '''
+        changes, result = staged
+        buffer = self._current_image_buffer
+        for function, args in changes:
+            function(*args)
+        return self.current_image if self._current_image_buffer is not buffer else result
+
+    def update_fourier_memory_images(self,mask):
+        # A new edit discards the ones that were undone
+        masks = self.fourier_masks[:self.fourier_depth + 1] + [mask]
+        image = self.fourierManager.apply_mask(self.fourier_magnitude, mask)
+        self.set_fourier_masks(masks, len(masks) - 1, image)
+        return image
+
+    def set_fourier_masks(self, masks, depth, image):
+        '''
+        Store the mask stack, the edit shown and its masked spectrum.
+        '''
+        if self.defer(self.set_fourier_masks, masks, depth, image):
+            return
+        self.fourier_masks, self.fourier_depth, self.fourier_image = masks, depth, image
+
+    @property
+    def fourier_mask(self):
+        return self.fourier_masks[self.fourier_depth]
+
+    def show_fourier_mask(self):
+        self.fourier_image = self.fourierManager.apply_mask(self.fourier_magnitude, self.fourier_mask)
+        return self.fourier_image
 
     def getCurrentImage(self):
         return self.current_image
 
+    def get_pyramid(self):
+        '''
+        Return the display pyramid of the current image. It is built once per
+        image version and discarded as soon as the current image changes.
+        '''
+        if self.pyramid is None or self.pyramid.image is not self.current_image:
+            self.pyramid = ImagePyramid(self.current_image)
+        return self.pyramid
+
+    def get_color_planes(self, proxy=False):
+        '''
+        Return the HSI planes of the current image (or of its preview proxy).
+        They are converted once per image version, or kept from the colour
+        adjustment that made the image, so previews and chained adjustments
+        only convert back to RGB.
+        '''
+        key = 'proxy' if proxy else 'image'
+        image = self.previewEngine.get_proxy(self.current_image) if proxy else self.current_image
+        cached = self.color_planes[key]
+        if cached is None or cached[0] is not image:
+            cached = self.color_planes[key] = (image, converter.rgb_to_hsi_image(image))
+        return cached[1]
+
     def undoAction(self):
-        self.current_image = self.undo_image
+        self._current_image_buffer = self._undo_image_buffer
         return self.current_image
 
     def redoAction(self):
-        self.current_image = self.redo_image
+        self._current_image_buffer = self._redo_image_buffer
         return self.current_image
 
     def undoFourierAction(self):
-        self.fourier_image = self.undo_fourier
-        return self.fourier_image
+        self.fourier_depth = max(self.fourier_depth - 1, 0)
+        return self.show_fourier_mask()
 
     def redoFourierAction(self):
-        self.fourier_image = self.redo_fourier
-        return self.fourier_image
+        self.fourier_depth = min(self.fourier_depth + 1, len(self.fourier_masks) - 1)
+        return self.show_fourier_mask()
 
     def openImage(self,image):
         img = util.read_image(image)
@@ -65,6 +178,34 @@ class TransformationController():
         filter.save_image(name,self.current_image)
 
 
+    def set_preview_size(self, width, height):
+        self.previewEngine.set_viewport(width, height)
+
+    # Previews run on a downscaled proxy of the current image and do not
+    # change the memory images. Sizes given in pixels are scaled to the proxy.
+    def preview_gamma(self, gamma):
+        return self.previewEngine.preview(self.current_image, filter.apply_gamma_correction, gamma)
+
+    def preview_median(self, filter_size):
+        def median(proxy, factor):
+            filter_size_proxy = self.previewEngine.scale_length(filter_size, factor)
+            return filter.apply_median(proxy, int(round(filter_size_proxy)))
+        return self.previewEngine.preview_scaled(self.current_image, median)
+
+    def preview_gaussian(self, filter_size, sigma):
+        def gaussian(proxy, factor):
+            filter_size_proxy = self.previewEngine.scale_length(filter_size, factor)
+            sigma_proxy = self.previewEngine.scale_length(sigma, factor)
+            return filter.apply_gaussian(proxy, int(round(filter_size_proxy)), sigma_proxy)
+        return self.previewEngine.preview_scaled(self.current_image, gaussian)
+
+    def preview_color(self, hue, saturation, intensity):
+        proxy = self.previewEngine.get_proxy(self.current_image)
+        if proxy.ndim == 2:
+            return proxy
+        hsi = color.adjust_hsi_planes(self.get_color_planes(proxy=True), hue, saturation, intensity)
+        return color.hsi_planes_to_image(proxy, hsi)
+
     def negativeTransform(self):
         image  = (filter.apply_negative(self.current_image)).astype(np.uint8)
         self.update_memory_images(image)
@@ -86,6 +227,7 @@ class TransformationController():
         return self.current_image
 
     def show_histogram(self):
+        import matplotlib.pyplot as plt
         a = filter.histogram(self.current_image)
         f = plt.figure()
         _ = plt.hist(a, bins='auto')  # arguments are passed to np.histogram
@@ -143,59 +285,112 @@ class TransformationController():
         return self.current_image
 
     def rgb_to_gray(self):
-        # print("RGBA:")
-        print(self.current_image.shape)
-        # print("Shape é RGBA")
         img =self.current_image
-        print(img.shape)
-        image = converter.rgb_to_gray(img)
+        # uint8 images stay uint8, with integer arithmetic
+        image = converter.rgb_to_gray(img, fixed_point=True)
         self.update_memory_images(image)
         return self.current_image
 
     def rgb_to_hsv(self):
         if len(self.current_image.shape) == 3:
-            r,g,b = color.get_rgb_layers(self.original_image)
-            image = converter.rgb_to_hsv(r,g,b)
+            hsv = converter.rgb_to_hsv_image(self.current_image)
+            # The planes are shown as an image, every one scaled to [0, 255]
+            hsv *= np.array([255 / 360, 255, 255], dtype=np.float32)
+            image = np.rint(hsv).astype(np.uint8)
             self.update_memory_images(image)
         return self.current_image
 
-    def apply_fourier(self):
-        ft = self.fourierManager.fft2(self.current_image)
-        shift = self.fourierManager.fftshift(ft)
-        self.fourier_image = shift
-        self.current_complete_fourier = shift.copy()
-        mag = abs(shift)
+    def apply_fourier(self, luminance=False):
+        image = source = self.current_image
+        luminance = luminance and image.ndim == 3
+        if image.ndim == 3:
+            # The alpha channel is kept out of the frequency domain
+            image = image[:, :, :3]
+            if luminance:
+                image = converter.rgb_to_gray(image)
+        # Only half of the spectrum of a real image is kept, the other half
+        # is its complex conjugate.
+        spectrum = self.fourierManager.rfft2(image)
+        width = image.shape[1]
+        mag = self.fourierManager.full_spectrum(abs(spectrum), width)
+        mag = self.fourierManager.fftshift(mag)
         mag = np.log(mag)
         mag = filter.normalize_image(mag)
         mag = mag.astype(np.uint8).copy()
 
-        self.update_fourier_memory_images(mag)
+        self.set_fourier(source, luminance, spectrum, width, mag)
+        return mag
 
-        return self.fourier_image
+    def set_fourier(self, source, luminance, spectrum, width, magnitude):
+        '''
+        Store the spectrum of source and start a new stack of mask edits.
+        '''
+        if self.defer(self.set_fourier, source, luminance, spectrum, width, magnitude):
+            return
+        self.fourier_source = source
+        self.fourier_luminance = luminance
+        self.current_complete_fourier = spectrum
+        self.fourier_width = width
+        self.fourier_image = self.fourier_magnitude = magnitude
+        # The frequency filters build up a transfer function over the centred spectrum
+        self.fourier_masks = [np.ones(magnitude.shape[:2], dtype=np.float32)]
+        self.fourier_depth = 0
 
-    def apply_low_pass(self, radius):
-        image = self.fourierManager.lowPassFilter(self.fourier_image,radius)
-        # self.current_complete_fourier = self.fourierManager.lowPassFilter(self.current_complete_fourier,radius)
-        self.update_fourier_memory_images(image)
-        return self.fourier_image
+    def apply_low_pass(self, radius, kind='ideal', order=2):
+        return self.apply_fourier_mask(fourierFilter.low_pass(self.fourier_mask.shape, radius, kind, order))
 
-    def apply_high_pass(self, radius):
-        image = self.fourierManager.highPassFilter(self.fourier_image,radius)
-        # self.current_complete_fourier = self.fourierManager.highPassFilter(self.current_complete_fourier,radius)
-        self.update_fourier_memory_images(image)
-        return self.fourier_image
+    def apply_high_pass(self, radius, kind='ideal', order=2):
+        return self.apply_fourier_mask(fourierFilter.high_pass(self.fourier_mask.shape, radius, kind, order))
 
-    def apply_band_pass(self, radius_minor,radius_major):
-        image = self.fourierManager.bandPassFilter(self.fourier_image,radius_minor,radius_major)
-        self.update_fourier_memory_images(image)
-        return self.fourier_image
+    def apply_band_pass(self, radius_minor, radius_major, kind='ideal', order=2):
+        return self.apply_fourier_mask(fourierFilter.band_pass(self.fourier_mask.shape, radius_minor, radius_major, kind, order))
+
+    def apply_band_reject(self, radius_minor, radius_major, kind='ideal', order=2):
+        return self.apply_fourier_mask(fourierFilter.band_reject(self.fourier_mask.shape, radius_minor, radius_major, kind, order))
+
+    def apply_fourier_mask(self, mask):
+        return self.update_fourier_memory_images(fourierFilter.compose(self.fourier_mask, mask))
 
     def apply_inverse_fourier(self):
-        shift = self.current_complete_fourier
-        shift[np.where (self.fourier_image  == 0)] = 0
-        ishift = self.fourierManager.ifftshift(shift)
-        p_img = abs(self.fourierManager.ifft2(ishift))
-        # image = self.fourierManager
+        spectrum = self.current_complete_fourier
+        # The mask is defined over the centred full spectrum, the half kept starts at frequency 0
+        mask = self.fourierManager.ifftshift(self.fourier_mask)[:, :spectrum.shape[1]]
+        return self.inverse_fourier(spectrum, mask, self.fourier_width, self.fourier_source)
+
+    def preview_inverse_fourier(self, mask=None):
+        '''
+        Inverse transform of the edited spectrum at the preview resolution. Only
+        the lowest frequencies are kept, which gives a downscaled image with a
+        smaller (and faster) inverse transform.
+
+        Previews running on a worker thread get the mask from the GUI thread,
+        since the mask stack changes there while they run.
+        '''
+        if mask is None:
+            mask = self.fourier_mask
+        source = self.fourier_source
+        height, width = source.shape[:2]
+        factor = self.previewEngine.get_factor(height, width)
+        proxy_height, proxy_width = height // factor, width // factor
+        rows = np.r_[0:(proxy_height + 1) // 2, height - proxy_height // 2:height]
+        columns = proxy_width // 2 + 1
+        spectrum = self.current_complete_fourier[rows, :columns]
+        mask = self.fourierManager.ifftshift(mask)[rows, :columns]
+        # Fewer coefficients are summed by the smaller inverse transform
+        spectrum = spectrum * np.float32(proxy_height * proxy_width / (height * width))
+        return self.inverse_fourier(spectrum, mask, proxy_width, self.previewEngine.get_proxy(source))
+
+    def inverse_fourier(self, spectrum, mask, width, source):
+        spectrum = fourierFilter.apply(spectrum, mask)
+        p_img = abs(self.fourierManager.irfft2(spectrum, width))
+        if source.ndim == 3:
+            colour = source[:, :, :3].astype(float)
+            if self.fourier_luminance:
+                # Only the luminance was filtered, the chroma is the original one
+                p_img = colour + (p_img - converter.rgb_to_gray(colour))[:, :, np.newaxis]
+            p_img = np.clip(p_img, 0, 255).astype(source.dtype)
+            if source.shape[2] > 3:
+                p_img = np.dstack((p_img, source[:, :, 3:]))
         return p_img
 
     def apply_sepia(self):
@@ -205,6 +400,45 @@ class TransformationController():
             return self.current_image
 
 
+    def apply_white_balance(self):
+        if self.current_image.ndim == 3:
+            image = colorMatrix.apply(self.current_image, colorMatrix.gray_world(self.current_image))
+            self.update_memory_images(image)
+        return self.current_image
+
+    def apply_channel_swap(self, order):
+        if self.current_image.ndim == 3:
+            image = colorMatrix.apply(self.current_image, colorMatrix.swap(order))
+            self.update_memory_images(image)
+        return self.current_image
+
+    def adjust_color(self, hue=1, saturation=1, intensity=1):
+        if self.current_image.ndim == 3:
+            hsi = color.adjust_hsi_planes(self.get_color_planes(), hue, saturation, intensity)
+            # The planes are kept with the new image, so chained adjustments
+            # convert the image to HSI only once
+            image, hsi = color.hsi_planes_to_image_with_planes(self.current_image, hsi)
+            self.update_memory_images(image, hsi)
+        return self.current_image
+
+    def apply_lut(self, path, interpolation='tetrahedral'):
+        if self.current_image.ndim == 3:
+            image = ColorLut.load(path).apply(self.current_image, interpolation)
+            self.update_memory_images(image)
+        return self.current_image
+
+    def save_color_lut(self, path, hue=1, saturation=1, intensity=1, size=33):
+        '''
+        Bake a hue/saturation/intensity adjustment into a .cube LUT.
+        '''
+        def adjust(image):
+            hsi = color.adjust_hsi_planes(converter.rgb_to_hsi_image(image), hue, saturation, intensity)
+            return color.hsi_planes_to_image(image, hsi)
+        lut = ColorLut.from_function(adjust, size=size)
+        lut.title = 'Hue x%g, saturation x%g, intensity x%g' % (hue, saturation, intensity)
+        lut.save(path)
+        return lut
+
     def apply_chroma_key(self,background,faixa =30):
         if len(self.current_image.shape) == 3:
             image =  color.apply_chroma_key(background, self.current_image,faixa)
@@ -238,6 +472,11 @@ class TransformationController():
         self.update_memory_images(image)
         return self.current_image
 
+    def apply_scale_resample(self, scale, filter='lanczos3'):
+        image = scal.apply_resample(self.current_image, scale, filter)
+        self.update_memory_images(image)
+        return self.current_image
+
     def apply_rotation_nearest(self, angle):
         image = scal.apply_rotate_nearest(self.current_image,angle)
         self.update_memory_images(image)
@@ -248,6 +487,32 @@ class TransformationController():
         self.update_memory_images(image)
         return self.current_image
 
+    # Views of the current image, the pixels are shared with the undo state
+    def flip_horizontal(self):
+        self.update_memory_images(scal.flip_horizontal(self.current_image))
+        return self.current_image
+
+    def flip_vertical(self):
+        self.update_memory_images(scal.flip_vertical(self.current_image))
+        return self.current_image
+
+    def rotate_90(self, turns=1):
+        self.update_memory_images(scal.rotate_90(self.current_image, turns))
+        return self.current_image
+
+    def transpose(self):
+        self.update_memory_images(scal.transpose(self.current_image))
+        return self.current_image
+
+    def crop(self, top, left, height, width):
+        self.update_memory_images(scal.crop(self.current_image, top, left, height, width))
+        return self.current_image
+
+    def apply_rotate(self, angle, interpolation='bilinear', expand=False):
+        image = scal.apply_rotate(self.current_image, angle, interpolation, expand)
+        self.update_memory_images(image)
+        return self.current_image
+
     def apply_laplacian(self):
         image,mask = filter.apply_laplacian(self.current_image)
         self.update_memory_images(image)
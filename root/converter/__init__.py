@@ -1,3 +1,6 @@
 from .color_converter import ColorConverter
+from .color_matrix import ColorMatrix
 
+from .resampler import Resampler
+from .affine_warp import AffineWarp, RemapTable, RemapCache
 from .scale_converter import ScaleConverter
@@ -0,0 +1,390 @@
+from collections import OrderedDict
+from root.util import TaskContext
+import numpy as np
+import math
+import threading
+
+# Pixels computed at once (bounds the memory used by the coordinates and taps)
+_STRIP_PIXELS = 1 << 20
+# Pixels of border needed around the image by each interpolation
+_BORDERS = {'nearest': 1, 'bilinear': 1, 'bicubic': 2}
+# Tap weights of remap tables by interpolation
+_WEIGHT_TABLES = {}
+
+
+class AffineWarp():
+    '''
+    Geometric transforms given by a 2x3 affine matrix M mapping source
+    coordinates to destination ones: [x', y'] = M . [x, y, 1], where x is the
+    column and y the row of a pixel centre.
+
+    Every output pixel is mapped back to the source with the inverse matrix
+    (so there are no holes) and sampled there. The output is computed in
+    strips of rows.
+    '''
+
+    @staticmethod
+    def rotation(angle, center=(0, 0)):
+        '''
+        Counter-clockwise rotation (as seen on screen) by angle degrees around center (x, y).
+        '''
+        angle = math.radians(angle)
+        cos, sin = math.cos(angle), math.sin(angle)
+        cx, cy = center
+        # Rows grow downwards, so the sine signs are the opposite of the usual ones
+        return np.array([
+            [cos, sin, cx - cos * cx - sin * cy],
+            [-sin, cos, cy + sin * cx - cos * cy]])
+
+    @staticmethod
+    def scaling(scale_x, scale_y=None):
+        if scale_y is None:
+            scale_y = scale_x
+        return np.array([[scale_x, 0., 0.], [0., scale_y, 0.]])
+
+    @staticmethod
+    def shear(shear_x, shear_y=0.):
+        return np.array([[1., shear_x, 0.], [shear_y, 1., 0.]])
+
+    @staticmethod
+    def translation(dx, dy):
+        return np.array([[1., 0., dx], [0., 1., dy]])
+
+    @staticmethod
+    def compose(*matrices):
+        '''
+        Matrix applying the given transforms in order (the first one first).
+        '''
+        composed = np.eye(3)
+        for matrix in matrices:
+            composed = np.vstack((matrix, [0, 0, 1])) @ composed
+        return composed[:2]
+
+    @staticmethod
+    def invert(matrix):
+        return np.linalg.inv(np.vstack((matrix, [0, 0, 1])))[:2]
+
+    @staticmethod
+    def expand(matrix, height, width):
+        '''
+        Return (matrix, height, width) for a canvas holding the whole
+        transformed image: the matrix is translated to start at (0, 0).
+        '''
+        corners = np.array([[0, 0, 1], [width - 1, 0, 1], [0, height - 1, 1], [width - 1, height - 1, 1]])
+        mapped = corners @ np.asarray(matrix, dtype=float).T
+        low = mapped.min(axis=0)
+        size = np.ceil(mapped.max(axis=0) - low - 1e-9).astype(int) + 1
+        matrix = AffineWarp.compose(matrix, AffineWarp.translation(-low[0], -low[1]))
+        return matrix, size[1], size[0]
+
+    @staticmethod
+    def get_source(img, border, fill, mode):
+        '''
+        Image surrounded by border pixels of fill colour (mode 'constant') or
+        repeating its edges (mode 'edge'). Samples are clipped to this
+        frame, so anything outside the image reads the border.
+        '''
+        padding = ((border, border), (border, border)) + ((0, 0),) * (img.ndim - 2)
+        if mode == 'edge':
+            return np.pad(img, padding, 'edge')
+        if mode != 'constant':
+            raise ValueError("Unknown border mode: %s" % mode)
+        dtype = img.dtype
+        if np.any(np.asarray(fill, dtype=float) != np.asarray(fill).astype(dtype)):
+            # The fill colour does not fit the image type
+            dtype = np.float64 if img.dtype == np.float64 else np.float32
+        source = np.empty((img.shape[0] + 2 * border, img.shape[1] + 2 * border) + img.shape[2:], dtype=dtype)
+        source[...] = fill
+        source[border:-border, border:-border] = img
+        return source
+
+    @staticmethod
+    def get_taps(coordinates, length, interpolation):
+        '''
+        Return the source indexes and weights along one axis for every output
+        pixel, as lists with one entry per tap.
+        '''
+        if interpolation == 'nearest':
+            return [np.clip(np.floor(coordinates + 0.5).astype(np.intp), 0, length - 1)], [1.]
+        start = np.floor(coordinates)
+        fraction = coordinates - start
+        start = start.astype(np.intp)
+        if interpolation == 'bilinear':
+            offsets, weights = (0, 1), (1 - fraction, fraction)
+        elif interpolation == 'bicubic':
+            offsets = (-1, 0, 1, 2)
+            weights = [AffineWarp.cubic(fraction - offset) for offset in offsets]
+        else:
+            raise ValueError("Unknown interpolation: %s" % interpolation)
+        indexes = [np.clip(start + offset, 0, length - 1) for offset in offsets]
+        return indexes, weights
+
+    @staticmethod
+    def cubic(x, a=-0.5):
+        x = np.abs(x)
+        near = ((a + 2) * x - (a + 3)) * x * x + 1
+        far = ((a * x - 5 * a) * x + 8 * a) * x - 4 * a
+        return np.where(x < 1, near, np.where(x < 2, far, 0))
+
+    @staticmethod
+    def get_mapping(shape, matrix, output_shape=None, expand=False, inverse=False):
+        '''
+        Return (inverse matrix, output height, output width) of a warp.
+        '''
+        matrix = np.asarray(matrix, dtype=float)
+        height, width = shape[:2]
+        inverse_matrix = None
+        if inverse:
+            inverse_matrix, matrix = matrix, AffineWarp.invert(matrix)
+        if output_shape is None:
+            output_shape = (height, width)
+        out_height, out_width = output_shape
+        if expand:
+            matrix, out_height, out_width = AffineWarp.expand(matrix, height, width)
+            inverse_matrix = None
+        if inverse_matrix is None:
+            inverse_matrix = AffineWarp.invert(matrix)
+        return inverse_matrix, int(out_height), int(out_width)
+
+    @staticmethod
+    def get_coordinates(inverse_matrix, top, bottom, out_width, pad):
+        '''
+        Source coordinates (in the padded image) of the output rows top to bottom.
+        '''
+        columns = np.arange(out_width, dtype=float)
+        rows = np.arange(top, bottom, dtype=float)[:, np.newaxis]
+        xs = inverse_matrix[0, 0] * columns + inverse_matrix[0, 1] * rows + (inverse_matrix[0, 2] + pad)
+        ys = inverse_matrix[1, 0] * columns + inverse_matrix[1, 1] * rows + (inverse_matrix[1, 2] + pad)
+        return xs, ys
+
+    @staticmethod
+    def get_strip_rows(out_width):
+        return max(1, _STRIP_PIXELS // max(out_width, 1))
+
+    @staticmethod
+    def warp(img, matrix, output_shape=None, interpolation='bilinear', expand=False,
+             fill=0, border='constant', inverse=False, cache=None):
+        '''
+        Transform img (h, w) or (h, w, c) by the affine matrix. If inverse is
+        True the matrix maps destination to source coordinates instead.
+
+        output_shape (height, width) defaults to the input size; expand makes
+        the canvas as big as the transformed image. Pixels mapped from
+        outside the image get the fill colour (a value or one per channel),
+        or repeat the image edges with border='edge'.
+
+        With a RemapCache the coordinates and weights are computed once per
+        geometry and reused by the following calls.
+        '''
+        img = np.asarray(img)
+        inverse_matrix, out_height, out_width = AffineWarp.get_mapping(img.shape, matrix, output_shape, expand, inverse)
+        if cache is not None:
+            table = cache.get(img.shape, inverse_matrix, (out_height, out_width), interpolation)
+            return table.apply(img, fill, border)
+
+        pad = _BORDERS.get(interpolation, 1)
+        source = AffineWarp.get_source(img, pad, fill, border)
+        out = np.empty((out_height, out_width) + img.shape[2:], dtype=img.dtype)
+        strip = AffineWarp.get_strip_rows(out_width)
+        for top in range(0, out_height, strip):
+            TaskContext.step(top, out_height)
+            xs, ys = AffineWarp.get_coordinates(inverse_matrix, top, min(top + strip, out_height), out_width, pad)
+            x_indexes, x_weights = AffineWarp.get_taps(xs, source.shape[1], interpolation)
+            y_indexes, y_weights = AffineWarp.get_taps(ys, source.shape[0], interpolation)
+            out[top:top + strip] = AffineWarp.gather(source, x_indexes, x_weights, y_indexes, y_weights, img.dtype)
+        return out
+
+    @staticmethod
+    def gather(source, x_indexes, x_weights, y_indexes, y_weights, dtype):
+        '''
+        Weighted sum of the source pixels at every (y tap, x tap) pair.
+        '''
+        # Gathers from the flattened image are cheaper than 2-D fancy indexing
+        pixels = source.reshape((-1,) + source.shape[2:])
+        width = source.shape[1]
+        if len(x_indexes) == 1:
+            return pixels.take(y_indexes[0] * width + x_indexes[0], axis=0).astype(dtype, copy=False)
+
+        precision = np.float64 if dtype == np.float64 else np.float32
+        extra_axes = (Ellipsis,) + (np.newaxis,) * (source.ndim - 2)
+        values = np.zeros(x_indexes[0].shape + source.shape[2:], dtype=precision)
+        for y_index, y_weight in zip(y_indexes, y_weights):
+            row = np.zeros_like(values)
+            offset = y_index * width
+            for x_index, x_weight in zip(x_indexes, x_weights):
+                row += x_weight.astype(precision)[extra_axes] * pixels.take(offset + x_index, axis=0)
+            row *= y_weight.astype(precision)[extra_axes]
+            values += row
+        if np.issubdtype(dtype, np.integer):
+            limits = np.iinfo(dtype)
+            values = np.clip(np.rint(values), limits.min, limits.max)
+        return values.astype(dtype)
+
+
+class RemapTable():
+    '''
+    Precomputed source positions of a warp, for images of one size: the
+    integer part of the coordinates as int16 and the fractional part in
+    fixed point (FRACTION_BITS bits). Applying it only gathers and blends.
+    '''
+
+    FRACTION_BITS = 10
+
+    def __init__(self, key, interpolation, pad, xs, ys, x_fractions=None, y_fractions=None):
+        self.key = key
+        self.interpolation = interpolation
+        self.pad = pad
+        self.xs, self.ys = xs, ys
+        self.x_fractions, self.y_fractions = x_fractions, y_fractions
+
+    @staticmethod
+    def get_key(shape, inverse_matrix, output_shape, interpolation):
+        matrix = tuple(float(value) for value in np.asarray(inverse_matrix, dtype=float).ravel())
+        return (tuple(int(length) for length in shape[:2]), matrix, tuple(int(length) for length in output_shape), interpolation)
+
+    @staticmethod
+    def build(shape, inverse_matrix, output_shape, interpolation):
+        if interpolation not in _BORDERS:
+            raise ValueError("Unknown interpolation: %s" % interpolation)
+        pad = _BORDERS[interpolation]
+        out_height, out_width = output_shape
+        if max(shape[0], shape[1]) + 2 * pad + 4 > np.iinfo(np.int16).max:
+            raise ValueError("Images with more than %d pixels per side do not fit a remap table" % (np.iinfo(np.int16).max - 2 * pad - 4))
+        scale = 1 << RemapTable.FRACTION_BITS
+        xs = np.empty(output_shape, dtype=np.int16)
+        ys = np.empty(output_shape, dtype=np.int16)
+        x_fractions = y_fractions = None
+        if interpolation != 'nearest':
+            x_fractions = np.empty(output_shape, dtype=np.uint16)
+            y_fractions = np.empty(output_shape, dtype=np.uint16)
+        lengths = (shape[1] + 2 * pad, shape[0] + 2 * pad)
+        strip = AffineWarp.get_strip_rows(out_width)
+        for top in range(0, out_height, strip):
+            rows = slice(top, top + strip)
+            coordinates = AffineWarp.get_coordinates(inverse_matrix, top, min(top + strip, out_height), out_width, pad)
+            for coordinate, length, indexes, fractions in zip(coordinates, lengths, (xs, ys), (x_fractions, y_fractions)):
+                if fractions is None:
+                    indexes[rows] = np.clip(np.floor(coordinate + 0.5), 0, length - 1)
+                    continue
+                # Far outside the image only the fill colour is read, wherever it is
+                coordinate = np.clip(coordinate, -3, length + 2)
+                start = np.floor(coordinate)
+                fraction = np.rint((coordinate - start) * scale).astype(np.intp)
+                # A fraction rounded up to 1 moves to the next pixel
+                indexes[rows] = start + (fraction >> RemapTable.FRACTION_BITS)
+                fractions[rows] = fraction & (scale - 1)
+        key = RemapTable.get_key(shape, inverse_matrix, output_shape, interpolation)
+        return RemapTable(key, interpolation, pad, xs, ys, x_fractions, y_fractions)
+
+    @staticmethod
+    def get_weight_table(interpolation):
+        '''
+        Weights of the taps for every fixed point fraction, shape (2**FRACTION_BITS, taps).
+        '''
+        table = _WEIGHT_TABLES.get(interpolation)
+        if table is None:
+            fraction = np.arange(1 << RemapTable.FRACTION_BITS) / float(1 << RemapTable.FRACTION_BITS)
+            if interpolation == 'bilinear':
+                weights = [1 - fraction, fraction]
+            else:
+                weights = [AffineWarp.cubic(fraction - offset) for offset in (-1, 0, 1, 2)]
+            table = _WEIGHT_TABLES[interpolation] = np.stack(weights, axis=-1).astype(np.float32)
+        return table
+
+    @property
+    def output_shape(self):
+        return self.xs.shape
+
+    @property
+    def nbytes(self):
+        arrays = [self.xs, self.ys, self.x_fractions, self.y_fractions]
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def apply(self, img, fill=0, border='constant'):
+        img = np.asarray(img)
+        if tuple(img.shape[:2]) != self.key[0]:
+            raise ValueError("The remap table is for %dx%d images" % (self.key[0][1], self.key[0][0]))
+        source = AffineWarp.get_source(img, self.pad, fill, border)
+        out_height, out_width = self.output_shape
+        out = np.empty((out_height, out_width) + img.shape[2:], dtype=img.dtype)
+        if self.interpolation == 'nearest':
+            offsets = (0,)
+        elif self.interpolation == 'bilinear':
+            offsets = (0, 1)
+        else:
+            offsets = (-1, 0, 1, 2)
+        strip = AffineWarp.get_strip_rows(out_width)
+        for top in range(0, out_height, strip):
+            TaskContext.step(top, out_height)
+            rows = slice(top, top + strip)
+            taps = []
+            for indexes, fractions, length in [(self.xs, self.x_fractions, source.shape[1]), (self.ys, self.y_fractions, source.shape[0])]:
+                start = indexes[rows].astype(np.intp)
+                tap_indexes = [np.clip(start + offset, 0, length - 1) for offset in offsets]
+                if fractions is None:
+                    taps.append((tap_indexes, [1.]))
+                else:
+                    weights = self.get_weight_table(self.interpolation)[fractions[rows]]
+                    taps.append((tap_indexes, [weights[..., tap] for tap in range(len(offsets))]))
+            (x_indexes, x_weights), (y_indexes, y_weights) = taps
+            out[rows] = AffineWarp.gather(source, x_indexes, x_weights, y_indexes, y_weights, img.dtype)
+        return out
+
+    def save(self, path):
+        '''
+        Write the table to a .npz file (see load).
+        '''
+        arrays = {'xs': self.xs, 'ys': self.ys}
+        if self.x_fractions is not None:
+            arrays.update(x_fractions=self.x_fractions, y_fractions=self.y_fractions)
+        shape, matrix, output_shape, interpolation = self.key
+        np.savez(path, shape=shape, matrix=matrix, output_shape=output_shape,
+                 interpolation=interpolation, pad=self.pad, **arrays)
+
+    @staticmethod
+    def load(path):
+        with np.load(path) as data:
+            interpolation = str(data['interpolation'])
+            key = RemapTable.get_key(data['shape'], data['matrix'], data['output_shape'], interpolation)
+            fractions = [data[name] if name in data.files else None for name in ('x_fractions', 'y_fractions')]
+            return RemapTable(key, interpolation, int(data['pad']), data['xs'], data['ys'], *fractions)
+
+
+class RemapCache():
+    '''
+    Remap tables by (image size, transform, output size, interpolation), in
+    a LRU of maxsize entries.
+    '''
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self.tables = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, shape, inverse_matrix, output_shape, interpolation):
+        key = RemapTable.get_key(shape, inverse_matrix, output_shape, interpolation)
+        with self.lock:
+            table = self.tables.get(key)
+            if table is not None:
+                self.tables.move_to_end(key)
+                return table
+        table = RemapTable.build(shape, np.asarray(inverse_matrix, dtype=float), output_shape, interpolation)
+        self.add(table)
+        return table
+
+    def add(self, table):
+        '''
+        Add a table, for example one read with RemapTable.load.
+        '''
+        with self.lock:
+            self.tables[table.key] = table
+            self.tables.move_to_end(table.key)
+            if len(self.tables) > self.maxsize:
+                self.tables.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.tables.clear()
+
+    def __len__(self):
+        return len(self.tables)
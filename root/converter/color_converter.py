@@ -1,12 +1,33 @@
 import numpy as np
-from math import floor, cos, radians, degrees, acos
+from .color_matrix import ColorMatrix, GRAY_WEIGHTS, RGB_TO_YCBCR, YCBCR_TO_RGB
 
 
 class ColorConverter():
 
     @staticmethod
-    def rgb_to_gray(rgb):
-        return np.dot(rgb[...,:3], [0.2989, 0.5870, 0.1140])
+    def rgb_to_gray(rgb, fixed_point=False):
+        '''
+        Grey image: uint8 for a uint8 colour image with fixed_point (computed
+        with integer arithmetic, within one level of the rounded float
+        result), otherwise the float64 weighted mean of the RGB channels.
+        '''
+        if fixed_point and rgb.dtype == np.uint8 and rgb.ndim == 3:
+            return ColorMatrix.transform(rgb, [GRAY_WEIGHTS], fixed_point=True)[..., 0]
+        return np.dot(rgb[...,:3], GRAY_WEIGHTS)
+
+    @staticmethod
+    def rgb_to_ycbcr(img, fixed_point=False):
+        '''
+        Convert a RGB(A) image to full range YCbCr, with the dtype of img.
+        '''
+        return ColorMatrix.apply(img, RGB_TO_YCBCR, fixed_point)
+
+    @staticmethod
+    def ycbcr_to_rgb(img, fixed_point=False):
+        '''
+        Convert a full range YCbCr image back to RGB, with the dtype of img.
+        '''
+        return ColorMatrix.apply(img, YCBCR_TO_RGB, fixed_point)
 
     @staticmethod
     def rgb_to_gray_via_weighted_average(r, g, b):
@@ -18,134 +39,156 @@ class ColorConverter():
 
     @staticmethod
     def calculate_hsv_hue(r, g, b):
-        max_value = max(r, g, b)
-        min_value = min(r, g, b)
-        diff = max_value - min_value
-        if max_value == min_value:
-            hue = 0
-        elif max_value == r:
-            hue = (60 * ((g - b) / diff) + 360) % 360
-        elif max_value == g:
-            hue = (60 * ((b - r) / diff) + 120) % 360
-
-        return hue
+        return ColorConverter.get_hsv_hue(np.array([r, g, b], dtype=np.float64))
 
     @staticmethod
     def calculate_hsv_saturation(r, g, b):
-        max_value = max(r, g, b)
-        min_value = min(r, g, b)
-        diff = max_value - min_value
+        return ColorConverter.get_hsv_saturation(np.array([r, g, b], dtype=np.float64))
 
-        if max_value == 0:
-            saturation = 0
-        else:
-            saturation = diff / max_value
+    @staticmethod
+    def get_hsv_hue(rgb):
+        '''
+        Hue in [0, 360) of the last axis of rgb (any range).
+        '''
+        r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+        max_value = np.maximum(np.maximum(r, g), b)
+        diff = max_value - np.minimum(np.minimum(r, g), b)
+        # Grey pixels have no hue, their difference is replaced to avoid 0 / 0
+        safe = np.where(diff == 0, 1, diff)
+        hue = np.select(
+            [diff == 0, max_value == r, max_value == g],
+            [0, (60 * ((g - b) / safe) + 360) % 360, 60 * ((b - r) / safe) + 120],
+            60 * ((r - g) / safe) + 240)
+        return hue.astype(rgb.dtype)
 
-        return saturation
+    @staticmethod
+    def get_hsv_saturation(rgb):
+        r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+        max_value = np.maximum(np.maximum(r, g), b)
+        diff = max_value - np.minimum(np.minimum(r, g), b)
+        return np.where(max_value == 0, 0, diff / np.where(max_value == 0, 1, max_value)).astype(rgb.dtype)
 
     @staticmethod
-    def rgb_to_hsv(r, g, b):
+    def rgb_to_hsv_image(img, dtype=np.float32):
         '''
-        Convert a RGB image to HSV image.
+        Convert a RGB image (h, w, 3) or (h, w, 4) to HSV planes (h, w, 3).
         Input: R, G, B values are [0, 255].
-        Output: H value is [0, 360]. S, V values are [0, 1].
+        Output: H value is [0, 360). S, V values are [0, 1].
         '''
-        r, g, b = r / 255.0, g / 255.0, b / 255.0
-
-        h = ColorConverter.calculate_hsv_hue(r, g, b)
-        s = ColorConverter.calculate_hsv_saturation(r, g, b)
-        v = max(r, g, b)
-        return int(h), s, v
+        rgb = np.asarray(img)[..., :3].astype(dtype) / dtype(255)
+        return np.stack((ColorConverter.get_hsv_hue(rgb),
+                         ColorConverter.get_hsv_saturation(rgb),
+                         np.maximum(np.maximum(rgb[..., 0], rgb[..., 1]), rgb[..., 2])), axis=-1)
 
     @staticmethod
-    def hsv_to_rgb(h, s, v):
+    def hsv_to_rgb_image(hsv):
         '''
-        Convert a HSV image to RGB image.
+        Convert HSV planes (h, w, 3) to a RGB image.
         Input: H value is [0, 360]. S, V values are [0, 1].
-        Output: R, G, B values are [0, 255].
+        Output: R, G, B values are [0, 255], not rounded.
         '''
-        h = float(h)
-        s = float(s)
-        v = float(v)
-        h60 = h / 60.0
-        h60f = floor(h60)
-        hi = int(h60f) % 6
+        h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+        h60 = h / 60
+        h60f = np.floor(h60)
+        hi = h60f.astype(int) % 6
         f = h60 - h60f
         p = v * (1 - s)
         q = v * (1 - f * s)
         t = v * (1 - (1 - f) * s)
-        r, g, b = 0, 0, 0
-        if hi == 0:
-            r, g, b = v, t, p
-        elif hi == 1:
-            r, g, b = q, v, p
-        elif hi == 2:
-            r, g, b = p, v, t
-        elif hi == 3:
-            r, g, b = p, q, v
-        elif hi == 4:
-            r, g, b = t, p, v
-        elif hi == 5:
-            r, g, b = v, p, q
-        return ColorConverter.normalize_rgb(r, g, b)
+        sectors = [hi == sector for sector in range(6)]
+        r = np.select(sectors, [v, q, p, p, t, v])
+        g = np.select(sectors, [t, v, v, q, p, p])
+        b = np.select(sectors, [p, p, t, v, v, q])
+        return np.stack((r, g, b), axis=-1) * hsv.dtype.type(255)
 
     @staticmethod
-    def rgb_to_hsi(r, g, b):
+    def rgb_to_hsi_image(img, dtype=np.float32):
         '''
-        Convert a RGB image to HSI image.
+        Convert a RGB image (h, w, 3) or (h, w, 4) to HSI planes (h, w, 3).
         Input: R, G, B values are [0, 255].
         Output: H value is [0, 360]. S, I values are [0, 1].
         '''
-        r, g, b = ColorConverter.normalize_to_zero_one(r, g, b)
+        rgb = np.asarray(img)[..., :3].astype(dtype) / dtype(255)
+        r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
 
         # Hue
         numerator = 0.5 * ((r - g) + (r - b))
-        denominator = ((r - g) ** 2 + ((r - b) * (g - b))) ** 0.5
-        # A small number was added in the donominator to avoid dividing by 0
-        theta = degrees(acos(numerator / (denominator + 0.000001)))
-        if b <= g:
-            h = theta
-        else:
-            h = 360 - theta
+        denominator = np.sqrt((r - g) ** 2 + ((r - b) * (g - b)))
+        # A small number was added in the denominator to avoid dividing by 0
+        cosine = np.clip(numerator / (denominator + dtype(0.000001)), -1, 1)
+        theta = np.degrees(np.arccos(cosine))
+        h = np.where(b <= g, theta, 360 - theta)
 
-        # Saturation
-        s = 1 - ((3 / (r + g + b)) * min([r, g, b]))
+        # Saturation, black pixels have none
+        total = r + g + b
+        s = np.where(total == 0, 0, 1 - (3 / np.where(total == 0, 1, total)) * np.minimum(np.minimum(r, g), b))
 
         # Intensity
-        i = (r + g + b) / 3
+        i = total / 3
 
+        return np.stack((h, s, i), axis=-1).astype(dtype)
+
+    @staticmethod
+    def hsi_to_rgb_image(hsi):
+        '''
+        Convert HSI planes (h, w, 3) to a RGB image.
+        Input: H value is [0, 360]. S, I values are [0, 1].
+        Output: R, G, B values are [0, 255], not rounded nor clipped (some HSI
+        values are outside the RGB cube).
+        '''
+        h, s, i = hsi[..., 0] % 360, hsi[..., 1], hsi[..., 2]
+        sector = np.minimum(h // 120, 2)
+        # Angle inside the sector, every sector is computed as the RG one
+        # with the channels rotated.
+        h = h - 120 * sector
+        low = i * (1 - s)
+        high = i * (1 + ((s * np.cos(np.radians(h))) / np.cos(np.radians(60 - h))))
+        rest = 3 * i - (low + high)
+        rg, gb = sector == 0, sector == 1
+        r = np.select([rg, gb], [high, low], rest)
+        g = np.select([rg, gb], [rest, high], low)
+        b = np.select([rg, gb], [low, rest], high)
+        return np.stack((r, g, b), axis=-1) * hsi.dtype.type(255)
+
+    @staticmethod
+    def rgb_to_hsv(r, g, b):
+        '''
+        Convert a RGB pixel to HSV.
+        Input: R, G, B values are [0, 255].
+        Output: H value is [0, 360]. S, V values are [0, 1].
+        '''
+        h, s, v = ColorConverter.rgb_to_hsv_image([r, g, b], np.float64)
+        return int(h), float(s), float(v)
+
+    @staticmethod
+    def hsv_to_rgb(h, s, v):
+        '''
+        Convert a HSV pixel to RGB.
+        Input: H value is [0, 360]. S, V values are [0, 1].
+        Output: R, G, B values are [0, 255].
+        '''
+        r, g, b = ColorConverter.hsv_to_rgb_image(np.array([h, s, v], dtype=np.float64))
+        return int(r), int(g), int(b)
+
+    @staticmethod
+    def rgb_to_hsi(r, g, b):
+        '''
+        Convert a RGB pixel to HSI.
+        Input: R, G, B values are [0, 255].
+        Output: H value is [0, 360]. S, I values are [0, 1].
+        '''
+        h, s, i = ColorConverter.rgb_to_hsi_image([r, g, b], np.float64)
         return np.round(h, 2), np.round(s, 2), np.round(i, 2)
 
     @staticmethod
     def hsi_to_rgb(h, s, i):
         '''
-        Convert a HSI image to RGB image.
+        Convert a HSI pixel to RGB.
         Input: H value is [0, 360]. S, I values are [0, 1].
         Output: R, G, B values are [0, 255].
         '''
-        r, g, b = [0, 0, 0]
-
-        # RG sector (0 degrees <= hue < 120 degrees)
-        if 0 <= h < 120:
-            b = i * (1 - s)
-            r = i * (1 + ((s * cos(radians(h))) / (cos(radians(60 - h)))))
-            g = 3 * i - (r + b)
-
-        # GB sector (120 degrees <= hue < 240 degrees)
-        elif 120 <= h < 240:
-            h = h - 120
-            r = i * (1 - s)
-            g = i * (1 + ((s * cos(radians(h))) / (cos(radians(60 - h)))))
-            b = 3 * i - (r + g)
-
-        # BR sector (240 degrees <= hue <= 360 degrees)
-        elif 240 <= h <= 360:
-            h = h - 240
-            g = i * (1 - s)
-            b = i * (1 + ((s * cos(radians(h))) / (cos(radians(60 - h)))))
-            r = 3 * i - (b + g)
-
-        return ColorConverter.normalize_rgb(r, g, b)
+        r, g, b = ColorConverter.hsi_to_rgb_image(np.array([h, s, i], dtype=np.float64))
+        return int(r), int(g), int(b)
 
     @staticmethod
     def normalize_to_zero_one(r, g, b):
@@ -0,0 +1,170 @@
+from root.util import TaskContext
+import numpy as np
+
+# Pixels computed at once (bounds the memory used by the float copies)
+_STRIP_PIXELS = 1 << 20
+# Fractional bits of the fixed-point weights
+_FIXED_SHIFT = 16
+# Added to the fixed-point sums so that they stay positive
+_FIXED_BIAS = 1 << 31
+
+# Luma weights of R, G and B (ITU-R BT.601)
+GRAY_WEIGHTS = (0.2989, 0.5870, 0.1140)
+# Full range YCbCr (JPEG), as 3x4 matrices with the offsets in pixel values
+RGB_TO_YCBCR = ((0.299, 0.587, 0.114, 0),
+                (-0.168736, -0.331264, 0.5, 128),
+                (0.5, -0.418688, -0.081312, 128))
+YCBCR_TO_RGB = ((1, 0, 1.402, -1.402 * 128),
+                (1, -0.344136, -0.714136, (0.344136 + 0.714136) * 128),
+                (1, 1.772, 0, -1.772 * 128))
+
+
+class ColorMatrix():
+    '''
+    Linear channel mixes: every output colour is M . [r, g, b] for a 3x3
+    matrix M, or M . [r, g, b, 1] for a 3x4 one whose last column is an
+    offset in pixel values. Rows are the output channels.
+
+    The matrices are applied with a single matmul over the channel axis,
+    in strips of rows, and clipped straight into the output image.
+    '''
+
+    @staticmethod
+    def identity():
+        return np.eye(3, 4)
+
+    @staticmethod
+    def sepia():
+        return np.array([[0.393, 0.769, 0.189, 0],
+                         [0.349, 0.686, 0.168, 0],
+                         [0.272, 0.534, 0.131, 0]])
+
+    @staticmethod
+    def gray(weights=GRAY_WEIGHTS):
+        '''
+        Grey with the weights of ColorConverter.rgb_to_gray in every channel.
+        '''
+        return np.hstack((np.tile(weights, (3, 1)), np.zeros((3, 1))))
+
+    @staticmethod
+    def swap(order):
+        '''
+        Channel permutation: order is a string such as 'bgr' or the indexes
+        of the source channels, e.g. (2, 1, 0).
+        '''
+        if isinstance(order, str):
+            order = ['rgb'.index(channel) for channel in order.lower()]
+        if sorted(order) != [0, 1, 2]:
+            raise ValueError("A channel swap needs a permutation of r, g and b, got %s" % (order,))
+        return np.eye(3, 4)[list(order)]
+
+    @staticmethod
+    def white_balance(white):
+        '''
+        Channel gains that turn the colour white (r, g, b) into a neutral grey
+        of the same brightness.
+        '''
+        white = np.asarray(white, dtype=float)
+        if np.any(white <= 0):
+            raise ValueError("The reference white must have positive channels, got %s" % (white,))
+        return np.hstack((np.diag(white.mean() / white), np.zeros((3, 1))))
+
+    @staticmethod
+    def gray_world(img):
+        '''
+        White balance assuming that the average colour of img is grey.
+        '''
+        rgb = np.asarray(img)[..., :3].reshape(-1, 3)
+        return ColorMatrix.white_balance(np.maximum(rgb.mean(axis=0), 1))
+
+    @staticmethod
+    def to_affine(matrix):
+        '''
+        Return matrix with an offset column (a k x 3 matrix gets a zero offset).
+        '''
+        matrix = np.atleast_2d(np.asarray(matrix, dtype=float))
+        if matrix.ndim != 2 or matrix.shape[1] not in (3, 4):
+            raise ValueError("A colour matrix must be k x 3 or k x 4, got %s" % (matrix.shape,))
+        if matrix.shape[1] == 3:
+            return np.hstack((matrix, np.zeros((len(matrix), 1))))
+        return matrix
+
+    @staticmethod
+    def compose(*matrices):
+        '''
+        Matrix applying the given matrices in order (the first one first).
+        '''
+        composed = np.eye(4)
+        for matrix in matrices:
+            composed = np.vstack((ColorMatrix.to_affine(matrix), [0, 0, 0, 1])) @ composed
+        return composed[:3]
+
+    @staticmethod
+    def get_fixed_point(matrix):
+        '''
+        Weights scaled by 2^_FIXED_SHIFT as uint32, negative ones in two's
+        complement. The offsets also hold the rounding half and _FIXED_BIAS:
+        the sums are computed modulo 2^32, and with the bias the true sum
+        plus _FIXED_BIAS is always in [0, 2^32), even for negative results.
+        '''
+        scaled = np.rint(matrix * (1 << _FIXED_SHIFT)).astype(np.int64)
+        scaled[:, 3] += (1 << (_FIXED_SHIFT - 1))
+        if np.abs(scaled[:, :3]).sum(axis=1).max() * 255 + np.abs(scaled[:, 3]).max() >= _FIXED_BIAS:
+            raise ValueError("The colour matrix is too large for the fixed-point path")
+        scaled[:, 3] += _FIXED_BIAS
+        return (scaled % (1 << 32)).astype(np.uint32)
+
+    @staticmethod
+    def transform(img, matrix, fixed_point=False, out=None):
+        '''
+        Apply a k x 3 or k x 4 matrix to the RGB channels of img, giving an
+        image (h, w, k) of the same dtype. Integer images are rounded and
+        clipped to their type. fixed_point uses integer arithmetic (uint8
+        images only): uint32 sums of weights scaled by 2^16, shifted back.
+        The result is within one level of the floating point one.
+        '''
+        img = np.asarray(img)
+        if img.ndim != 3 or img.shape[2] < 3:
+            raise ValueError("A colour matrix needs a RGB image, got shape %s" % (img.shape,))
+        matrix = ColorMatrix.to_affine(matrix)
+        fixed_point = fixed_point and img.dtype == np.uint8
+        if fixed_point:
+            weights = ColorMatrix.get_fixed_point(matrix)
+        else:
+            weights = matrix.astype(np.float32)
+        integer = np.issubdtype(img.dtype, np.integer)
+        limits = np.iinfo(img.dtype) if integer else None
+
+        height, width = img.shape[:2]
+        if out is None:
+            out = np.empty((height, width, len(matrix)), dtype=img.dtype)
+        rows = max(1, _STRIP_PIXELS // max(width, 1))
+        for top in range(0, height, rows):
+            TaskContext.step(top, height)
+            rgb = img[top:top + rows, :, :3].astype(weights.dtype)
+            strip = rgb @ weights[:, :3].T
+            strip += weights[:, 3]
+            if fixed_point:
+                strip >>= _FIXED_SHIFT
+                # Less than 2^16 after the shift, the bits are the same as int32
+                strip = strip.view(np.int32)
+                strip -= _FIXED_BIAS >> _FIXED_SHIFT
+            elif integer:
+                np.rint(strip, out=strip)
+            if integer:
+                np.clip(strip, limits.min, limits.max, out=strip)
+            out[top:top + rows] = strip
+        return out
+
+    @staticmethod
+    def apply(img, matrix, fixed_point=False):
+        '''
+        Apply a 3x3 or 3x4 matrix to a RGB(A) image (see transform), the
+        alpha channel is kept.
+        '''
+        img = np.asarray(img)
+        obtained = np.empty_like(img)
+        if img.ndim == 3 and img.shape[2] > 3:
+            obtained[..., 3:] = img[..., 3:]
+        ColorMatrix.transform(img, matrix, fixed_point, out=obtained[..., :3])
+        return obtained
@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from root.util import TaskContext
+import numpy as np
+import threading
+
+
+def _box(x):
+    return ((x >= -0.5) & (x < 0.5)).astype(float)
+
+
+def _triangle(x):
+    return np.maximum(1 - np.abs(x), 0)
+
+
+def _bicubic(x, a=-0.5):
+    x = np.abs(x)
+    near = ((a + 2) * x - (a + 3)) * x * x + 1
+    far = ((a * x - 5 * a) * x + 8 * a) * x - 4 * a
+    return np.where(x < 1, near, np.where(x < 2, far, 0))
+
+
+def _lanczos3(x):
+    return np.where(np.abs(x) < 3, np.sinc(x) * np.sinc(x / 3), 0)
+
+
+# Filter function and its support (radius) for a scale of 1
+FILTERS = {
+    'box': (_box, 0.5),
+    'triangle': (_triangle, 1.0),
+    'bicubic': (_bicubic, 2.0),
+    'lanczos3': (_lanczos3, 3.0),
+}
+
+
+class Resampler():
+    '''
+    Separable resampling: the image is resized along one axis and then the
+    other with 1-D weight tables. Every output sample reads a few
+    source samples (the taps); when downscaling the filter is stretched by the
+    scale so that it averages the source (antialiasing).
+
+    The weight tables only depend on (source length, destination length,
+    filter) and are kept in a LRU of maxsize entries.
+    '''
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.tables = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_weights(self, source, destination, filter='lanczos3'):
+        '''
+        Return (indexes, weights), both of shape (destination, taps).
+        '''
+        key = (source, destination, filter)
+        with self.lock:
+            table = self.tables.get(key)
+            if table is not None:
+                self.tables.move_to_end(key)
+                return table
+        table = self.compute_weights(source, destination, filter)
+        with self.lock:
+            self.tables[key] = table
+            if len(self.tables) > self.maxsize:
+                self.tables.popitem(last=False)
+        return table
+
+    @staticmethod
+    def compute_weights(source, destination, filter):
+        if filter not in FILTERS:
+            raise ValueError("Unknown filter: %s (expected one of %s)" % (filter, ', '.join(FILTERS)))
+        function, support = FILTERS[filter]
+        scale = source / destination
+        stretch = max(scale, 1.0)
+        support = support * stretch
+        taps = int(np.ceil(2 * support)) + 1
+
+        # Centre of every output sample in source coordinates
+        centres = (np.arange(destination) + 0.5) * scale
+        first = np.floor(centres - support).astype(np.intp)
+        indexes = first[:, np.newaxis] + np.arange(taps)
+        weights = function((indexes + 0.5 - centres[:, np.newaxis]) / stretch)
+        # Samples outside the image repeat the border
+        indexes = np.clip(indexes, 0, source - 1)
+        weights /= weights.sum(axis=1, keepdims=True)
+        return indexes, weights.astype(np.float32)
+
+    def resample_axis(self, img, length, axis, filter):
+        indexes, weights = self.get_weights(img.shape[axis], length, filter)
+        img = np.moveaxis(img, axis, 0)
+        shape = (-1,) + (1,) * (img.ndim - 1)
+        out = np.zeros((length,) + img.shape[1:], dtype=np.float32)
+        for tap in range(indexes.shape[1]):
+            out += weights[:, tap].reshape(shape) * img[indexes[:, tap]]
+        return np.moveaxis(out, 0, axis)
+
+    def resize(self, img, height, width, filter='lanczos3'):
+        '''
+        Resize img (h, w) or (h, w, c) to height x width.
+        '''
+        img = np.asarray(img)
+        out = img.astype(np.float32)
+        # The pass that reduces more goes first, so the other one has less to do
+        passes = [(height, 0), (width, 1)]
+        if width / img.shape[1] < height / img.shape[0]:
+            passes.reverse()
+        for step, (length, axis) in enumerate(passes):
+            TaskContext.step(step, 2)
+            if length != img.shape[axis]:
+                out = self.resample_axis(out, length, axis, filter)
+        if np.issubdtype(img.dtype, np.integer):
+            limits = np.iinfo(img.dtype)
+            # Bicubic and Lanczos overshoot near edges
+            out = np.clip(np.rint(out), limits.min, limits.max)
+        return out.astype(img.dtype)
+
+    def clear(self):
+        with self.lock:
+            self.tables.clear()
+
+    def __len__(self):
+        return len(self.tables)
@@ -1,133 +1,120 @@
 from root.util import ImageUtil as util
+from root.converter.resampler import Resampler
+from root.converter.affine_warp import AffineWarp, RemapCache
 
 import numpy as np
 
 
 class ScaleConverter():
+    # Weight tables are shared by every resize with the same geometry
+    resampler = Resampler()
+    # Remap tables for batches of images of the same size (pass cache=ScaleConverter.remaps)
+    remaps = RemapCache()
+
     @staticmethod
-    def get_nearest_neighbour_pixel_interpolation(img, posX, posY):
-        out = []
-
-        # Get integer parts of positions
-        modXi = int(posX)
-        modYi = int(posY)
-        # Get fractional parts of positions
-        modXf = posX - modXi
-        modYf = posY - modYi
-        # To avoid going over image bounderies
+    def get_scaled_shape(img, scale):
         height, width = util.get_dimensions(img)
-        modXiPlusOneLim = min(modXi + 1, width - 1)
-        modYiPlusOneLim = min(modYi + 1, height - 1)
-
-        for channel in range(img.shape[2]):
-            target = img[modYi, modXi, channel]
-            out.append(int(target + 0.5))
-        return out
+        return (int(height * scale), int(width * scale)) + img.shape[2:]
 
     @staticmethod
-    def apply_nearest_neighbour(img, scale):
+    def apply_scale(img, scale, interpolation='bilinear', cache=None):
+        '''
+        Scale with nearest, bilinear or bicubic interpolation (no prefiltering,
+        see apply_resample to reduce images).
+        '''
         if scale <= 0:
             return img
 
         imHeight, imWidth = util.get_dimensions(img)
-        enlargedShape = list(
-            map(int, [imHeight * scale, imWidth * scale, img.shape[2]]))
-        enlargedImg = np.empty(enlargedShape, dtype=np.uint8)
-        enlargedHeight, enlargedWidth = util.get_dimensions(enlargedImg)
-        rowScale = float(imHeight) / float(enlargedHeight)
-        colScale = float(imWidth) / float(enlargedWidth)
-        for row in range(enlargedHeight):
-            for col in range(enlargedWidth):
-                # Find position in original image
-                oriRow = row * rowScale
-                oriCol = col * colScale
-                enlargedImg[row, col] = ScaleConverter.get_nearest_neighbour_pixel_interpolation(
-                    img, oriCol, oriRow)
-
-        return enlargedImg
+        height, width = ScaleConverter.get_scaled_shape(img, scale)[:2]
+        rowScale = float(imHeight) / float(height)
+        colScale = float(imWidth) / float(width)
+        # Centres of the output pixels mapped back to the original image
+        inverse = [[colScale, 0., 0.5 * colScale - 0.5], [0., rowScale, 0.5 * rowScale - 0.5]]
+        return AffineWarp.warp(img, inverse, (height, width), interpolation, border='edge', inverse=True, cache=cache)
 
     @staticmethod
-    def get_bilinear_pixel_interpolation(img, posX, posY):
-        out = []
-
-        # Get integer parts of positions
-        modXi = int(posX)
-        modYi = int(posY)
-        # Get fractional parts of positions
-        modXf = posX - modXi
-        modYf = posY - modYi
-        # To avoid going over image bounderies
-        height, width = util.get_dimensions(img)
-        modXiPlusOneLim = min(modXi + 1, width - 1)
-        modYiPlusOneLim = min(modYi + 1, height - 1)
-
-        # Get pixels in four corners
-        for channel in range(img.shape[2]):
-            bottom_left = img[modYi, modXi, channel]
-            bottom_right = img[modYi, modXiPlusOneLim, channel]
-            top_left = img[modYiPlusOneLim, modXi, channel]
-            top_right = img[modYiPlusOneLim, modXiPlusOneLim, channel]
-
-            # Calculate interpolation
-            obtained_bottom = modXf * bottom_right + (1. - modXf) * bottom_left
-            obtained_top = modXf * top_right + (1. - modXf) * top_left
-            new_channel = modYf * obtained_top + (1. - modYf) * obtained_bottom
-            out.append(int(new_channel + 0.5))
-
-        return out
+    def apply_nearest_neighbour(img, scale):
+        return ScaleConverter.apply_scale(img, scale, 'nearest')
 
     @staticmethod
     def apply_bilinear_interpolation(img, scale):
+        return ScaleConverter.apply_scale(img, scale, 'bilinear')
+
+    @staticmethod
+    def apply_resample(img, scale, filter='lanczos3'):
+        '''
+        Scale with a separable filter (box, triangle, bicubic or lanczos3),
+        antialiased when reducing.
+        '''
         if scale <= 0:
             return img
+        height, width = ScaleConverter.get_scaled_shape(img, scale)[:2]
+        return ScaleConverter.resampler.resize(img, max(height, 1), max(width, 1), filter)
 
-        imHeight, imWidth = util.get_dimensions(img)
-        enlargedShape = list(
-            map(int, [imHeight * scale, imWidth * scale, img.shape[2]]))
-        enlargedImg = np.empty(enlargedShape, dtype=np.uint8)
-        enlargedHeight, enlargedWidth = util.get_dimensions(enlargedImg)
-        rowScale = float(imHeight) / float(enlargedHeight)
-        colScale = float(imWidth) / float(enlargedWidth)
-        for row in range(enlargedHeight):
-            for col in range(enlargedWidth):
-                oriRow = row * rowScale  # Find position in original image
-                oriCol = col * colScale
-                enlargedImg[row, col] = ScaleConverter.get_bilinear_pixel_interpolation(
-                    img, oriCol, oriRow)
-
-        return enlargedImg
-
-    
+    # Orientation changes and crops return views of the image: no pixel is
+    # copied, the strides of the array do the work.
     @staticmethod
-    def apply_rotate_nearest(image, angle):
-        height, width = image.shape[:2]
-        output = np.zeros_like(image, dtype=np.uint8)
-        angle = angle * np.pi / 180
+    def flip_horizontal(image):
+        return image[:, ::-1]
 
-        for x in range(width):
-            for y in range(height):
-                i = int(x+angle)
-                j = int(y+angle)
-                print(i,j)
-                output[x,y] = image[i,j]
+    @staticmethod
+    def flip_vertical(image):
+        return image[::-1]
+
+    @staticmethod
+    def rotate_90(image, turns=1):
+        '''
+        Rotate counter-clockwise by turns quarter turns (negative turns go clockwise).
+        '''
+        return np.rot90(image, turns)
 
-        return output
+    @staticmethod
+    def transpose(image):
+        return image.swapaxes(0, 1)
 
+    @staticmethod
+    def crop(image, top, left, height, width):
+        image_height, image_width = util.get_dimensions(image)
+        if top < 0 or left < 0 or height <= 0 or width <= 0 or top + height > image_height or left + width > image_width:
+            raise ValueError("Crop (%d, %d) %dx%d is outside the %dx%d image" % (left, top, width, height, image_width, image_height))
+        return image[top:top + height, left:left + width]
+
+    @staticmethod
+    def apply_exif_orientation(image, orientation):
+        '''
+        Turn an image stored with the EXIF orientation tag (1 to 8) upright.
+        '''
+        if orientation == 2:
+            return ScaleConverter.flip_horizontal(image)
+        if orientation == 3:
+            return ScaleConverter.rotate_90(image, 2)
+        if orientation == 4:
+            return ScaleConverter.flip_vertical(image)
+        if orientation == 5:
+            return ScaleConverter.transpose(image)
+        if orientation == 6:
+            return ScaleConverter.rotate_90(image, -1)
+        if orientation == 7:
+            return ScaleConverter.rotate_90(ScaleConverter.transpose(image), 2)
+        if orientation == 8:
+            return ScaleConverter.rotate_90(image, 1)
+        return image
+
+    @staticmethod
+    def apply_rotate(image, angle, interpolation='bilinear', expand=False, fill=0, cache=None):
+        '''
+        Rotate counter-clockwise by angle degrees around the centre of the image.
+        '''
+        height, width = image.shape[:2]
+        matrix = AffineWarp.rotation(angle, ((width - 1) / 2., (height - 1) / 2.))
+        return AffineWarp.warp(image, matrix, interpolation=interpolation, expand=expand, fill=fill, cache=cache)
+
+    @staticmethod
+    def apply_rotate_nearest(image, angle):
+        return ScaleConverter.apply_rotate(image, angle, 'nearest')
 
     # RGB and Grayscale Image
     @staticmethod
     def apply_rotate_bilinear(image, angle):
-        width, height = image.shape[:2]
-        output = np.zeros_like(image, dtype=np.uint8)
-        angle = angle * np.pi / 180
-        center_x = width / 2
-        center_y = height / 2
-
-        for x in range(0,width):
-            for y in range(0,height):
-                xp = int((x - center_x) * np.cos(angle) - (y - center_y) * np.sin(angle) + center_x)
-                yp = int((x - center_x) * np.sin(angle) + (y - center_y) * np.cos(angle) + center_y)
-                if 0 <= xp < width and 0 <= yp < height:
-                    output[x, y] = image[xp, yp]
-
-        return output
+        return ScaleConverter.apply_rotate(image, angle, 'bilinear')
@@ -2,3 +2,5 @@ from .image_filter import ImageFilter
 from .color_filter import ColorFilter
 from .image_rgb_filter import RgbFilter
 from .steganography_tool import SteganographyTool
+from .frequency_filter import FrequencyFilter
+from .color_lut import ColorLut
@@ -1,41 +1,15 @@
-import imageio
 import numpy as np
 from root.util import ImageUtil as util
-from root.util import RgbUtil as rgb
+from root.util import TaskContext
 from root.converter import ColorConverter as converter
-from PIL import Image
-from skimage import img_as_ubyte
+from root.converter import ColorMatrix
 import math
 
 class ColorFilter():
 
-    @staticmethod
-    def __normalize_max_value(value, pixel):
-        if value > 255:
-            pixel = 255
-        else:
-            pixel = value
-        return pixel
-
     @staticmethod
     def apply_sepia(img):
-        height, width = util.get_image_dimensions(img)
-        obtained, img = util.get_empty_image_with_same_dimensions(img)
-        r_matrix, g_matrix, b_matrix = rgb.get_rgb_layers(img)
-        for i in range(height):
-            for j in range(width):
-                r, g, b = r_matrix[i][j], g_matrix[i][j], b_matrix[i][j]
-                tr = int(0.393 * r + 0.769 * g + 0.189 * b)
-                tg = int(0.349 * r + 0.686 * g + 0.168 * b)
-                tb = int(0.272 * r + 0.534 * g + 0.131 * b)
-
-                r = ColorFilter.__normalize_max_value(tr, r)
-                g = ColorFilter.__normalize_max_value(tg, g)
-                b = ColorFilter.__normalize_max_value(tb, b)
-
-                obtained[i][j] = [r, g, b]
-
-        return obtained
+        return ColorMatrix.apply(img, ColorMatrix.sepia())
 
     @staticmethod
     def remove_green_background(img):
@@ -84,6 +58,7 @@ class ColorFilter():
 
     @staticmethod
     def add_background(background, img, coord=(0, 0)):
+        from skimage import img_as_ubyte
         img = img_as_ubyte(img)
         x_size, y_size = util.get_image_dimensions(img)
 
@@ -114,38 +89,78 @@ class ColorFilter():
     @staticmethod
     def apply_chroma_key(background,image, faixa=50):
         max_pixel_value = 255
-        img= image.copy()
-        for i in range(img.shape[0]):
-            for j in range(img.shape[1]):
-                r, g, b = img[i,j,0], img[i,j,1], img[i,j,2]
-                """
-                Obtain the ratio of the green/red/blue
-                channels based on the max pixel value.
-                """
-                red_ratio = r / max_pixel_value
-                green_ratio = g / max_pixel_value
-                blue_ratio = b / max_pixel_value
-
-                """Darker pixels would be around 0.
-                In order to ommit removing dark pixels we
-                sum .28 to make small negative numbers to be
-                above 0.
-                """
-                red_vs_green = (red_ratio - green_ratio) + .28
-                blue_vs_green = (blue_ratio - green_ratio) + .28
-                if red_vs_green < 0:
-                    red_vs_green = 0
-                if blue_vs_green < 0:
-                    blue_vs_green = 0
-                alpha =  red_vs_green + blue_vs_green * max_pixel_value
-
-                if (alpha <= faixa):
-                    img[i,j,0] = background[i,j,0]
-                    img[i,j,1] = background[i,j,1]
-                    img[i,j,2] = background[i,j,2]
+        height, width = util.get_image_dimensions(image)
+        """
+        Obtain the ratio of the green/red/blue
+        channels based on the max pixel value.
+        """
+        red_ratio = image[:, :, 0] / max_pixel_value
+        green_ratio = image[:, :, 1] / max_pixel_value
+        blue_ratio = image[:, :, 2] / max_pixel_value
+
+        """Darker pixels would be around 0.
+        In order to ommit removing dark pixels we
+        sum .28 to make small negative numbers to be
+        above 0.
+        """
+        red_vs_green = np.maximum((red_ratio - green_ratio) + .28, 0)
+        blue_vs_green = np.maximum((blue_ratio - green_ratio) + .28, 0)
+        alpha = red_vs_green + blue_vs_green * max_pixel_value
+
+        # The output is built directly from both images, so the original
+        # frame does not need to be copied before being overwritten.
+        is_background = (alpha <= faixa)[:, :, np.newaxis]
+        img = np.where(is_background, background[:height, :width, :3], image[:, :, :3])
+        if image.shape[2] > 3:
+            img = np.dstack((img, image[:, :, 3:]))
 
         return img
 
+    @staticmethod
+    def __adjust_hsi(img, plane, factor, limit):
+        hsi = converter.rgb_to_hsi_image(img)
+        TaskContext.step(1, 3)
+        np.minimum(hsi[..., plane] * factor, limit, out=hsi[..., plane])
+        TaskContext.step(2, 3)
+        return ColorFilter.hsi_planes_to_image(img, hsi)
+
+    @staticmethod
+    def adjust_hsi_planes(hsi, hue=1, saturation=1, intensity=1):
+        '''
+        Multiply the planes of a HSI image (see ColorConverter.rgb_to_hsi_image)
+        by the given factors. A new array is returned, hsi is not changed.
+        '''
+        factors = np.array([hue, saturation, intensity], dtype=hsi.dtype)
+        limits = np.array([360, 1, 1], dtype=hsi.dtype)
+        return np.minimum(hsi * factors, limits)
+
+    @staticmethod
+    def hsi_planes_to_image(img, hsi):
+        '''
+        Convert HSI planes back to an image like img, keeping its alpha channel.
+        '''
+        rgb = converter.hsi_to_rgb_image(hsi)
+        # Some HSI values are outside the RGB cube
+        obtained = np.array(img, copy=True)
+        obtained[..., :3] = np.clip(np.rint(rgb), 0, 255)
+        return obtained
+
+    @staticmethod
+    def hsi_planes_to_image_with_planes(img, hsi):
+        '''
+        Like hsi_planes_to_image, also returning the HSI planes of the new
+        image: hsi, with the colours that were outside the RGB cube replaced
+        by the planes of their clipped pixels. Only those pixels are converted
+        again, the planes then describe the image up to its rounding.
+        '''
+        rgb = converter.hsi_to_rgb_image(hsi)
+        outside = np.any((rgb < -0.5) | (rgb > 255.5), axis=-1)
+        obtained = np.array(img, copy=True)
+        obtained[..., :3] = np.clip(np.rint(rgb), 0, 255)
+        planes = np.array(hsi, copy=True)
+        planes[outside] = converter.rgb_to_hsi_image(obtained[outside], hsi.dtype.type)
+        return obtained, planes
+
     @staticmethod
     def adjust_saturation (img, factor):
         '''
@@ -153,22 +168,7 @@ class ColorFilter():
         Input: image and factor in [0.0, 1.0].
         Output: image with saturation adjusted
         '''
-        height,width = util.get_dimensions(img)
-        obtained = np.zeros_like(img)
-        for row in range(height):
-            for col in range(width):
-                r = img[row][col][0]
-                g = img[row][col][1]
-                b = img[row][col][2]
-                h,s,i = converter.rgb_to_hsi(r,g,b)
-                new_saturation = s * factor #Saturation value is [0, 1]
-                if new_saturation > 1:
-                    new_saturation = 1
-                r,g,b = converter.hsi_to_rgb(h,new_saturation,i)
-                obtained[row][col][0] = r
-                obtained[row][col][1] = g
-                obtained[row][col][2] = b
-        return obtained
+        return ColorFilter.__adjust_hsi(img, 1, factor, 1) #Saturation value is [0, 1]
 
     @staticmethod
     def adjust_hue (img, factor):
@@ -177,43 +177,13 @@ class ColorFilter():
         Input: image and factor in [0.0, 1.0].
         Output: image with hue adjusted
         '''
-        height,width = util.get_dimensions(img)
-        obtained = np.zeros_like(img)
-        for row in range(height):
-            for col in range(width):
-                r = img[row][col][0]
-                g = img[row][col][1]
-                b = img[row][col][2]
-                h,s,i = converter.rgb_to_hsi(r,g,b)
-                new_hue = h * factor #Hue value is [0, 360]
-                if new_hue > 360:
-                    new_hue = 360
-                r,g,b = converter.hsi_to_rgb(new_hue,s,i)
-                obtained[row][col][0] = r
-                obtained[row][col][1] = g
-                obtained[row][col][2] = b
-        return obtained
+        return ColorFilter.__adjust_hsi(img, 0, factor, 360) #Hue value is [0, 360]
 
     @staticmethod
     def adjust_intensity (img, factor):
         '''
-        Adjust image hue using a mulplication factor.
+        Adjust image intensity using a mulplication factor.
         Input: image and factor in [0.0, 1.0].
         Output: image with intensity adjusted
         '''
-        height,width = util.get_dimensions(img)
-        obtained = np.zeros_like(img)
-        for row in range(height):
-            for col in range(width):
-                r = img[row][col][0]
-                g = img[row][col][1]
-                b = img[row][col][2]
-                h,s,i = converter.rgb_to_hsi(r,g,b)
-                new_intensity = i * factor #Intensity value is [0, 1]
-                if new_intensity > 1:
-                    new_intensity = 1
-                r,g,b = converter.hsi_to_rgb(h,s,new_intensity)
-                obtained[row][col][0] = r
-                obtained[row][col][1] = g
-                obtained[row][col][2] = b
-        return obtained
+        return ColorFilter.__adjust_hsi(img, 2, factor, 1) #Intensity value is [0, 1]
@@ -0,0 +1,181 @@
+#!/usr/bin/python
+import numpy as np
+from root.util import TaskContext
+
+# Usual grid sizes: 17 for previews, 33 for most transforms, 65 for grading
+SIZES = (17, 33, 65)
+INTERPOLATIONS = ('trilinear', 'tetrahedral')
+# Pixels looked up at once (bounds the memory used by the indexes and taps)
+_CHUNK_PIXELS = 1 << 18
+
+
+class ColorLut():
+    '''
+    3-D colour lookup table: table[r, g, b] is the output colour (in [0, 1])
+    of the grid point (r, g, b), the grid covering [domain_min, domain_max]
+    of every channel. Colours between grid points are interpolated, so any
+    per-pixel RGB -> RGB transform (or a chain of them) costs one lookup.
+    '''
+
+    def __init__(self, table, domain_min=(0, 0, 0), domain_max=(1, 1, 1), title=None):
+        table = np.asarray(table, dtype=np.float32)
+        size = table.shape[0]
+        if size < 2 or table.shape != (size, size, size, 3):
+            raise ValueError("A LUT table must have shape (n, n, n, 3) with n >= 2, got %s" % (table.shape,))
+        self.table = table
+        self.domain_min = np.array(domain_min, dtype=np.float32)
+        self.domain_max = np.array(domain_max, dtype=np.float32)
+        self.title = title
+
+    @property
+    def size(self):
+        return self.table.shape[0]
+
+    @staticmethod
+    def get_grid(size):
+        '''
+        Colours of the grid points in [0, 1], shape (size, size, size, 3).
+        '''
+        axis = np.linspace(0, 1, size, dtype=np.float32)
+        return np.stack(np.meshgrid(axis, axis, axis, indexing='ij'), axis=-1)
+
+    @staticmethod
+    def identity(size=33):
+        return ColorLut(ColorLut.get_grid(size))
+
+    @staticmethod
+    def from_function(*functions, size=33):
+        '''
+        Sample a chain of colour transforms on the grid. Every function takes
+        and returns an image (h, w, 3) with values in [0, 255] (for instance
+        ColorFilter.apply_sepia); they are applied in order.
+        '''
+        # The grid is given as a (size * size, size, 3) image
+        image = ColorLut.get_grid(size).reshape(size * size, size, 3) * np.float32(255)
+        for function in functions:
+            image = np.asarray(function(image))[..., :3]
+        return ColorLut(np.clip(image.reshape(size, size, size, 3) / 255, 0, 1))
+
+    def get_positions(self, rgb):
+        '''
+        Flat index of the grid cell of every colour (n, 3) and the position
+        inside the cell (fractions in [0, 1] along r, g, b).
+        '''
+        size = self.size
+        scale = (size - 1) / (self.domain_max - self.domain_min)
+        position = (rgb.astype(np.float32) / np.float32(255) - self.domain_min) * scale
+        np.clip(position, 0, size - 1, out=position)
+        base = np.minimum(position.astype(np.intp), size - 2)
+        fraction = position - base
+        index = (base[:, 0] * size + base[:, 1]) * size + base[:, 2]
+        return index, fraction
+
+    def lookup(self, rgb, interpolation='trilinear'):
+        '''
+        Output colours (n, 3) in [0, 1] for colours rgb (n, 3) in [0, 255].
+        '''
+        size = self.size
+        # np.take gathers whole rows much faster than fancy indexing
+        table = self.table.reshape(-1, 3)
+        index, fraction = self.get_positions(rgb)
+        strides = np.array([size * size, size, 1])
+        if interpolation == 'trilinear':
+            fr, fg, fb = fraction[:, 0:1], fraction[:, 1:2], fraction[:, 2:3]
+            # Blend along b, then g, then r
+            corners = {}
+            for dr in (0, 1):
+                for dg in (0, 1):
+                    low = np.take(table, index + dr * strides[0] + dg * strides[1], axis=0)
+                    high = np.take(table, index + dr * strides[0] + dg * strides[1] + 1, axis=0)
+                    corners[dr, dg] = low + (high - low) * fb
+            low = corners[0, 0] + (corners[0, 1] - corners[0, 0]) * fg
+            high = corners[1, 0] + (corners[1, 1] - corners[1, 0]) * fg
+            return low + (high - low) * fr
+        if interpolation == 'tetrahedral':
+            # The cell is split in 6 tetrahedra along its main diagonal. The
+            # colour is walked from the first corner to the opposite one,
+            # moving along the axes in decreasing order of fraction.
+            order = np.argsort(-fraction, axis=1)
+            ordered = np.take_along_axis(fraction, order, axis=1)
+            steps = strides[order]
+            second = index + steps[:, 0]
+            third = second + steps[:, 1]
+            weights = np.empty((len(index), 4), dtype=np.float32)
+            weights[:, 0] = 1 - ordered[:, 0]
+            weights[:, 1:3] = ordered[:, :2] - ordered[:, 1:]
+            weights[:, 3] = ordered[:, 2]
+            out = np.take(table, index, axis=0) * weights[:, 0:1]
+            out += np.take(table, second, axis=0) * weights[:, 1:2]
+            out += np.take(table, third, axis=0) * weights[:, 2:3]
+            out += np.take(table, index + strides.sum(), axis=0) * weights[:, 3:4]
+            return out
+        raise ValueError("Unknown interpolation: %s (expected one of %s)" % (interpolation, ', '.join(INTERPOLATIONS)))
+
+    def apply(self, img, interpolation='trilinear'):
+        '''
+        Apply the LUT to a RGB(A) image with values in [0, 255]. The alpha
+        channel is kept.
+        '''
+        img = np.asarray(img)
+        if img.ndim != 3 or img.shape[2] < 3:
+            raise ValueError("A colour LUT needs a RGB image, got shape %s" % (img.shape,))
+        rgb = img[..., :3].reshape(-1, 3)
+        out = np.empty(rgb.shape, dtype=np.float32)
+        for start in range(0, len(rgb), _CHUNK_PIXELS):
+            TaskContext.step(start, len(rgb))
+            stop = start + _CHUNK_PIXELS
+            out[start:stop] = self.lookup(rgb[start:stop], interpolation)
+        out *= 255
+        obtained = np.array(img, copy=True)
+        if np.issubdtype(img.dtype, np.integer):
+            out = np.clip(np.rint(out), 0, 255)
+        obtained[..., :3] = out.reshape(img.shape[:2] + (3,))
+        return obtained
+
+    @staticmethod
+    def load(path):
+        '''
+        Read a 3-D LUT in the .cube format (Adobe/Resolve).
+        '''
+        size = title = None
+        domain_min, domain_max = (0, 0, 0), (1, 1, 1)
+        values = []
+        with open(path) as cube:
+            for line in cube:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                keyword = line.split()[0]
+                if keyword == 'TITLE':
+                    title = line[len(keyword):].strip().strip('"')
+                elif keyword == 'LUT_3D_SIZE':
+                    size = int(line.split()[1])
+                elif keyword == 'DOMAIN_MIN':
+                    domain_min = [float(value) for value in line.split()[1:4]]
+                elif keyword == 'DOMAIN_MAX':
+                    domain_max = [float(value) for value in line.split()[1:4]]
+                elif keyword == 'LUT_1D_SIZE':
+                    raise ValueError("%s is a 1-D LUT, only 3-D LUTs are supported" % path)
+                elif keyword[0].isalpha():
+                    # Other keywords (LUT_3D_INPUT_RANGE, ...) do not change the table
+                    continue
+                else:
+                    values.append([float(value) for value in line.split()[:3]])
+        if size is None or len(values) != size ** 3:
+            raise ValueError("%s: expected LUT_3D_SIZE and size^3 entries, got %d entries" % (path, len(values)))
+        # Red changes fastest in the file, so its entries are ordered [b, g, r]
+        table = np.array(values, dtype=np.float32).reshape(size, size, size, 3).transpose(2, 1, 0, 3)
+        return ColorLut(table, domain_min, domain_max, title)
+
+    def save(self, path):
+        '''
+        Write the LUT in the .cube format.
+        '''
+        with open(path, 'w') as cube:
+            if self.title:
+                cube.write('TITLE "%s"\n' % self.title)
+            cube.write('LUT_3D_SIZE %d\n' % self.size)
+            cube.write('DOMAIN_MIN %g %g %g\n' % tuple(self.domain_min))
+            cube.write('DOMAIN_MAX %g %g %g\n' % tuple(self.domain_max))
+            rows = self.table.transpose(2, 1, 0, 3).reshape(-1, 3)
+            np.savetxt(cube, rows, fmt='%.6f')
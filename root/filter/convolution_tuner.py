@@ -0,0 +1,205 @@
+#!/usr/bin/python
+import argparse
+import json
+import math
+import os
+import platform
+import threading
+import time
+import numpy as np
+from root.filter.image_filter import ImageFilter
+
+# Candidates are timed on an image of at most this many pixels, the cost of
+# every algorithm grows linearly with the number of pixels.
+_SAMPLE_PIXELS = 256 * 256
+# Per-user cache of the winners, ROOT_TUNING_CACHE overrides it
+_DEFAULT_PATH = os.path.join('~', '.root-image-editor', 'convolution_tuning.json')
+
+
+class ConvolutionTuner():
+    '''
+    Chooses the fastest convolution algorithm for an image and a kernel. The
+    candidates are timed the first time a (size bucket, kernel shape, kernel
+    structure, dtype) combination is seen and the winner is kept, so later
+    calls only dispatch. With a path the winners are also saved to that JSON
+    file and reused by later sessions; without one they live in memory.
+    '''
+
+    instance = None
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.winners = self.load()
+
+    @staticmethod
+    def default():
+        '''
+        Tuner shared by the filters. The winners are saved to the per-user
+        cache (created on the first save), or to ROOT_TUNING_CACHE if set.
+        '''
+        if ConvolutionTuner.instance is None:
+            ConvolutionTuner.instance = ConvolutionTuner(ConvolutionTuner.get_default_path())
+        return ConvolutionTuner.instance
+
+    @staticmethod
+    def get_default_path():
+        return os.path.expanduser(os.environ.get('ROOT_TUNING_CACHE') or _DEFAULT_PATH)
+
+    @staticmethod
+    def machine():
+        return {'cpus': os.cpu_count(), 'machine': platform.machine(), 'numpy': np.__version__}
+
+    def load(self):
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path) as cache:
+                data = json.load(cache)
+        except (OSError, ValueError):
+            return {}
+        # Timings from other hardware are not valid here
+        if data.get('machine') != self.machine():
+            return {}
+        return data.get('winners', {})
+
+    def save(self):
+        if self.path is None:
+            return
+        data = {'machine': self.machine(), 'winners': self.winners}
+        temporary = self.path + '.tmp'
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(temporary, 'w') as cache:
+                json.dump(data, cache, indent=1, sort_keys=True)
+            os.replace(temporary, self.path)
+        except OSError:
+            # Without a writable cache the winners are only kept in memory
+            pass
+
+    def clear(self):
+        with self.lock:
+            self.winners = {}
+            self.save()
+
+    @staticmethod
+    def get_structure(kernel):
+        '''
+        Return ('box', value), ('separable', (column, row)) or ('general', None).
+        '''
+        if np.all(kernel == kernel.flat[0]):
+            return 'box', kernel.flat[0]
+        u, s, vt = np.linalg.svd(kernel)
+        if s[0] > 0 and np.all(s[1:] <= 1e-10 * s[0]):
+            scale = math.sqrt(s[0])
+            return 'separable', (u[:, 0] * scale, vt[0] * scale)
+        return 'general', None
+
+    @staticmethod
+    def get_candidates(structure):
+        if structure == 'box':
+            return ['direct', 'separable', 'integral', 'fft']
+        if structure == 'separable':
+            return ['direct', 'separable', 'fft']
+        return ['direct', 'fft']
+
+    @staticmethod
+    def get_key(shape, kernel_shape, structure, dtype):
+        # Images are grouped by powers of two of their number of samples
+        bucket = int(round(math.log2(max(int(np.prod(shape)), 1))))
+        return '%d/%dx%d/%s/%s' % (bucket, kernel_shape[0], kernel_shape[1], structure, np.dtype(dtype).name)
+
+    @staticmethod
+    def run(algorithm, image, kernel, structure, parameters):
+        if algorithm == 'separable':
+            if structure == 'box':
+                column, row = np.full(kernel.shape[0], parameters), np.ones(kernel.shape[1])
+            else:
+                column, row = parameters
+            return ImageFilter.apply_separable_convolution(image, column, row)
+        if algorithm == 'integral':
+            return ImageFilter.apply_box_convolution(image, kernel.shape[0], kernel.shape[1], parameters)
+        if algorithm == 'fft':
+            from root.controller import FourierManager
+            # Correlation is the convolution with the flipped kernel
+            return FourierManager().convolve2d(image, kernel[::-1, ::-1])
+        return ImageFilter.apply_direct_convolution(image, kernel)
+
+    def convolve(self, image, kernel):
+        '''
+        Correlation of image (h, w) or (h, w, c) with kernel, zeros outside the image.
+        '''
+        kernel = np.asarray(kernel, dtype=float)
+        structure, parameters = self.get_structure(kernel)
+        key = self.get_key(image.shape, kernel.shape, structure, image.dtype)
+        algorithm = self.winners.get(key)
+        if algorithm not in self.get_candidates(structure):
+            algorithm = self.tune(image.shape, image.dtype, kernel)
+        return self.run(algorithm, image, kernel, structure, parameters)
+
+    def tune(self, shape, dtype, kernel):
+        '''
+        Time every candidate on a sample image of the given shape (reduced to
+        at most _SAMPLE_PIXELS pixels) and remember the fastest one.
+        '''
+        kernel = np.asarray(kernel, dtype=float)
+        structure, parameters = self.get_structure(kernel)
+        key = self.get_key(shape, kernel.shape, structure, dtype)
+        sample = self.get_sample(shape, dtype)
+        timings = {}
+        for algorithm in self.get_candidates(structure):
+            # Best of two runs, the first one also pays for allocations and caches
+            timings[algorithm] = min(self.measure(algorithm, sample, kernel, structure, parameters) for _ in range(2))
+        winner = min(timings, key=timings.get)
+        with self.lock:
+            self.winners[key] = winner
+            self.save()
+        return winner
+
+    @staticmethod
+    def measure(algorithm, sample, kernel, structure, parameters):
+        start = time.perf_counter()
+        ConvolutionTuner.run(algorithm, sample, kernel, structure, parameters)
+        return time.perf_counter() - start
+
+    @staticmethod
+    def get_sample(shape, dtype):
+        height, width = shape[:2]
+        ratio = math.sqrt(min(1, _SAMPLE_PIXELS / (height * width)))
+        sample_shape = (max(1, int(height * ratio)), max(1, int(width * ratio))) + tuple(shape[2:])
+        return (np.random.RandomState(0).rand(*sample_shape) * 255).astype(dtype)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Rebuild the convolution tuning cache for this machine.')
+    parser.add_argument('--cache', default=ConvolutionTuner.get_default_path(),
+                        help='tuning cache file (default: $ROOT_TUNING_CACHE or %s)' % _DEFAULT_PATH)
+    parser.add_argument('--sizes', nargs='+', default=['512x512', '1920x1080', '4000x3000'],
+                        help='image sizes (WIDTHxHEIGHT) to tune')
+    parser.add_argument('--kernels', nargs='+', type=int, default=[3, 5, 7, 9, 11, 15, 21, 31, 51],
+                        help='square kernel sizes to tune')
+    options = parser.parse_args(args)
+
+    tuner = ConvolutionTuner(options.cache)
+    tuner.clear()
+    kernels = []
+    for size in options.kernels:
+        kernels.append(np.random.RandomState(size).rand(size, size))
+        kernels.append(ImageFilter.create_gaussian_kernel(size, size / 4))
+        kernels.append(np.ones((size, size)) / size ** 2)
+    for size in options.sizes:
+        width, height = [int(value) for value in size.lower().split('x')]
+        for shape in [(height, width), (height, width, 3)]:
+            for dtype in [np.uint8, np.float64]:
+                for kernel in kernels:
+                    winner = tuner.tune(shape, dtype, kernel)
+                    structure = tuner.get_structure(kernel)[0]
+                    print('%s: %s' % (tuner.get_key(shape, kernel.shape, structure, dtype), winner))
+    print('Saved %d entries to %s' % (len(tuner.winners), options.cache))
+
+
+if __name__ == '__main__':
+    main()
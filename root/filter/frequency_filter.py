@@ -0,0 +1,77 @@
+#!/usr/bin/python
+import numpy as np
+from functools import lru_cache
+
+KINDS = ('ideal', 'butterworth', 'gaussian')
+
+
+@lru_cache(maxsize=8)
+def _distance_grid(height, width):
+    Y, X = np.ogrid[:height, :width]
+    distance = np.sqrt((X - width // 2) ** 2 + (Y - height // 2) ** 2).astype(np.float32)
+    distance.flags.writeable = False
+    return distance
+
+
+class FrequencyFilter():
+    '''
+    Transfer functions for centred (fftshift) spectra. The masks are float32
+    arrays with values between 0 and 1, so they compose by multiplication.
+    '''
+
+    @staticmethod
+    def distance_grid(shape):
+        '''
+        Distance of every frequency to the centre of the spectrum. The grid is
+        computed once per shape and shared (read-only).
+        '''
+        return _distance_grid(shape[0], shape[1])
+
+    @staticmethod
+    def low_pass(shape, cutoff, kind='ideal', order=2):
+        distance = FrequencyFilter.distance_grid(shape)
+        if kind == 'ideal':
+            return (distance <= cutoff).astype(np.float32)
+        if cutoff <= 0:
+            raise ValueError("The cutoff of a %s filter must be positive" % kind)
+        if kind == 'butterworth':
+            return (1 / (1 + (distance / cutoff) ** (2 * order))).astype(np.float32)
+        if kind == 'gaussian':
+            return np.exp(-distance ** 2 / np.float32(2 * cutoff ** 2)).astype(np.float32)
+        raise ValueError("Unknown filter type: %s (expected one of %s)" % (kind, ', '.join(KINDS)))
+
+    @staticmethod
+    def high_pass(shape, cutoff, kind='ideal', order=2):
+        mask = FrequencyFilter.low_pass(shape, cutoff, kind, order)
+        return np.subtract(1, mask, out=mask)
+
+    @staticmethod
+    def band_pass(shape, cutoff_minor, cutoff_major, kind='ideal', order=2):
+        mask = FrequencyFilter.low_pass(shape, cutoff_major, kind, order)
+        mask *= FrequencyFilter.high_pass(shape, cutoff_minor, kind, order)
+        return mask
+
+    @staticmethod
+    def band_reject(shape, cutoff_minor, cutoff_major, kind='ideal', order=2):
+        mask = FrequencyFilter.band_pass(shape, cutoff_minor, cutoff_major, kind, order)
+        return np.subtract(1, mask, out=mask)
+
+    @staticmethod
+    def compose(*masks):
+        '''
+        Product of several transfer functions.
+        '''
+        mask = np.array(masks[0], dtype=np.float32)
+        for other in masks[1:]:
+            mask *= other
+        return mask
+
+    @staticmethod
+    def apply(spectrum, mask, out=None):
+        '''
+        Multiply a spectrum by a mask. Colour spectra (h, w, c) share the same
+        mask for every channel. Pass out=spectrum to filter it in place.
+        '''
+        if spectrum.ndim == 3:
+            mask = mask[:, :, np.newaxis]
+        return np.multiply(spectrum, mask, out=out)
@@ -1,9 +1,7 @@
 #!/usr/bin/python
-import imageio
-import matplotlib.pyplot as plt
 import numpy as np
 from root.util import ImageUtil as util
-from PIL import Image
+from root.util import TaskContext
 
 _MIN_PIXEL = 0
 _MAX_PIXEL = 255
@@ -25,10 +23,12 @@ class ImageFilter():
 
     @staticmethod
     def read_image(image_path, type="RGB"):
+        import imageio
         return imageio.imread(image_path, as_gray=False, pilmode=type)
 
     @staticmethod
     def save_image(name, image_as_byte):
+        import imageio
         imageio.imwrite(name, image_as_byte)
 
     @staticmethod
@@ -45,11 +45,11 @@ class ImageFilter():
         if len(img.shape) == 2:
             return _MAX_PIXEL - img
         else:
-            i = img.copy()
-            i[:,:,0] = _MAX_PIXEL - img[:,:,0]
-            i[:,:,1]= _MAX_PIXEL - img[:,:,1]
-            i[:,:,2] = _MAX_PIXEL - img[:,:,2]
-            return i
+            # Only the color channels are inverted, alpha (if any) is kept
+            negative = np.empty_like(img)
+            np.subtract(_MAX_PIXEL, img[:,:,:3], out=negative[:,:,:3])
+            negative[:,:,3:] = img[:,:,3:]
+            return negative
 
     @staticmethod
     def apply_logarithmic(img,c = 0):
@@ -67,6 +67,7 @@ class ImageFilter():
 
     @staticmethod
     def draw_histogram(img, img_name, color="black"):
+        import matplotlib.pyplot as plt
         data = img.flatten()
         plt.hist(data, _MAX_PIXEL + 1, [0, 256], color=color, ec=color)
         plt.grid(axis='y', alpha=0.75)
@@ -89,6 +90,7 @@ class ImageFilter():
         else:  # RGB Image
             r, g, b = np.zeros(bins), np.zeros(bins), np.zeros(bins)
             for row in range(image.shape[0]):
+                TaskContext.step(row, image.shape[0])
                 for col in range(image.shape[1]):
                     r[image[row, col][0]] += 1
                     g[image[row, col][1]] += 1
@@ -116,6 +118,7 @@ class ImageFilter():
         if len(img.shape) == 2:
             # Mapping the pixels for the equalization
             for i in range(len(original)):
+                TaskContext.step(i, len(original))
                 for j in range(len(original[0])):
                     equalized_img[i][j] = roundVal[np.where(
                         unique_pixels == original[i][j])]
@@ -202,6 +205,7 @@ class ImageFilter():
             img)
         if len(img.shape) == 2:
             for i in range(len(original)):
+                TaskContext.step(i, len(original))
                 for j in range(len(original[0])):
                     obtained[i][j] = ImageFilter.get_median(
                         filter_size, i, j, original)
@@ -240,6 +244,7 @@ class ImageFilter():
         height, width = util.get_dimensions(obtained)
         if len(img.shape) == 2:
             for i in range(height):
+                TaskContext.step(i, height)
                 for j in range(width):
                     index = int(np.round(obtained[i][j]))
                     obtained[i][j] = interp[index]
@@ -257,26 +262,67 @@ class ImageFilter():
 
     @staticmethod
     def apply_convolution(image, kernel):
-        if len(image.shape) == 2:
-            image_padded = np.zeros((image.shape[0] + 2, image.shape[1] + 2))
-            image_padded[1:-1, 1:-1] = image
-            out = np.zeros_like(image)
-        
-            for x in range(image.shape[1]):
-                for y in range(image.shape[0]):
-                    out[y, x] = (kernel * image_padded[y:y + 3, x:x + 3]).sum()
-        else:
-            R = ImageFilter.apply_convolution(image[:,:,0],kernel)
-            G = ImageFilter.apply_convolution(image[:,:,1],kernel)
-            B = ImageFilter.apply_convolution(image[:,:,2],kernel)
-            output = np.zeros((R.shape[0], R.shape[1], 3), dtype=np.uint8)
-            output[:,:,0] = R
-            output[:,:,1] = G
-            output[:,:,2] = B
-            out = output
+        '''
+        Correlation of the image with kernel (any size), with zeros outside the
+        image. The algorithm (direct, separable, integral image or FFT) is the
+        fastest one measured on this machine for the image and kernel shapes.
+        '''
+        kernel = np.asarray(kernel, dtype=float)
+        dtype = image.dtype
+        if len(image.shape) == 3:
+            # Only the colour channels are filtered
+            image, dtype = image[:, :, :3], np.uint8
 
+        from root.filter.convolution_tuner import ConvolutionTuner
+        out = ConvolutionTuner.default().convolve(image, kernel)
+        return out.astype(dtype)
+
+    @staticmethod
+    def apply_direct_convolution(image, kernel):
+        '''
+        Shift-and-add correlation: each kernel coefficient adds a shifted copy
+        of the whole image (h, w) or (h, w, c).
+        '''
+        kh, kw = kernel.shape
+        height, width = util.get_dimensions(image)
+        top, left = kh // 2, kw // 2
+        padding = ((top, kh - 1 - top), (left, kw - 1 - left)) + ((0, 0),) * (image.ndim - 2)
+        image_padded = np.pad(np.asarray(image, dtype=float), padding, 'constant')
+        out = np.zeros((height, width) + image.shape[2:])
+        for y in range(kh):
+            TaskContext.step(y, kh)
+            for x in range(kw):
+                if kernel[y, x] != 0:
+                    out += kernel[y, x] * image_padded[y:y + height, x:x + width]
         return out
 
+    @staticmethod
+    def apply_separable_convolution(image, column, row):
+        '''
+        Correlation with the kernel outer(column, row) as a vertical pass
+        followed by a horizontal one.
+        '''
+        out = ImageFilter.apply_direct_convolution(image, np.reshape(column, (-1, 1)))
+        return ImageFilter.apply_direct_convolution(out, np.reshape(row, (1, -1)))
+
+    @staticmethod
+    def apply_box_convolution(image, kernel_height, kernel_width, value):
+        '''
+        Correlation with a constant kernel using an integral image (summed-area
+        table): every window sum costs four lookups whatever the kernel size.
+        '''
+        height, width = util.get_dimensions(image)
+        top, left = kernel_height // 2, kernel_width // 2
+        # One more zero row and column so that the table starts with zeros
+        padding = ((top + 1, kernel_height - 1 - top), (left + 1, kernel_width - 1 - left)) + ((0, 0),) * (image.ndim - 2)
+        table = np.pad(np.asarray(image, dtype=float), padding, 'constant')
+        table = table.cumsum(axis=0).cumsum(axis=1)
+        sums = table[kernel_height:kernel_height + height, kernel_width:kernel_width + width] \
+            - table[:height, kernel_width:kernel_width + width] \
+            - table[kernel_height:kernel_height + height, :width] \
+            + table[:height, :width]
+        return sums * value
+
     # @staticmethod
     # def apply_convolution(img, filter_matrix):
     #     obtained, original = util.get_empty_image_with_same_dimensions(
@@ -361,6 +407,7 @@ class ImageFilter():
             # new_vertical_image = np.zeros((height, width), np.uint8)
             # new_gradient_image = np.zeros((height, width), np.uint8)
             for i in range(1, height - 1):
+                TaskContext.step(i, height - 1)
                 for j in range(1, width - 1):
                     horizontal_grad = ImageFilter.apply_gradient_core(
                         horizontal, img, i, j)
@@ -403,6 +450,7 @@ class ImageFilter():
         new_gradient_image = np.zeros((height, width), np.uint8)
         if len(img.shape) == 2:
             for i in range(1, height - 1):
+                TaskContext.step(i, height - 1)
                 for j in range(1, width - 1):
                     grad = ImageFilter.apply_gradient_core(
                         filter_matrix, img, i, j)
@@ -488,6 +536,7 @@ class ImageFilter():
         obtained, original = util.get_empty_image_with_same_dimensions(
             img)
         for i in range(len(original)):
+            TaskContext.step(i, len(original))
             for j in range(len(original[0])):
                 neighbors = ImageFilter.__get_neighbors_matrix(
                     filter_size, i, j, original)
@@ -510,6 +559,7 @@ class ImageFilter():
             img)
         if len(img.shape) == 2:
             for i in range(len(original)):
+                TaskContext.step(i, len(original))
                 for j in range(len(original[0])):
                     neighbors = ImageFilter.__get_neighbors_matrix(
                         filter_size, i, j, original)
@@ -543,6 +593,7 @@ class ImageFilter():
 
         if len(img.shape) == 2:
             for i in range(len(original)):
+                TaskContext.step(i, len(original))
                 for j in range(len(original[0])):
                     neighbors = ImageFilter.__get_neighbors_matrix(
                         filter_size, i, j, original)
@@ -578,6 +629,7 @@ class ImageFilter():
         obtained = np.zeros((height, width, 3), np.uint8)
 
         for i in range(height):
+            TaskContext.step(i, height)
             for j in range(width):
                 for k in range(img.shape[2]):
                     b = img[i][j][k] * br
@@ -1,5 +1,3 @@
-from PIL import Image 
-
 class SteganographyTool():
 
     # Convert encoding data into 8-bit binary 
@@ -76,6 +74,7 @@ class SteganographyTool():
     # Encode data into image 
     @staticmethod
     def encode(name, data): 
+        from PIL import Image
         # img = input("Enter image name(with extension): ") 
         image = Image.open(name, 'r') 
         
@@ -93,6 +92,7 @@ class SteganographyTool():
     # Decode the data in the image 
     @staticmethod
     def decode(name): 
+        from PIL import Image
         # img = input("Enter image name(with extension): ") 
         image = Image.open(name, 'r') 
         
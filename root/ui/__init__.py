@@ -1,5 +1,8 @@
+from .task_runner import TaskRunner
+from .display_adapter import DisplayAdapter
 from .image_view import ImageView
 from .fourier_modal import FourierModal
+from .parameter_dialog import ParameterDialog
 from .side_bar import SideBar
 from .window import Window
 from .main_window import MainWindow
@@ -0,0 +1,67 @@
+from PyQt5.QtGui import QImage, QPixmap, qRgb
+from PyQt5 import sip
+import numpy as np
+
+# Built once and shared by every grayscale image
+_GRAY_COLOR_TABLE = [qRgb(i, i, i) for i in range(256)]
+
+_FORMATS = {
+    2: QImage.Format_Indexed8,
+    3: QImage.Format_RGB888,
+    4: QImage.Format_RGBA8888,
+}
+
+
+class DisplayAdapter():
+    '''
+    Converts numpy images to QImage/QPixmap for display.
+
+    uint8 arrays whose rows are contiguous are wrapped without copying the
+    pixels; the array is kept referenced by the QImage/QPixmap so the memory
+    stays valid while they are alive.
+    '''
+
+    @staticmethod
+    def get_channels(im):
+        return 2 if im.ndim == 2 else im.shape[2]
+
+    @staticmethod
+    def to_display_array(im):
+        '''
+        Return im as uint8 with contiguous rows, copying only when needed.
+        '''
+        im = np.asarray(im)
+        if im.dtype != np.uint8:
+            im = im.astype(np.uint8)
+        # QImage accepts any distance between rows (strides[0]), but the
+        # pixels of a row must be packed together.
+        pixel_size = 1 if im.ndim == 2 else im.shape[2]
+        packed = im.strides[-1] == 1 and (im.ndim == 2 or im.strides[1] == pixel_size)
+        if not packed or im.strides[0] < 0:
+            im = np.ascontiguousarray(im)
+        return im
+
+    @staticmethod
+    def to_qimage(im):
+        if im is None:
+            return QImage()
+        im = DisplayAdapter.to_display_array(im)
+        image_format = _FORMATS.get(DisplayAdapter.get_channels(im))
+        if image_format is None:
+            return QImage()
+
+        # The pointer form also accepts crops, whose rows are not adjacent
+        data = sip.voidptr(im.__array_interface__['data'][0])
+        qim = QImage(data, im.shape[1], im.shape[0], im.strides[0], image_format)
+        if image_format == QImage.Format_Indexed8:
+            qim.setColorTable(_GRAY_COLOR_TABLE)
+        # QImage does not own the pixels, keep the array alive with it
+        qim.buffer = im
+        return qim
+
+    @staticmethod
+    def to_qpixmap(im):
+        qim = DisplayAdapter.to_qimage(im)
+        pixmap = QPixmap.fromImage(qim)
+        pixmap.buffer = qim.buffer if hasattr(qim, 'buffer') else None
+        return pixmap
@@ -3,16 +3,13 @@ from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5. QtGui import *
 #!/usr/bin/python
-import imageio
 import numpy as np
-import sys
-sys.path.insert(0, sys.path[0]+'\\..\\controller')
-print(sys.path)
 from root.controller import TransformationController
 from root.ui import ImageView
+from root.ui import TaskRunner
 class FourierModal(QDialog):
 
-    def __init__(self,transformationController: TransformationController):
+    def __init__(self,transformationController: TransformationController, magnitude=None):
         super().__init__()
         self.setStyleSheet(" border:2px solid rgb(150,150, 150); ")
         self.setWindowTitle("Fourier Manager!")
@@ -22,17 +19,39 @@ class FourierModal(QDialog):
         self.low_pass_button = QPushButton('Passa baixa', self)
         self.high_pass_button = QPushButton('Passa alta', self)
         self.band_pass_button = QPushButton('Passa banda', self)
+        self.band_reject_button = QPushButton('Rejeita banda', self)
 
         self.low_pass_button.clicked.connect(self.low_pass_filter)
         self.high_pass_button.clicked.connect(self.high_pass_filter)
         self.band_pass_button.clicked.connect(self.band_pass_filter)
+        self.band_reject_button.clicked.connect(self.band_reject_filter)
+
+        # Ideal filters cut abruptly (and ring), Butterworth and Gaussian are smooth
+        self.kind_box = QComboBox(self)
+        self.kind_box.addItem('Ideal', 'ideal')
+        self.kind_box.addItem('Butterworth', 'butterworth')
+        self.kind_box.addItem('Gaussiano', 'gaussian')
+        self.order_box = QSpinBox(self)
+        self.order_box.setRange(1, 10)
+        self.order_box.setValue(2)
+        self.order_box.setPrefix('Ordem ')
+        self.order_box.setEnabled(False)
+        self.kind_box.currentIndexChanged.connect(
+            lambda index: self.order_box.setEnabled(self.kind_box.itemData(index) == 'butterworth'))
 
         QBtn = QDialogButtonBox.Ok | QDialogButtonBox.Cancel
 
-        mag = self.transformController.apply_fourier()
-        img = mag
+        # The spectrum may already have been computed by a background task
+        if magnitude is None:
+            magnitude = self.transformController.apply_fourier()
+        img = magnitude
 
         self.imageView = ImageView(img)
+        # The spectrum is transformed once, the edits only run the inverse
+        # transform (at preview resolution) in background
+        self.previewView = ImageView(self.transformController.getCurrentImage())
+        self.previewRunner = TaskRunner(self)
+        self.previewRunner.failed.connect(self.showError)
 
 
         self.buttonBox = QDialogButtonBox(QBtn)
@@ -59,12 +78,20 @@ class FourierModal(QDialog):
 
 
         self.layout.addWidget(mainMenu)
+        kindLayout = QHBoxLayout()
+        kindLayout.addWidget(self.kind_box)
+        kindLayout.addWidget(self.order_box)
+        self.layout.addLayout(kindLayout)
         self.layout.addWidget(self.low_pass_button)
         self.layout.addWidget(self.high_pass_button)
         self.layout.addWidget(self.band_pass_button)
+        self.layout.addWidget(self.band_reject_button)
 
 
-        self.layout.addWidget(self.imageView)
+        views = QHBoxLayout()
+        views.addWidget(self.imageView)
+        views.addWidget(self.previewView)
+        self.layout.addLayout(views)
         self.layout.addWidget(self.buttonBox)
         self.setLayout(self.layout)
 
@@ -87,25 +114,60 @@ class FourierModal(QDialog):
 
     def loadImage(self,name):
         self.imageView.loadImage(name)
+        self.updatePreview()
+
+    def updatePreview(self):
+        # The mask is read here: undo, redo and new edits change the mask
+        # stack on this thread while the preview runs
+        self.previewRunner.submit(self.transformController.preview_inverse_fourier,
+                                  self.transformController.fourier_mask,
+                                  callback=self.previewView.loadImage)
+
+    def done(self, result):
+        self.previewRunner.wait()
+        super().done(result)
+
+    def filterKind(self):
+        return self.kind_box.currentData(), self.order_box.value()
+
+    def showError(self, message):
+        QMessageBox.warning(self, "Operation failed", message)
 
     def low_pass_filter(self):
         size, ok = QInputDialog.getText(self, 'Filtro passa baixa:',' adicione um valor em px')
         if ok:
-            self.loadImage(self.transformController.apply_low_pass(int(size)))
+            try:
+                self.loadImage(self.transformController.apply_low_pass(int(size), *self.filterKind()))
+            except ValueError as error:
+                # Not a number, or a zero cutoff for a Butterworth/Gaussian filter
+                self.showError(str(error))
 
     def high_pass_filter(self):
         size, ok = QInputDialog.getText(self, 'Filtro passa alta:',' adicione um valor em px')
         if ok:
-            self.loadImage(self.transformController.apply_high_pass(int(size)))
+            try:
+                self.loadImage(self.transformController.apply_high_pass(int(size), *self.filterKind()))
+            except ValueError as error:
+                self.showError(str(error))
 
     def band_pass_filter(self):
         size, ok = QInputDialog.getText(self, 'Filtro passa banda:',' adicione dois valores (raio menor e raio maior) separados por espaço')
         if ok:
             try:
-                minor, major = size.split(' ')
-                self.loadImage(self.transformController.apply_band_pass(int(minor),int(major)))
-            except:
-                print("Erro em passa banda")
+                minor, major = size.split()
+                self.loadImage(self.transformController.apply_band_pass(int(minor),int(major), *self.filterKind()))
+            except ValueError as error:
+                # Not two numbers, or radii the filter does not accept
+                self.showError(str(error))
+
+    def band_reject_filter(self):
+        size, ok = QInputDialog.getText(self, 'Filtro rejeita banda:',' adicione dois valores (raio menor e raio maior) separados por espaço')
+        if ok:
+            try:
+                minor, major = size.split()
+                self.loadImage(self.transformController.apply_band_reject(int(minor),int(major), *self.filterKind()))
+            except ValueError as error:
+                self.showError(str(error))
 
     def undoLastAction(self):
         self.loadImage(self.transformController.undoFourierAction())
@@ -1,25 +1,24 @@
-from root.controller import TransformationController
+from root.ui import DisplayAdapter
+from root.util import ImagePyramid
+from root.util import ImageUtil as util
 from PyQt5 import QtWidgets, QtGui
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5. QtGui import *
 #!/usr/bin/python
-import imageio
 import numpy as np
-import sys
-sys.path.insert(0, sys.path[0] + '\\..\\controller')
-print(sys.path)
 
 
 class ImageView(QWidget):
-    def __init__(self, img):
+    def __init__(self, img, pyramid=None):
         super().__init__()
         self.setStyleSheet(" border:2px solid rgb(150,150, 150); ")
 
         self.label = QLabel(self)
+        self.zoom = None
 
         # Initialze QtGui.QImage() with arguments data, height, width, and QImage.Format
-        self.loadImage(img)
+        self.loadImage(img, pyramid)
 
         self.label.setGeometry(0, 0, self.image.width(), self.image.height())
         self.label.setAlignment(Qt.AlignCenter)
@@ -28,56 +27,52 @@ class ImageView(QWidget):
         mainLayout.addWidget(self.label)
         self.setLayout(mainLayout)
 
-    def loadImage(self, im):
-        transformController = TransformationController()
+    def loadImage(self, im, pyramid=None):
         if type(im) is str:
-            im = transformController.openImage(im)
+            im = util.read_image(im)
         # normalização, retirar se for necessário
         # im = np.interp(im, (im.min(), im.max()), (0, 255))
 
-        im = im.astype(np.uint8)
+        # The pyramid gives smaller versions of the image for thumbnails and zoom
+        self.pyramid = pyramid if pyramid is not None else ImagePyramid(im)
+        self.render()
 
-        qimage = self.toQImage(im)
-        # qimage = self.get_qimage(im)
-
-        self.image = QPixmap.fromImage(qimage)
+    def render(self):
+        if self.zoom is None:
+            im = self.pyramid.level(0)
+        else:
+            image_height, image_width = util.get_dimensions(self.pyramid.level(0))
+            width = max(int(image_width * self.zoom), 1)
+            height = max(int(image_height * self.zoom), 1)
+            im = self.pyramid.level_for_size(width, height)
+
+        self.image = DisplayAdapter.to_qpixmap(im)
+        if self.zoom is not None:
+            self.image = self.image.scaled(width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
         self.label.setPixmap(self.image)
 
     def scale(self, width, height):
+        image_height, image_width = util.get_dimensions(self.pyramid.level(0))
         if width > height:
-            self.image = self.image.scaledToWidth(width)
+            self.setZoom(width / image_width)
         else:
-            self.image = self.image.scaledToHeight(height)
-        self.label.setPixmap(self.image)
+            self.setZoom(height / image_height)
+
+    def setZoom(self, factor):
+        '''
+        Show the image at factor times its original size. None shows it unscaled.
+        '''
+        self.zoom = factor
+        self.render()
+
+    def fitToWindow(self, width, height):
+        image_height, image_width = util.get_dimensions(self.pyramid.level(0))
+        self.setZoom(min(width / image_width, height / image_height))
 
     def _cmap2rgb(cmap, step):
         from matplotlib import cm
         return getattr(cm, cmap)(step)
 
     def toQImage(self, im, copy=False):
-        # gray_color_table = [qRgb(i, i, i) for i in range(256)]
-
-        if im is None:
-            return QImage()
-
-        if im.dtype == np.uint8:
-            if len(im.shape) == 2:
-                # print("shape = 2")
-                qim = QImage(
-                    im.data, im.shape[1], im.shape[0], im.strides[0], QImage.Format_Indexed8)
-                for i in range(0, 256):
-                    qim.setColor(i, qRgb(i, i, i))
-                return qim.copy() if copy else qim
-
-            elif len(im.shape) == 3:
-                # print("shape = 3")
-                if im.shape[2] == 3:
-                    # print("A imagem é RGB")
-                    qim = QImage(
-                        im.data, im.shape[1], im.shape[0], im.strides[0], QImage.Format_RGB888)
-                    return qim.copy() if copy else qim
-                elif im.shape[2] == 4:
-                    # print("A imagem é RGBA")
-                    qim = QImage(
-                        im.data, im.shape[1], im.shape[0], im.strides[0], QImage.Format_RGBA8888)
-                    return qim.copy() if copy else qim
+        qim = DisplayAdapter.to_qimage(im)
+        return qim.copy() if copy else qim
@@ -6,6 +6,7 @@ from PyQt5. QtGui import *
 from root.ui import SideBar
 from root.ui import ImageView
 from root.ui import FourierModal
+from root.ui import ParameterDialog
 import sys
 import numpy as np
 
@@ -40,6 +41,7 @@ class MainWindow(Window):
         # menu
         mainMenu = self.menuBar()
         fileMenu = mainMenu.addMenu("File")
+        viewMenu = mainMenu.addMenu("View")
         imageMenu = mainMenu.addMenu("Image")
         compressMenu = mainMenu.addMenu("Compress")
         uncompressMenu = mainMenu.addMenu("Uncompress")
@@ -52,6 +54,25 @@ class MainWindow(Window):
 
         fileMenu.addAction(closeAction)
 
+        # viewMenu
+        zoomInAction = QAction("Zoom &In", self)
+        zoomInAction.setShortcut("Ctrl++")
+        zoomInAction.triggered.connect(self.zoomIn)
+        zoomOutAction = QAction("Zoom &Out", self)
+        zoomOutAction.setShortcut("Ctrl+-")
+        zoomOutAction.triggered.connect(self.zoomOut)
+        zoomFitAction = QAction("&Fit to Window", self)
+        zoomFitAction.setShortcut("Ctrl+0")
+        zoomFitAction.triggered.connect(self.zoomFit)
+        zoomOriginalAction = QAction("&Original Size", self)
+        zoomOriginalAction.setShortcut("Ctrl+1")
+        zoomOriginalAction.triggered.connect(self.zoomOriginal)
+
+        viewMenu.addAction(zoomInAction)
+        viewMenu.addAction(zoomOutAction)
+        viewMenu.addAction(zoomFitAction)
+        viewMenu.addAction(zoomOriginalAction)
+
         # imagemenu
         colorModeMenu = imageMenu.addMenu("Gray Converter")
         colorFiltersMenu = imageMenu.addMenu("Color Filters")
@@ -71,16 +92,38 @@ class MainWindow(Window):
         scalarNearestAction.triggered.connect(self.scale_nearest)
         scalarBilinearAction = QAction("Scale via Bilinear",self)
         scalarBilinearAction.triggered.connect(self.scale_bilinear)
+        scalarFilterAction = QAction("Scale via Filter (Bicubic, Lanczos...)",self)
+        scalarFilterAction.triggered.connect(self.scale_filter)
 
         rotateNearestAction = QAction("Rotate via Nearest Neighbours",self)
         rotateNearestAction.triggered.connect(self.rotate_nearest)
         rotateBilinearAction = QAction("Rotate via Bilinear",self)
         rotateBilinearAction.triggered.connect(self.rotate_bilinear)
+        rotateExpandAction = QAction("Rotate (Expand Canvas)",self)
+        rotateExpandAction.triggered.connect(self.rotate_expand)
 
         spacialMenu.addAction(scalarNearestAction)
         spacialMenu.addAction(scalarBilinearAction)
+        spacialMenu.addAction(scalarFilterAction)
         spacialMenu.addAction(rotateNearestAction)
         spacialMenu.addAction(rotateBilinearAction)
+        spacialMenu.addAction(rotateExpandAction)
+        spacialMenu.addSeparator()
+
+        # Lossless orientation changes and crop (views, nothing is copied)
+        orientationActions = [
+            ("Rotate 90\u00b0 Left", lambda: self.runTask(self.transformController.rotate_90, 1)),
+            ("Rotate 90\u00b0 Right", lambda: self.runTask(self.transformController.rotate_90, -1)),
+            ("Rotate 180\u00b0", lambda: self.runTask(self.transformController.rotate_90, 2)),
+            ("Flip Horizontal", lambda: self.runTask(self.transformController.flip_horizontal)),
+            ("Flip Vertical", lambda: self.runTask(self.transformController.flip_vertical)),
+            ("Transpose", lambda: self.runTask(self.transformController.transpose)),
+            ("Crop", self.crop),
+        ]
+        for title, slot in orientationActions:
+            action = QAction(title, self)
+            action.triggered.connect(slot)
+            spacialMenu.addAction(action)
 
         #Steganography
         steganographyAction = QAction("Write Message",self)
@@ -96,9 +139,25 @@ class MainWindow(Window):
         sepiaFilterAction.triggered.connect(self.sepia_filter)
         chromaKeyAction = QAction("&Apply Chroma", self)
         chromaKeyAction.triggered.connect(self.chroma_key)
+        adjustColorAction = QAction("&Adjust Hue/Saturation/Intensity", self)
+        adjustColorAction.triggered.connect(self.adjust_color)
 
         colorFiltersMenu.addAction(chromaKeyAction)
         colorFiltersMenu.addAction(sepiaFilterAction)
+        colorFiltersMenu.addAction(adjustColorAction)
+        whiteBalanceAction = QAction("Auto &White Balance", self)
+        whiteBalanceAction.triggered.connect(lambda: self.runTask(self.transformController.apply_white_balance))
+        colorFiltersMenu.addAction(whiteBalanceAction)
+        swapChannelsAction = QAction("S&wap Channels...", self)
+        swapChannelsAction.triggered.connect(self.swap_channels)
+        colorFiltersMenu.addAction(swapChannelsAction)
+        colorFiltersMenu.addSeparator()
+        applyLutAction = QAction("Apply &LUT (.cube)...", self)
+        applyLutAction.triggered.connect(self.apply_lut)
+        colorFiltersMenu.addAction(applyLutAction)
+        saveLutAction = QAction("Save Hue/Saturation/Intensity as LUT...", self)
+        saveLutAction.triggered.connect(self.save_color_lut)
+        colorFiltersMenu.addAction(saveLutAction)
 
         ## Colormode
         rgbAction = QAction("&RGB", self)
@@ -233,55 +292,65 @@ class MainWindow(Window):
         self.toolbar.addAction(brushAction)
 
     def gaussian(self):
-        filter_size, ok = QInputDialog.getText(self, 'Suavização Gaussiana',
-                                         'Choose the dimension size for your filter (>=3)')
-        if ok and filter_size:
-            sigma, ok = QInputDialog.getText(self, 'Suavização Gaussiana',
-                                         'Choose a value for sigma')
-            if ok and sigma:
-                self.loadImage(self.transformController.apply_gaussian(int(filter_size),float(sigma)))
+        dialog = self.parameterDialog('Suavização Gaussiana',
+                                      [('Filter size (>=3)', 3, 99, 3, 0),
+                                       ('Sigma', 0.1, 100, 1, 2)],
+                                      self.transformController.preview_gaussian)
+        if dialog.exec_():
+            self.runTask(self.transformController.apply_gaussian, *dialog.getValues())
+
+    def parameterDialog(self, title, parameters, preview):
+        '''
+        Create a dialog that previews the operation on a proxy of the current image.
+        '''
+        self.taskRunner.wait()
+        self.transformController.set_preview_size(
+            self.imageView.width(), self.imageView.height())
+        proxy = self.transformController.previewEngine.get_proxy(
+            self.transformController.getCurrentImage())
+        return ParameterDialog(title, parameters, preview, proxy, self)
 
     def laplacian(self):
-        self.loadImage(self.transformController.apply_laplacian())
+        self.runTask(self.transformController.apply_laplacian)
 
     def piecewise(self):
         x,y = self.getCoordinateInput()
-        self.loadImage(self.transformController.apply_piecewise_linear(x,y))
+        self.runTask(self.transformController.apply_piecewise_linear, x, y)
 
     def negative_transform(self):
-        self.loadImage(self.transformController.negativeTransform())
+        self.runTask(self.transformController.negativeTransform)
 
     def logarithmic_transform(self):
         c, ok = QInputDialog.getText(self, 'Logaritmcic',
                                          'Enter c value (real):')
         if ok and c:
-            self.loadImage(self.transformController.logarithmicTransform(float(c)))
+            self.runTask(self.transformController.logarithmicTransform, float(c))
 
     def gamma_transform(self):
-        gamma, ok = QInputDialog.getText(self, 'Gamma Correction',
-                                         'Enter gamma value (real):')
-        if ok:
-            self.loadImage(
-                self.transformController.gammaTransform(float(gamma)))
+        dialog = self.parameterDialog('Gamma Correction',
+                                      [('Gamma', 0.01, 10, 1, 2)],
+                                      self.transformController.preview_gamma)
+        if dialog.exec_():
+            self.runTask(self.transformController.gammaTransform, *dialog.getValues())
 
     def median_filter(self):
-        size, ok = QInputDialog.getText(self, 'Median',
-                                        'Choose a filter dimension (> 2):')
-        if ok:
-            self.loadImage(self.transformController.apply_median(int(size)))
+        dialog = self.parameterDialog('Median',
+                                      [('Filter dimension (> 2)', 3, 99, 3, 0)],
+                                      self.transformController.preview_median)
+        if dialog.exec_():
+            self.runTask(self.transformController.apply_median, *dialog.getValues())
 
     def histEqualize(self):
-        self.loadImage(self.transformController.apply_equalized_histogram())
+        self.runTask(self.transformController.apply_equalized_histogram)
     def showHistogram(self):
         self.loadImage(self.transformController.show_histogram())
 
     def generic_convolution(self):
-        self.loadImage(self.transformController.apply_convolution(
-            self.getMatrixInput()))
+        self.runTask(self.transformController.apply_convolution, self.getMatrixInput())
 
 
     def sobel_filtering(self):
-        self.loadImage(self.transformController.apply_sobel())
+        self.runTask(self.transformController.apply_sobel)
 
     def getMatrixInput(self):
         dialog = MatrixDialog()
@@ -313,29 +382,25 @@ class MainWindow(Window):
 
 
     def gradient_filtering(self):
-        self.loadImage(self.transformController.apply_gradient(
-                self.getMatrixInput()))
+        self.runTask(self.transformController.apply_gradient, self.getMatrixInput())
 
     def mean_filtering(self):
         size, ok = QInputDialog.getText(self, 'Arithmetic Mean',
                                         'Choose a filter dimension (> 2):')
         if ok:
-            self.loadImage(
-                self.transformController.apply_arithmetic_mean(int(size)))
+            self.runTask(self.transformController.apply_arithmetic_mean, int(size))
 
     def geometric_filtering(self):
         size, ok = QInputDialog.getText(self, 'Geometric Mean',
                                         'Choose a filter dimension (> 2):')
         if ok:
-            self.loadImage(
-                self.transformController.apply_geometric_mean(int(size)))
+            self.runTask(self.transformController.apply_geometric_mean, int(size))
 
     def harmonic_filtering(self):
         size, ok = QInputDialog.getText(self, 'Harmonic Mean',
                                         'Choose a filter dimension (> 2):')
         if ok:
-            self.loadImage(
-                self.transformController.apply_harmonic_mean(int(size)))
+            self.runTask(self.transformController.apply_harmonic_mean, int(size))
 
     def contra_harmonic_filtering(self):
         size, ok = QInputDialog.getText(self, 'Contra-harmonic Mean',
@@ -344,8 +409,7 @@ class MainWindow(Window):
             q, ok = QInputDialog.getText(self, 'Contra-harmonic Mean',
                                          'Choose a value for q')
             if ok:
-                self.loadImage(
-                    self.transformController.apply_contra_harmonic_mean(int(size), float(q)))
+                self.runTask(self.transformController.apply_contra_harmonic_mean, int(size), float(q))
 
     def hi_boost_filtering(self):
         size, ok = QInputDialog.getText(self, 'HighBoost',
@@ -354,25 +418,74 @@ class MainWindow(Window):
             c, ok = QInputDialog.getText(self, 'HighBoost',
                                          'Entre com o valor de c')
             if ok:
-                self.loadImage(
-                    self.transformController.apply_highboost(int(size), float(c)))
+                self.runTask(self.transformController.apply_highboost, int(size), float(c))
 
     def fourier_spectrum(self):
-        w = FourierModal(self.transformController)
+        luminance = False
+        if self.transformController.getCurrentImage().ndim == 3:
+            modes = ["Per channel", "Luminance"]
+            mode, ok = QInputDialog.getItem(self, "Fourier Transform", "Transform colour image:", modes, 0, False)
+            if not ok:
+                return
+            luminance = mode == modes[1]
+        self.runTask(self.transformController.apply_fourier, luminance,
+                     callback=self.openFourierModal)
+
+    def openFourierModal(self, magnitude):
+        w = FourierModal(self.transformController, magnitude)
         if w.exec_():
-            self.loadImage(self.transformController.apply_inverse_fourier())
+            self.runTask(self.transformController.apply_inverse_fourier)
             print("Success!")
         else:
             print("Cancel!")
 
     def rgb_to_gray(self):
-        self.loadImage(self.transformController.rgb_to_gray())
+        self.runTask(self.transformController.rgb_to_gray)
 
     def rgb_to_hsv(self):
-        self.loadImage(self.transformController.rgb_to_hsv())
+        self.runTask(self.transformController.rgb_to_hsv)
+
+    def adjust_color(self):
+        dialog = self.parameterDialog('Hue/Saturation/Intensity',
+                                      [('Hue factor', 0, 2, 1, 2),
+                                       ('Saturation factor', 0, 5, 1, 2),
+                                       ('Intensity factor', 0, 5, 1, 2)],
+                                      self.transformController.preview_color)
+        if dialog.exec_():
+            self.runTask(self.transformController.adjust_color, *dialog.getValues())
+
+    def apply_lut(self):
+        name, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Choose a LUT", "", "Cube LUT (*.cube)")
+        if name:
+            interpolation, ok = QInputDialog.getItem(self, 'Apply LUT', 'Choose an interpolation',
+                                                     ['tetrahedral', 'trilinear'], 0, False)
+            if ok:
+                self.runTask(self.transformController.apply_lut, name, interpolation)
+
+    def save_color_lut(self):
+        dialog = self.parameterDialog('Hue/Saturation/Intensity LUT',
+                                      [('Hue factor', 0, 2, 1, 2),
+                                       ('Saturation factor', 0, 5, 1, 2),
+                                       ('Intensity factor', 0, 5, 1, 2)],
+                                      self.transformController.preview_color)
+        if dialog.exec_():
+            size, ok = QInputDialog.getItem(self, 'Save LUT', 'Grid size',
+                                            ['17', '33', '65'], 1, False)
+            name, _ = QtWidgets.QFileDialog.getSaveFileName(
+                self, 'Save LUT', "", "Cube LUT (*.cube)")
+            if ok and name:
+                self.runTask(self.transformController.save_color_lut, name,
+                             *dialog.getValues(), int(size), callback=lambda lut: None)
+
+    def swap_channels(self):
+        order, ok = QInputDialog.getItem(self, 'Swap Channels', 'New channel order',
+                                         ['bgr', 'brg', 'gbr', 'grb', 'rbg'], 0, False)
+        if ok:
+            self.runTask(self.transformController.apply_channel_swap, order)
 
     def sepia_filter(self):
-        self.loadImage(self.transformController.apply_sepia())
+        self.runTask(self.transformController.apply_sepia)
 
     def chroma_key(self):
             name,_ = QtWidgets.QFileDialog.getOpenFileName(self,"Choose a background image")
@@ -381,7 +494,7 @@ class MainWindow(Window):
             'Choose a filter dimension (> 0):')
                 if ok and faixa:
                     background = self.transformController.openImage(name)
-                    self.loadImage(self.transformController.apply_chroma_key(background,int(faixa)))
+                    self.runTask(self.transformController.apply_chroma_key, background, int(faixa))
 
     def steganography(self):
         name, _ = QtWidgets.QFileDialog.getOpenFileName(
@@ -414,24 +527,53 @@ class MainWindow(Window):
         scale, ok = QInputDialog.getText(self, 'Scale via Nearest Neighbours',
             'Choose a scale number')
         if(ok and scale):
-            self.loadImage(self.transformController.apply_scale_nearest(float(scale)))
+            self.runTask(self.transformController.apply_scale_nearest, float(scale))
 
     def scale_bilinear(self):
         scale, ok = QInputDialog.getText(self, 'Scale via Bilinear',
             'Choose a scale number')
         if(ok and scale):
-            self.loadImage(self.transformController.apply_scale_bilinear(float(scale)))
+            self.runTask(self.transformController.apply_scale_bilinear, float(scale))
+
+    def scale_filter(self):
+        scale, ok = QInputDialog.getText(self, 'Scale via Filter',
+            'Choose a scale number')
+        if(ok and scale):
+            filters = ['lanczos3', 'bicubic', 'triangle', 'box']
+            name, ok = QInputDialog.getItem(self, 'Scale via Filter', 'Choose a filter', filters, 0, False)
+            if ok:
+                self.runTask(self.transformController.apply_scale_resample, float(scale), name)
 
     def rotate_nearest(self):
         angle, ok = QInputDialog.getText(self, 'Rotate via Nearest Neighbours',
             'Choose an angle')
         if(ok and angle):
-            self.loadImage(self.transformController.apply_rotation_nearest(float(angle)))
+            self.runTask(self.transformController.apply_rotation_nearest, float(angle))
+
+    def crop(self):
+        values, ok = QInputDialog.getText(self, 'Crop',
+            'Top, left, height and width separated by spaces')
+        if(ok and values):
+            try:
+                top, left, height, width = [int(value) for value in values.split()]
+            except ValueError:
+                self.showTaskError("Expected four integers: top left height width")
+                return
+            self.runTask(self.transformController.crop, top, left, height, width)
+
+    def rotate_expand(self):
+        angle, ok = QInputDialog.getText(self, 'Rotate (Expand Canvas)',
+            'Choose an angle (degrees)')
+        if(ok and angle):
+            interpolations = ['bicubic', 'bilinear', 'nearest']
+            name, ok = QInputDialog.getItem(self, 'Rotate (Expand Canvas)', 'Choose an interpolation', interpolations, 0, False)
+            if ok:
+                self.runTask(self.transformController.apply_rotate, float(angle), name, True)
     def rotate_bilinear(self):
         angle, ok = QInputDialog.getText(self, 'Rotate via Bilinear',
             'Choose an angle')
         if(ok and angle):
-            self.loadImage(self.transformController.apply_rotate_bilinear(float(angle)))
+            self.runTask(self.transformController.apply_rotate_bilinear, float(angle))
 
 
 class MatrixDialog(QDialog):
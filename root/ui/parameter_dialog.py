@@ -0,0 +1,63 @@
+from PyQt5 import QtWidgets, QtGui
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5. QtGui import *
+from root.ui import ImageView
+from root.ui import TaskRunner
+
+
+class ParameterDialog(QDialog):
+    '''
+    Dialog to choose the parameters of an operation with a live preview.
+
+    parameters is a list of (label, minimum, maximum, default, decimals) and
+    preview is called with the current values, returning the image to show.
+    Previews run in background and a new value supersedes the previous one.
+    '''
+
+    def __init__(self, title, parameters, preview, image, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+
+        self.preview = preview
+        self.previewRunner = TaskRunner(self)
+        self.previewRunner.failed.connect(self.showTaskError)
+        self.imageView = ImageView(image)
+
+        form = QFormLayout()
+        self.inputs = []
+        for label, minimum, maximum, default, decimals in parameters:
+            spin = QDoubleSpinBox(self)
+            spin.setDecimals(decimals)
+            spin.setRange(minimum, maximum)
+            spin.setValue(default)
+            spin.valueChanged.connect(self.updatePreview)
+            form.addRow(label, spin)
+            self.inputs.append(spin)
+
+        buttonBox = QDialogButtonBox(
+            QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
+        buttonBox.accepted.connect(self.accept)
+        buttonBox.rejected.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.imageView)
+        layout.addLayout(form)
+        layout.addWidget(buttonBox)
+
+        self.updatePreview()
+
+    def getValues(self):
+        return [int(spin.value()) if spin.decimals() == 0 else spin.value()
+                for spin in self.inputs]
+
+    def updatePreview(self):
+        self.previewRunner.submit(self.preview, *self.getValues(),
+                                  callback=self.imageView.loadImage)
+
+    def showTaskError(self, message):
+        QMessageBox.warning(self, "Preview failed", message)
+
+    def done(self, result):
+        self.previewRunner.wait()
+        super().done(result)
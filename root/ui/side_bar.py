@@ -6,9 +6,9 @@ from root.ui import ImageView
 import sys
 
 class SideBar(QWidget):
-    def __init__(self, image_path):
+    def __init__(self, image_path, pyramid=None):
         super().__init__()
-        self.originalImageView = ImageView(image_path)
+        self.originalImageView = ImageView(image_path, pyramid)
         self.originalImageView.scale(self.width()/3,self.height()/3)
 
         self.init_propertiesWidget()
@@ -38,8 +38,8 @@ class SideBar(QWidget):
         # self.setPalette(p)
 
 
-    def loadImage(self, image_path):
-        self.originalImageView.loadImage(image_path)
+    def loadImage(self, image_path, pyramid=None):
+        self.originalImageView.loadImage(image_path, pyramid)
         self.originalImageView.scale(self.width()/3,self.height()/3)
 
 
@@ -0,0 +1,123 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from root.util import TaskContext, TaskCancelled
+
+
+class TaskSignals(QObject):
+    '''
+    Signals emitted by a Task. They are delivered on the GUI thread.
+    '''
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+    cancelled = pyqtSignal(int)
+
+
+class Task(QRunnable):
+
+    def __init__(self, generation, function, args):
+        super().__init__()
+        self.generation = generation
+        self.function = function
+        self.args = args
+        self.signals = TaskSignals()
+        self.context = TaskContext(self.report_progress)
+
+    def report_progress(self, percent):
+        self.signals.progress.emit(self.generation, percent)
+
+    def run(self):
+        try:
+            with self.context:
+                result = self.function(*self.args)
+        except TaskCancelled:
+            self.signals.cancelled.emit(self.generation)
+        except Exception as error:
+            self.signals.failed.emit(self.generation, repr(error))
+        else:
+            self.signals.finished.emit(self.generation, result)
+
+
+class TaskRunner(QObject):
+    '''
+    Runs controller operations outside of the Qt event loop.
+
+    Only one operation runs at a time, since they all edit the same controller.
+    Submitting a new operation cancels the previous one, and results from
+    superseded operations are discarded.
+    '''
+    progressChanged = pyqtSignal(int)
+    busyChanged = pyqtSignal(bool)
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(1)
+        self.generation = 0
+        self.task = None
+        self.callback = None
+        # Keep every started task alive until the worker is done with it
+        self.running = {}
+
+    def submit(self, function, *args, callback=None):
+        self.cancel()
+        self.generation += 1
+        self.callback = callback
+        self.task = Task(self.generation, function, args)
+        self.task.signals.progress.connect(self._on_progress)
+        self.task.signals.finished.connect(self._on_finished)
+        self.task.signals.failed.connect(self._on_failed)
+        self.task.signals.cancelled.connect(self._on_cancelled)
+        self.running[self.generation] = self.task
+        self.busyChanged.emit(True)
+        self.pool.start(self.task)
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.context.cancel()
+
+    def wait(self):
+        '''
+        Cancel the running operation and block until the worker is idle.
+        '''
+        self.cancel()
+        self.pool.waitForDone()
+        # The caller takes over from here, so late results are stale
+        self.generation += 1
+        if self.task is not None:
+            self._done()
+
+    def isBusy(self):
+        return self.task is not None
+
+    def _is_current(self, generation):
+        return generation == self.generation and self.task is not None
+
+    def _done(self):
+        self.task = None
+        self.callback = None
+        self.busyChanged.emit(False)
+
+    def _on_progress(self, generation, percent):
+        if self._is_current(generation):
+            self.progressChanged.emit(percent)
+
+    def _on_finished(self, generation, result):
+        self.running.pop(generation, None)
+        if not self._is_current(generation):
+            return
+        callback = self.callback
+        self._done()
+        if callback is not None:
+            callback(result)
+
+    def _on_failed(self, generation, message):
+        self.running.pop(generation, None)
+        if self._is_current(generation):
+            self._done()
+            self.failed.emit(message)
+
+    def _on_cancelled(self, generation):
+        self.running.pop(generation, None)
+        if self._is_current(generation):
+            self._done()
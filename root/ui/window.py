@@ -5,9 +5,8 @@ from PyQt5.QtCore import *
 from PyQt5. QtGui import *
 from root.ui import SideBar
 from root.ui import ImageView
+from root.ui import TaskRunner
 import sys
-sys.path.insert(0, sys.path[0] + '\\..\\controller')
-print(sys.path)
 
 _FILE_TYPES = "bmp(*.bmp);;jpg(*.jpg);;png(*.png)"
 
@@ -26,13 +25,59 @@ class Window(QMainWindow):
 
         self.setGeometry(50, 50, self.const.WIDTH, self.const.HEIGHT)
         self.setWindowTitle(self.const.WINDOW_TITLE)
-        self.side_bar = SideBar(self.const.DEFAULT_IMAGE)
 
+        # The default image is decoded once and shared by both views
         self.im = self.transformController.getCurrentImage()
-        self.imageView = ImageView(self.im)
+        pyramid = self.transformController.get_pyramid()
+        self.side_bar = SideBar(self.im, pyramid)
+        self.imageView = ImageView(self.im, pyramid)
+        self.initTaskRunner()
         self.initIcons()
         self.show()
 
+    def initTaskRunner(self):
+        self.taskRunner = TaskRunner(self)
+
+        self.progressBar = QProgressBar()
+        self.progressBar.setMaximumWidth(200)
+        self.progressBar.hide()
+        self.statusBar().addPermanentWidget(self.progressBar)
+
+        cancelAction = QAction("&Cancel operation", self)
+        cancelAction.setShortcut(QtGui.QKeySequence("Esc"))
+        cancelAction.triggered.connect(self.cancelTask)
+        self.addAction(cancelAction)
+
+        self.taskRunner.progressChanged.connect(self.progressBar.setValue)
+        self.taskRunner.busyChanged.connect(self.setBusy)
+        self.taskRunner.failed.connect(self.showTaskError)
+
+    def runTask(self, function, *args, callback=None):
+        '''
+        Run a controller operation in background and show its result when done.
+        The images it produces are only stored in the controller (on the GUI
+        thread) if it was not superseded by another operation.
+        '''
+        if callback is None:
+            callback = self.loadImage
+        controller = self.transformController
+        self.taskRunner.submit(controller.stage, function, *args,
+                               callback=lambda staged: callback(controller.commit(staged)))
+
+    def cancelTask(self):
+        self.taskRunner.cancel()
+
+    def setBusy(self, busy):
+        self.progressBar.setValue(0)
+        self.progressBar.setVisible(busy)
+        if busy:
+            self.statusBar().showMessage("Processing... (Esc to cancel)")
+        else:
+            self.statusBar().clearMessage()
+
+    def showTaskError(self, message):
+        QMessageBox.warning(self, "Operation failed", message)
+
     def initIcons(self):
         # import sys
         # # its win32, maybe there is win64 too?
@@ -52,9 +97,11 @@ class Window(QMainWindow):
         sys.exit()
 
     def undoLastAction(self):
+        self.taskRunner.wait()
         self.loadImage(self.transformController.undoAction())
 
     def redoLastAction(self):
+        self.taskRunner.wait()
         self.loadImage(self.transformController.redoAction())
 
     def saveFile(self):
@@ -62,6 +109,7 @@ class Window(QMainWindow):
         name, t = QtWidgets.QFileDialog.getSaveFileName(
             self, 'Save File', "", _FILE_TYPES)
         if name:
+            self.taskRunner.wait()
             self.transformController.save(name)
             print("FILENAME")
             print(name)
@@ -69,16 +117,36 @@ class Window(QMainWindow):
     def fileOpen(self):
         name, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Open File")
         if name:
+            self.taskRunner.wait()
             self.setWindowTitle(name)
             self.transformController.loadImage(name)
             self.openImage(self.transformController.getCurrentImage())
 
     def openImage(self, name):
-        self.imageView.loadImage(name)
-        self.side_bar.loadImage(name)
+        pyramid = self.getPyramid(name)
+        self.imageView.loadImage(name, pyramid)
+        self.side_bar.loadImage(name, pyramid)
 
     def loadImage(self, name):
-        self.imageView.loadImage(name)
+        self.imageView.loadImage(name, self.getPyramid(name))
+
+    def getPyramid(self, image):
+        # The controller keeps the pyramid of the current image between renders
+        if image is self.transformController.getCurrentImage():
+            return self.transformController.get_pyramid()
+        return None
+
+    def zoomIn(self):
+        self.imageView.setZoom((self.imageView.zoom or 1) * 2)
+
+    def zoomOut(self):
+        self.imageView.setZoom((self.imageView.zoom or 1) / 2)
+
+    def zoomFit(self):
+        self.imageView.fitToWindow(self.imageView.width(), self.imageView.height())
+
+    def zoomOriginal(self):
+        self.imageView.setZoom(None)
 
 
 class Const():
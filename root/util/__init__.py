@@ -1,2 +1,5 @@
 from .image_util import ImageUtil
 from .rgb_util import RgbUtil
+from .image_buffer import ImageBuffer, ImageBufferSlot
+from .task_context import TaskContext, TaskCancelled
+from .image_pyramid import ImagePyramid
@@ -0,0 +1,62 @@
+import numpy as np
+
+
+class ImageBuffer():
+    '''
+    Read-only wrapper around an image array.
+    The same pixels can be shared between the current, undo and redo states
+    without copying; a copy is only made when someone asks to write on it.
+    '''
+
+    def __init__(self, data):
+        self._data = ImageBuffer.freeze(data)
+
+    @staticmethod
+    def freeze(data):
+        '''
+        Return a read-only view of data. The pixels are not copied.
+        '''
+        if data is None:
+            return None
+        view = np.asarray(data).view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def array(self):
+        return self._data
+
+    @property
+    def shape(self):
+        return self._data.shape
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    def writable(self):
+        '''
+        Return a private, writable copy of the pixels (copy-on-write).
+        '''
+        return np.array(self._data, copy=True)
+
+
+class ImageBufferSlot():
+    '''
+    Class attribute that stores images as ImageBuffer and gives back their
+    read-only arrays. The buffer itself is kept in "_<name>_buffer".
+    '''
+
+    def __set_name__(self, owner, name):
+        self.buffer_name = '_' + name + '_buffer'
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        buffer = instance.__dict__.get(self.buffer_name)
+        return None if buffer is None else buffer.array
+
+    def __set__(self, instance, image):
+        if image is not None and not isinstance(image, ImageBuffer):
+            image = ImageBuffer(image)
+        instance.__dict__[self.buffer_name] = image
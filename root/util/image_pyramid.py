@@ -0,0 +1,46 @@
+from root.util import ImageUtil as util
+import numpy as np
+
+
+class ImagePyramid():
+    '''
+    Multi-resolution version of an image: level 0 is the image itself and each
+    next level is a 2x reduction of the previous one (2x2 box average, which
+    avoids aliasing). Levels are built lazily the first time they are needed.
+    '''
+
+    def __init__(self, image):
+        self.image = image
+        self.levels = [image]
+
+    def reduce(self, img):
+        height, width = util.get_dimensions(img)
+        # Odd sizes are completed by repeating the last row/column
+        padding = [(0, height % 2), (0, width % 2)] + [(0, 0)] * (img.ndim - 2)
+        if height % 2 or width % 2:
+            img = np.pad(img, padding, mode='edge')
+        return util.block_reduce(img, 2)
+
+    def level(self, index):
+        while len(self.levels) <= index:
+            previous = self.levels[-1]
+            if min(util.get_dimensions(previous)) <= 1:
+                break
+            self.levels.append(self.reduce(previous))
+        return self.levels[min(index, len(self.levels) - 1)]
+
+    def level_for_size(self, width, height):
+        '''
+        Return the smallest level that is still at least width x height, so it
+        only needs to be slightly downscaled to be displayed at that size.
+        '''
+        index = 0
+        while True:
+            current = self.level(index)
+            following = self.level(index + 1)
+            if following is current:
+                return current
+            following_height, following_width = util.get_dimensions(following)
+            if following_width < width or following_height < height:
+                return current
+            index += 1
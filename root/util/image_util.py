@@ -1,7 +1,5 @@
 #!/usr/bin/python
-import imageio
 import numpy as np
-from PIL import Image
 import numpy
 _MIN_PIXEL = 0
 _MAX_PIXEL = 255
@@ -22,10 +20,12 @@ class ImageUtil():
 
     @staticmethod
     def read_image(image_path, type="RGB"):
+        import imageio
         return imageio.imread(image_path, as_gray=False, pilmode=type)
 
     @staticmethod
     def save_image(name, image_as_byte):
+        import imageio
         imageio.imwrite(name, image_as_byte)
 
     @staticmethod
@@ -64,6 +64,24 @@ class ImageUtil():
             width = 1
         return height, width
 
+    @staticmethod
+    def block_reduce(img, factor):
+        '''
+        Downscale an image by an integer factor averaging each factor x factor block.
+        The averaging works as an antialiasing (box) filter.
+        '''
+        factor = int(factor)
+        if factor <= 1:
+            return img
+        height, width = ImageUtil.get_dimensions(img)
+        height, width = height // factor, width // factor
+        blocks = np.asarray(img)[:height * factor, :width * factor]
+        blocks = blocks.reshape((height, factor, width, factor) + blocks.shape[2:])
+        reduced = blocks.mean(axis=(1, 3))
+        if np.issubdtype(img.dtype, np.integer):
+            reduced = np.rint(reduced)
+        return reduced.astype(img.dtype)
+
     @staticmethod
     def format_filter_size(size):
         '''
@@ -107,6 +125,7 @@ class ImageUtil():
         @param fig a matplotlib figure
         @return a Python Imaging Library ( PIL ) image
         """
+        from PIL import Image
         # put the figure pixmap into a numpy array
         buf = ImageUtil.fig2data ( fig )
         w, h, d = buf.shape
@@ -0,0 +1,64 @@
+import threading
+
+
+class TaskCancelled(Exception):
+    '''
+    Raised inside a long operation when its task has been cancelled.
+    '''
+    pass
+
+
+class TaskContext():
+    '''
+    Progress and cooperative cancellation for long operations.
+
+    The context is bound to the thread that runs the operation. Filters call
+    TaskContext.step(done, total) between rows; without an active context the
+    call does nothing, so the filters keep working outside of a task.
+    '''
+
+    _local = threading.local()
+
+    def __init__(self, progress_callback=None):
+        self.progress_callback = progress_callback
+        self._cancelled = threading.Event()
+        self._last_percent = -1
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def report(self, done, total):
+        if self.is_cancelled():
+            raise TaskCancelled()
+        if self.progress_callback is None or total <= 0:
+            return
+        # Only report when the percentage changes, to avoid flooding the GUI
+        percent = int(100 * done / total)
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.progress_callback(percent)
+
+    def __enter__(self):
+        self._previous = getattr(TaskContext._local, 'current', None)
+        TaskContext._local.current = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        TaskContext._local.current = self._previous
+        return False
+
+    @staticmethod
+    def current():
+        return getattr(TaskContext._local, 'current', None)
+
+    @staticmethod
+    def step(done, total):
+        '''
+        Report progress of the running task and stop it if it was cancelled.
+        '''
+        context = TaskContext.current()
+        if context is not None:
+            context.report(done, total)
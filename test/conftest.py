@@ -0,0 +1,12 @@
+import pytest
+from root.filter.convolution_tuner import ConvolutionTuner
+
+
+@pytest.fixture(autouse=True)
+def tuning_cache(tmp_path, monkeypatch):
+    '''
+    Keep the convolution winners of every test in its own temporary file
+    instead of the per-user cache.
+    '''
+    monkeypatch.setenv('ROOT_TUNING_CACHE', str(tmp_path / 'convolution_tuning.json'))
+    monkeypatch.setattr(ConvolutionTuner, 'instance', None)
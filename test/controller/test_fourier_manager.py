@@ -0,0 +1,172 @@
+#!/usr/bin/python
+import pytest
+import numpy as np
+from root.controller import FourierManager, FFTPlanCache
+
+
+def reference_dft(x, inverse=False):
+    n = x.shape[-1]
+    k = np.arange(n)
+    sign = 1 if inverse else -1
+    matrix = np.exp(sign * 2j * np.pi * np.outer(k, k) / n)
+    return x @ matrix.T
+
+
+def random_signal(*shape):
+    random = np.random.RandomState(0)
+    return random.rand(*shape) + 1j * random.rand(*shape)
+
+
+@pytest.mark.parametrize('n', [1, 2, 8, 64, 256])
+def test_fft_power_of_two(n):
+    x = random_signal(n)
+    obtained = FourierManager().fft(x)
+    assert np.allclose(obtained, reference_dft(x))
+
+
+@pytest.mark.parametrize('n', [3, 7, 12, 100, 97])
+def test_fft_arbitrary_size(n):
+    x = random_signal(n)
+    obtained = FourierManager().fft(x)
+    assert np.allclose(obtained, reference_dft(x))
+
+
+def test_fft_transforms_all_rows():
+    x = random_signal(5, 16)
+    obtained = FourierManager().fft(x)
+    assert np.allclose(obtained, reference_dft(x))
+
+
+def test_inverse_transform():
+    x = random_signal(3, 24)
+    obtained = FourierManager().transform(x, True)
+    assert np.allclose(obtained, reference_dft(x, inverse=True))
+
+
+def test_fft2():
+    img = np.random.RandomState(1).rand(12, 16)
+    obtained = FourierManager().fft2(img)
+    expected = reference_dft(reference_dft(img).T).T
+    assert np.allclose(obtained, expected)
+
+
+def test_ifft2_recovers_image():
+    manager = FourierManager()
+    img = np.random.RandomState(2).rand(10, 8)
+    obtained = manager.ifft2(manager.fft2(img))
+    assert np.allclose(obtained, img)
+
+
+def test_circular_convolution():
+    x = np.array([1.0, 2.0, 3.0, 4.0])
+    y = np.array([0.0, 1.0, 0.0, 0.0])
+    obtained = FourierManager().convolve(x, y)
+    assert np.allclose(obtained, [4.0, 1.0, 2.0, 3.0])
+
+
+def test_plan_is_reused():
+    manager = FourierManager()
+    manager.fft(random_signal(2, 48))
+    plan = manager.get_plan(48)
+    tables = dict(plan.tables)
+    manager.fft(random_signal(3, 48))
+    manager.transform(random_signal(48), True)
+    assert manager.get_plan(48) is plan
+    for key, table in tables.items():
+        assert plan.tables[key] is table
+
+
+def test_plan_cache_limits_unusual_sizes():
+    cache = FFTPlanCache(maxsize=2)
+    first = cache.get(3)
+    cache.get(5)
+    cache.get(7)
+    assert cache.get(3) is not first
+    assert cache.get(64) is cache.get(64)
+    assert len(cache) == 3
+
+
+@pytest.mark.parametrize('n', [6, 15, 45, 600, 1080])
+def test_fft_mixed_radix(n):
+    x = random_signal(3, n)
+    manager = FourierManager()
+    assert manager.get_small_factors(n) is not None
+    assert np.allclose(manager.fft(x), reference_dft(x))
+    assert np.allclose(manager.transform(x, True), reference_dft(x, inverse=True))
+
+
+def test_small_factors_of_large_prime():
+    assert FourierManager().get_small_factors(2 * 97) is None
+
+
+@pytest.mark.parametrize('n', [1, 2, 7, 16, 30, 97])
+def test_rfft_keeps_half_spectrum(n):
+    x = np.random.RandomState(3).rand(4, n)
+    obtained = FourierManager().rfft(x)
+    assert obtained.shape == (4, n // 2 + 1)
+    assert np.allclose(obtained, reference_dft(x)[:, :n // 2 + 1])
+
+
+@pytest.mark.parametrize('n', [1, 2, 7, 16, 30, 97])
+def test_irfft_recovers_signal(n):
+    manager = FourierManager()
+    x = np.random.RandomState(4).rand(4, n)
+    assert np.allclose(manager.irfft(manager.rfft(x), n), x)
+
+
+@pytest.mark.parametrize('shape', [(8, 8), (12, 15), (9, 10)])
+def test_rfft2_full_spectrum(shape):
+    manager = FourierManager()
+    img = np.random.RandomState(5).rand(*shape)
+    half = manager.rfft2(img)
+    assert half.shape == (shape[0], shape[1] // 2 + 1)
+    assert np.allclose(manager.full_spectrum(half, shape[1]), manager.fft2(img))
+    assert np.allclose(manager.irfft2(half, shape[1]), img)
+
+
+def test_single_precision_spectrum():
+    manager = FourierManager(np.complex64)
+    img = np.random.RandomState(6).rand(16, 16)
+    obtained = manager.rfft2(img)
+    assert obtained.dtype == np.complex64
+    assert np.allclose(manager.irfft2(obtained, 16), img, atol=1e-5)
+
+
+def test_fft2_colour_channels():
+    manager = FourierManager()
+    img = np.random.RandomState(7).rand(12, 10, 3)
+    obtained = manager.fft2(img)
+    assert obtained.shape == img.shape
+    for channel in range(3):
+        assert np.allclose(obtained[:, :, channel], manager.fft2(img[:, :, channel]))
+    assert np.allclose(manager.ifft2(obtained), img)
+
+
+def test_rfft2_colour_channels():
+    manager = FourierManager()
+    img = np.random.RandomState(8).rand(9, 10, 3)
+    half = manager.rfft2(img)
+    assert half.shape == (9, 6, 3)
+    assert np.allclose(manager.full_spectrum(half, 10), manager.fft2(img))
+    assert np.allclose(manager.irfft2(half, 10), img)
+
+
+def test_shifts_keep_channels():
+    manager = FourierManager()
+    img = np.arange(5 * 6 * 3).reshape(5, 6, 3)
+    shifted = manager.fftshift(img)
+    assert np.array_equal(shifted, np.fft.fftshift(img, axes=(0, 1)))
+    assert np.array_equal(manager.ifftshift(shifted), img)
+
+
+@pytest.mark.parametrize('block_size', [None, 4, 9])
+def test_convolve2d_overlap_add(block_size):
+    img = np.random.RandomState(9).rand(23, 17, 2)
+    kernel = np.random.RandomState(10).rand(4, 5)
+    obtained = FourierManager().convolve2d(img, kernel, block_size)
+    full = np.zeros((23 + 3, 17 + 4, 2))
+    for y in range(4):
+        for x in range(5):
+            full[y:y + 23, x:x + 17] += kernel[y, x] * img
+    assert obtained.shape == img.shape
+    assert np.allclose(obtained, full[1:24, 2:19])
@@ -0,0 +1,50 @@
+#!/usr/bin/python
+import pytest
+import numpy as np
+from root.controller import PreviewEngine
+
+
+def test_proxy_fits_viewport():
+    engine = PreviewEngine(100, 50)
+    obtained = engine.get_proxy(np.zeros((400, 300), dtype=np.uint8))
+    assert obtained.shape[0] <= 50
+    assert obtained.shape[1] <= 100
+
+
+def test_proxy_is_cached():
+    engine = PreviewEngine(100, 50)
+    image = np.zeros((400, 300), dtype=np.uint8)
+    assert engine.get_proxy(image) is engine.get_proxy(image)
+
+
+def test_proxy_of_small_image_is_the_image():
+    engine = PreviewEngine(100, 50)
+    image = np.zeros((10, 10), dtype=np.uint8)
+    assert engine.get_proxy(image) is image
+
+
+def test_scale_length():
+    engine = PreviewEngine(100, 50)
+    proxy, factor = engine.get_scaled_proxy(np.zeros((400, 300), dtype=np.uint8))
+    assert engine.scale_length(16, factor) == 2
+
+
+def test_preview_scaled_gets_factor_of_its_proxy():
+    engine = PreviewEngine(100, 50)
+    large, small = np.zeros((400, 300), dtype=np.uint8), np.zeros((10, 10), dtype=np.uint8)
+    engine.get_proxy(large)
+    # The factor is the one of the proxy built for small, not of the cached one
+    assert engine.preview_scaled(small, lambda proxy, factor: (proxy, factor)) == (small, 1)
+    proxy, factor = engine.preview_scaled(large, lambda proxy, factor: (proxy, factor))
+    assert factor == 8 and proxy.shape == (50, 37)
+
+
+def test_proxy_and_factor_change_together():
+    engine = PreviewEngine(100, 50)
+    small, large = np.zeros((10, 10), dtype=np.uint8), np.zeros((400, 300), dtype=np.uint8)
+    engine.get_proxy(large)
+    assert engine.get_proxy(small) is small
+    source, factor, proxy = engine.cache
+    assert source is small and factor == 1 and proxy is small
+    engine.set_viewport(200, 100)
+    assert engine.cache[0] is None
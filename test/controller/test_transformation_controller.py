@@ -0,0 +1,145 @@
+import numpy as np
+from root.controller import TransformationController
+from root.converter import ColorConverter as converter
+
+
+def fourier_controller(image):
+    controller = TransformationController()
+    controller.update_memory_images(image)
+    controller.apply_fourier()
+    return controller
+
+
+def test_inverse_fourier_does_not_change_spectrum():
+    image = np.random.RandomState(0).randint(0, 256, (16, 20)).astype(np.uint8)
+    controller = fourier_controller(image)
+    spectrum = controller.current_complete_fourier.copy()
+    controller.apply_low_pass(3)
+    controller.apply_inverse_fourier()
+    controller.apply_inverse_fourier()
+    assert np.array_equal(controller.current_complete_fourier, spectrum)
+
+
+def test_fourier_undo_redo_swap_masks():
+    image = np.random.RandomState(1).randint(0, 256, (16, 16)).astype(np.uint8)
+    controller = fourier_controller(image)
+    low_pass = controller.apply_low_pass(4)
+    controller.apply_high_pass(1)
+    controller.undoFourierAction()
+    assert np.array_equal(controller.fourier_image, low_pass)
+    controller.undoFourierAction()
+    assert np.array_equal(controller.fourier_image, controller.fourier_magnitude)
+    assert np.allclose(controller.apply_inverse_fourier(), image, atol=1e-3)
+    controller.redoFourierAction()
+    assert np.array_equal(controller.fourier_image, low_pass)
+
+
+def test_new_fourier_edit_drops_redo():
+    image = np.random.RandomState(2).randint(0, 256, (8, 8)).astype(np.uint8)
+    controller = fourier_controller(image)
+    controller.apply_low_pass(2)
+    controller.undoFourierAction()
+    controller.apply_high_pass(1)
+    controller.redoFourierAction()
+    assert len(controller.fourier_masks) == 2
+    assert controller.fourier_mask[4, 4] == 0
+
+
+def test_fourier_preview_at_proxy_resolution():
+    image = np.random.RandomState(3).randint(0, 256, (40, 60, 3)).astype(np.uint8)
+    controller = fourier_controller(image)
+    controller.set_preview_size(20, 20)
+    preview = controller.preview_inverse_fourier()
+    assert preview.shape == (13, 20, 3)
+    assert preview.dtype == np.uint8
+    # Without filtering the preview is a low-passed copy of the image
+    assert abs(preview.astype(float).mean() - image.mean()) < 2
+
+
+def test_preview_uses_given_mask():
+    image = np.random.RandomState(5).randint(0, 256, (16, 16)).astype(np.uint8)
+    controller = fourier_controller(image)
+    controller.set_preview_size(8, 8)
+    mask = controller.fourier_mask
+    unfiltered = controller.preview_inverse_fourier()
+    # Later edits do not change a preview of an earlier mask
+    controller.apply_low_pass(1)
+    assert np.array_equal(controller.preview_inverse_fourier(mask), unfiltered)
+    assert not np.array_equal(controller.preview_inverse_fourier(), unfiltered)
+
+
+def test_color_planes_follow_image_version():
+    image = np.random.RandomState(3).randint(0, 256, (12, 10, 3)).astype(np.uint8)
+    controller = TransformationController()
+    controller.update_memory_images(image)
+    planes = controller.get_color_planes()
+    assert controller.get_color_planes() is planes
+
+    controller.adjust_color(saturation=0.5)
+    assert controller.get_color_planes() is not planes
+    controller.undoAction()
+    assert controller.get_color_planes() is not planes
+
+
+def test_chained_color_adjustments_convert_once(monkeypatch):
+    image = np.random.RandomState(4).randint(0, 256, (64, 64, 3)).astype(np.uint8)
+    controller = TransformationController()
+    controller.update_memory_images(image)
+    conversions = []
+    rgb_to_hsi_image = converter.rgb_to_hsi_image
+    monkeypatch.setattr(converter, 'rgb_to_hsi_image', lambda img, *args: conversions.append(img.shape) or rgb_to_hsi_image(img, *args))
+    controller.adjust_color(hue=0.9)
+    controller.adjust_color(saturation=0.8)
+    controller.adjust_color(intensity=0.7)
+    # The whole image once, then only pixels pushed outside the RGB cube
+    assert conversions[0] == image.shape
+    assert all(len(shape) == 2 for shape in conversions[1:])
+
+
+def test_carried_color_planes_match_committed_image():
+    image = np.random.RandomState(4).randint(0, 256, (64, 64, 3)).astype(np.uint8)
+    controller = TransformationController()
+    controller.update_memory_images(image)
+    committed = controller.adjust_color(intensity=3)
+    chained = controller.adjust_color(intensity=1 / 3)
+
+    expected = TransformationController()
+    expected.update_memory_images(committed.copy())
+    # The carried planes only differ from a conversion by the rounding of the pixels
+    difference = chained.astype(int) - expected.adjust_color(intensity=1 / 3)
+    assert np.abs(difference).max() <= 1
+
+
+def test_staged_color_planes_are_stored_on_commit():
+    image = np.random.RandomState(5).randint(0, 256, (16, 16, 3)).astype(np.uint8)
+    controller = TransformationController()
+    controller.update_memory_images(image)
+    staged = controller.stage(controller.adjust_color, 1, 0.5, 1)
+    assert controller.current_image is not None and np.array_equal(controller.current_image, image)
+    obtained = controller.commit(staged)
+    assert controller.color_planes['image'][0] is obtained
+
+
+def test_staged_fourier_state_is_set_on_commit():
+    image = np.random.RandomState(6).randint(0, 256, (16, 20)).astype(np.uint8)
+    controller = TransformationController()
+    controller.update_memory_images(image)
+    staged = controller.stage(controller.apply_fourier)
+    assert controller.fourier_source is None and controller.fourier_masks == []
+    magnitude = controller.commit(staged)
+    assert magnitude is controller.fourier_magnitude
+    assert controller.fourier_source is controller.current_image
+    assert len(controller.fourier_masks) == 1 and controller.fourier_depth == 0
+
+
+def test_superseded_mask_edit_keeps_mask_stack():
+    controller = fourier_controller(np.random.RandomState(7).randint(0, 256, (16, 20)).astype(np.uint8))
+    controller.apply_low_pass(6)
+    masks, image = controller.fourier_masks, controller.fourier_image
+    # Staged but never committed, as a superseded task
+    controller.stage(controller.apply_high_pass, 2)
+    assert controller.fourier_masks is masks and controller.fourier_depth == 1
+    assert controller.fourier_image is image
+    controller.undoFourierAction()
+    controller.commit(controller.stage(controller.apply_high_pass, 2))
+    assert len(controller.fourier_masks) == 2 and controller.fourier_depth == 1
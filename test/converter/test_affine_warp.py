@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from root.converter import AffineWarp, RemapTable, RemapCache
+
+
+def test_compose_and_invert():
+    matrix = AffineWarp.compose(AffineWarp.scaling(2, 3), AffineWarp.rotation(30), AffineWarp.translation(5, -1))
+    identity = AffineWarp.compose(matrix, AffineWarp.invert(matrix))
+    assert np.allclose(identity, [[1, 0, 0], [0, 1, 0]])
+
+
+def test_rotation_is_counter_clockwise_on_screen():
+    # A point right of the centre goes up (smaller row)
+    x, y = AffineWarp.rotation(90, (5, 5)) @ [6, 5, 1]
+    assert np.allclose((x, y), (5, 4))
+
+
+def test_translation_moves_pixels():
+    img = np.zeros((5, 5))
+    img[1, 1] = 1
+    obtained = AffineWarp.warp(img, AffineWarp.translation(2, 1), interpolation='nearest')
+    assert obtained[2, 3] == 1
+    assert obtained.sum() == 1
+
+
+def test_expand_holds_whole_image():
+    img = np.ones((10, 30), dtype=np.uint8)
+    obtained = AffineWarp.warp(img, AffineWarp.shear(0.5), expand=True, interpolation='nearest')
+    assert obtained.shape == (10, 35)
+    assert obtained.sum() == img.sum()
+
+
+def test_fill_per_channel():
+    img = np.zeros((4, 4, 3), dtype=np.uint8)
+    obtained = AffineWarp.warp(img, AffineWarp.translation(10, 0), fill=(1, 2, 3), interpolation='bicubic')
+    assert np.all(obtained == [1, 2, 3])
+
+
+@pytest.mark.parametrize('interpolation', ['bilinear', 'bicubic'])
+def test_interpolation_of_linear_ramp(interpolation):
+    # Both interpolations reproduce a linear function exactly
+    img = np.tile(np.arange(20, dtype=float), (20, 1))
+    obtained = AffineWarp.warp(img, AffineWarp.translation(0.25, 0), interpolation=interpolation)
+    assert np.allclose(obtained[:, 3:17], img[:, 3:17] - 0.25)
+
+
+def test_unknown_interpolation():
+    with pytest.raises(ValueError):
+        AffineWarp.warp(np.zeros((2, 2)), AffineWarp.scaling(1), interpolation='lanczos')
+
+
+@pytest.mark.parametrize('interpolation', ['nearest', 'bilinear', 'bicubic'])
+def test_remap_table_matches_warp(interpolation):
+    img = np.random.RandomState(0).randint(0, 256, (30, 40, 3)).astype(np.uint8)
+    matrix = AffineWarp.compose(AffineWarp.rotation(17, (20, 15)), AffineWarp.shear(0.1))
+    cache = RemapCache()
+    expected = AffineWarp.warp(img, matrix, interpolation=interpolation, expand=True, fill=(9, 8, 7))
+    obtained = AffineWarp.warp(img, matrix, interpolation=interpolation, expand=True, fill=(9, 8, 7), cache=cache)
+    # Fractions are rounded to 1/1024 of a pixel
+    assert np.abs(obtained.astype(int) - expected).max() <= 1
+    table = next(iter(cache.tables.values()))
+    assert table.xs.dtype == np.int16
+
+
+def test_remap_cache_reuses_and_evicts():
+    cache = RemapCache(maxsize=2)
+    img = np.zeros((8, 8))
+    inverse = AffineWarp.invert(AffineWarp.rotation(10))
+    table = cache.get(img.shape, inverse, (8, 8), 'bilinear')
+    assert cache.get(img.shape, inverse, (8, 8), 'bilinear') is table
+    cache.get(img.shape, inverse, (8, 8), 'nearest')
+    cache.get((9, 9), inverse, (8, 8), 'nearest')
+    assert len(cache) == 2
+    assert cache.get(img.shape, inverse, (8, 8), 'bilinear') is not table
+
+
+def test_remap_table_save_and_load(tmp_path):
+    img = np.random.RandomState(1).rand(12, 10)
+    inverse = AffineWarp.invert(AffineWarp.rotation(33, (5, 6)))
+    table = RemapTable.build(img.shape, inverse, (12, 10), 'bicubic')
+    path = str(tmp_path / 'rotation.npz')
+    table.save(path)
+    loaded = RemapTable.load(path)
+    assert loaded.key == table.key
+    assert np.array_equal(loaded.apply(img), table.apply(img))
+    cache = RemapCache()
+    cache.add(loaded)
+    assert cache.get(img.shape, inverse, (12, 10), 'bicubic') is loaded
@@ -1,6 +1,7 @@
 import pytest
 from root.converter import ColorConverter as converter
 from math import *
+import numpy as np
 
 
 def test_rgb_to_gray_via_weighted_average():
@@ -284,3 +285,66 @@ def test_hsi_to_rgb_br_sector():
     assert r == 99
     assert g == 31
     assert b == 99
+
+
+def test_rgb_to_hsv_check_h_blue_max():
+    h, s, v = converter.rgb_to_hsv(10, 20, 200)
+    assert h == 236
+
+
+def test_hsv_image_round_trip():
+    img = (np.random.RandomState(0).rand(16, 16, 3) * 255).astype(np.uint8)
+    hsv = converter.rgb_to_hsv_image(img)
+
+    assert hsv.dtype == np.float32
+    assert np.array_equal(np.rint(converter.hsv_to_rgb_image(hsv)), img)
+
+
+def test_hsi_image_round_trip():
+    img = (np.random.RandomState(1).rand(16, 16, 4) * 255).astype(np.uint8)
+    hsi = converter.rgb_to_hsi_image(img)
+
+    assert hsi.shape == (16, 16, 3)
+    assert np.abs(np.rint(converter.hsi_to_rgb_image(hsi)) - img[..., :3]).max() <= 1
+
+
+def test_hsi_image_matches_pixels():
+    img = (np.random.RandomState(2).rand(8, 8, 3) * 255).astype(np.uint8)
+    hsi = converter.rgb_to_hsi_image(img, np.float64)
+
+    for r, g, b in img.reshape(-1, 3)[:10]:
+        expected = converter.rgb_to_hsi(r, g, b)
+        obtained = hsi[(img == [r, g, b]).all(axis=-1)][0]
+        assert np.allclose(obtained, expected, atol=0.01)
+
+
+def get_colour_image():
+    img = (np.random.RandomState(3).rand(32, 32, 3) * 255).astype(np.uint8)
+    # Extreme colours too
+    img[0, :8] = [[0, 0, 0], [255, 255, 255], [255, 0, 0], [0, 255, 0],
+                  [0, 0, 255], [255, 255, 0], [0, 255, 255], [255, 0, 255]]
+    return img
+
+
+def test_rgb_to_gray_fixed_point():
+    img = get_colour_image()
+    obtained = converter.rgb_to_gray(img, fixed_point=True)
+
+    assert obtained.dtype == np.uint8
+    assert np.abs(obtained - converter.rgb_to_gray(img)).max() <= 1
+
+
+def test_ycbcr_fixed_point_within_one_level():
+    img = get_colour_image()
+    ycbcr = converter.rgb_to_ycbcr(img)
+
+    assert np.abs(converter.rgb_to_ycbcr(img, fixed_point=True).astype(int) - ycbcr).max() <= 1
+    assert np.abs(converter.ycbcr_to_rgb(ycbcr, fixed_point=True).astype(int) - converter.ycbcr_to_rgb(ycbcr)).max() <= 1
+    assert np.abs(converter.ycbcr_to_rgb(ycbcr, fixed_point=True).astype(int) - img).max() <= 2
+
+
+def test_ycbcr_to_rgb_fixed_point_clips_negative_values():
+    # Y = 0 with Cr = 0 is a negative red
+    ycbcr = np.array([[[0, 128, 0], [255, 255, 255]]], dtype=np.uint8)
+
+    assert np.array_equal(converter.ycbcr_to_rgb(ycbcr, fixed_point=True), converter.ycbcr_to_rgb(ycbcr))
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from root.converter import ColorMatrix, ColorConverter
+
+
+def get_image():
+    return (np.random.RandomState(0).rand(30, 20, 4) * 255).astype(np.uint8)
+
+
+def test_sepia_matches_pixel_formula():
+    img = get_image()
+    obtained = ColorMatrix.apply(img, ColorMatrix.sepia())
+
+    r, g, b = img[..., :3].astype(float).transpose(2, 0, 1)
+    expected = np.minimum(np.rint(0.393 * r + 0.769 * g + 0.189 * b), 255)
+    assert obtained.dtype == np.uint8
+    assert np.array_equal(obtained[..., 0], expected)
+    assert np.array_equal(obtained[..., 3], img[..., 3])
+
+
+def test_gray_matches_rgb_to_gray():
+    img = get_image()
+    obtained = ColorMatrix.apply(img, ColorMatrix.gray())
+
+    assert np.abs(obtained[..., 1] - ColorConverter.rgb_to_gray(img)).max() <= 0.5
+
+
+def test_swap_and_offset():
+    img = get_image()
+    matrix = ColorMatrix.compose(ColorMatrix.swap('bgr'), [[1, 0, 0, -10], [0, 1, 0, 0], [0, 0, 1, 0]])
+    obtained = ColorMatrix.apply(img, matrix)
+
+    assert np.array_equal(obtained[..., 0], np.maximum(img[..., 2].astype(int) - 10, 0))
+    assert np.array_equal(obtained[..., 2], img[..., 0])
+
+
+def test_white_balance_makes_reference_gray():
+    white = np.array([[[200, 150, 100]]], dtype=np.uint8)
+
+    assert np.array_equal(ColorMatrix.apply(white, ColorMatrix.white_balance([200, 150, 100])), [[[150] * 3]])
+
+
+@pytest.mark.parametrize('matrix', [ColorMatrix.sepia(), ColorMatrix.gray(), ColorMatrix.swap('gbr')])
+def test_fixed_point_within_one_level(matrix):
+    img = get_image()
+    exact = ColorMatrix.apply(img, matrix).astype(int)
+
+    assert np.abs(ColorMatrix.apply(img, matrix, fixed_point=True) - exact).max() <= 1
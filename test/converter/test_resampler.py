@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from root.converter import Resampler
+from root.converter import ScaleConverter as scal
+
+
+@pytest.mark.parametrize('filter', ['box', 'triangle', 'bicubic', 'lanczos3'])
+def test_weights_are_normalized(filter):
+    indexes, weights = Resampler().get_weights(37, 11, filter)
+    assert indexes.shape == weights.shape
+    assert indexes.min() >= 0 and indexes.max() <= 36
+    assert np.allclose(weights.sum(axis=1), 1)
+
+
+def test_weight_tables_are_cached():
+    resampler = Resampler(maxsize=2)
+    table = resampler.get_weights(100, 40, 'bicubic')
+    assert resampler.get_weights(100, 40, 'bicubic') is table
+    resampler.get_weights(100, 50, 'bicubic')
+    resampler.get_weights(100, 60, 'bicubic')
+    assert len(resampler) == 2
+    assert resampler.get_weights(100, 40, 'bicubic') is not table
+
+
+@pytest.mark.parametrize('filter', ['box', 'triangle', 'bicubic', 'lanczos3'])
+def test_constant_image_is_preserved(filter):
+    img = np.full((20, 30, 3), 77, dtype=np.uint8)
+    obtained = Resampler().resize(img, 7, 45, filter)
+    assert obtained.shape == (7, 45, 3)
+    assert np.all(obtained == 77)
+
+
+def test_box_downscale_averages_blocks():
+    img = np.arange(16, dtype=float).reshape(4, 4)
+    expected = img.reshape(2, 2, 2, 2).mean(axis=(1, 3))
+    assert np.allclose(Resampler().resize(img, 2, 2, 'box'), expected)
+
+
+def test_downscale_removes_aliasing():
+    # A one pixel checkerboard should become flat gray, not a pattern
+    img = (np.indices((64, 64)).sum(axis=0) % 2 * 255).astype(np.uint8)
+    obtained = scal.apply_resample(img, 0.3, 'lanczos3')
+    assert obtained.std() < 2
+
+
+def test_unknown_filter():
+    with pytest.raises(ValueError):
+        Resampler().get_weights(10, 5, 'gaussian')
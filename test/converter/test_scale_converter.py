@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from root.converter import ScaleConverter as scal
+
+
+def reference_bilinear(img, scale):
+    height, width = img.shape[:2]
+    out_height, out_width = int(height * scale), int(width * scale)
+    out = np.empty((out_height, out_width) + img.shape[2:])
+    for row in range(out_height):
+        for col in range(out_width):
+            # Pixel centres are aligned, positions outside repeat the edges
+            y = min(max((row + 0.5) * height / out_height - 0.5, 0), height - 1)
+            x = min(max((col + 0.5) * width / out_width - 0.5, 0), width - 1)
+            yi, xi = int(y), int(x)
+            yf, xf = y - yi, x - xi
+            y1, x1 = min(yi + 1, height - 1), min(xi + 1, width - 1)
+            bottom = xf * img[yi, x1].astype(float) + (1 - xf) * img[yi, xi]
+            top = xf * img[y1, x1].astype(float) + (1 - xf) * img[y1, xi]
+            out[row, col] = yf * top + (1 - yf) * bottom
+    return out
+
+
+def test_nearest_neighbour_doubles_pixels():
+    img = np.array([[1, 2], [3, 4]], dtype=np.uint8)
+    expected = np.array([
+        [1, 1, 2, 2],
+        [1, 1, 2, 2],
+        [3, 3, 4, 4],
+        [3, 3, 4, 4]])
+    assert np.array_equal(scal.apply_nearest_neighbour(img, 2), expected)
+
+
+def test_nearest_neighbour_colour_shape():
+    img = np.random.RandomState(0).randint(0, 256, (10, 6, 4)).astype(np.uint8)
+    obtained = scal.apply_nearest_neighbour(img, 0.5)
+    assert obtained.shape == (5, 3, 4)
+    assert np.array_equal(obtained, img[1::2, 1::2])
+
+
+def test_bilinear_grayscale():
+    img = np.random.RandomState(1).randint(0, 256, (7, 9)).astype(np.uint8)
+    obtained = scal.apply_bilinear_interpolation(img, 2.5)
+    assert np.abs(obtained - reference_bilinear(img, 2.5)).max() <= 0.5 + 1e-9
+
+
+def test_bilinear_colour():
+    img = np.random.RandomState(2).randint(0, 256, (5, 8, 3)).astype(np.uint8)
+    obtained = scal.apply_bilinear_interpolation(img, 1.5)
+    assert obtained.dtype == np.uint8
+    assert np.abs(obtained - reference_bilinear(img, 1.5)).max() <= 0.5 + 1e-9
+
+
+def test_rotate_quarter_turn():
+    img = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    for interpolation in ['nearest', 'bilinear', 'bicubic']:
+        obtained = scal.apply_rotate(img, 90, interpolation, expand=True)
+        assert np.array_equal(obtained, np.rot90(img))
+
+
+def test_rotate_keeps_size_and_fills():
+    img = np.full((10, 20, 3), 200, dtype=np.uint8)
+    obtained = scal.apply_rotate_bilinear(img, 45)
+    assert obtained.shape == img.shape
+    assert np.array_equal(obtained[5, 10], [200, 200, 200])
+    assert np.array_equal(obtained[0, 0], [0, 0, 0])
+    assert scal.apply_rotate_nearest(img, 30).shape == img.shape
+
+
+def test_orientation_changes_are_views():
+    img = np.arange(24, dtype=np.uint8).reshape(2, 4, 3)
+    for view in [scal.flip_horizontal(img), scal.flip_vertical(img), scal.rotate_90(img, -1),
+                 scal.transpose(img), scal.crop(img, 0, 1, 2, 2)]:
+        assert np.shares_memory(view, img)
+    assert np.array_equal(scal.rotate_90(img, 1)[0, 0], img[0, 3])
+    assert np.array_equal(scal.rotate_90(img, -1)[0, 0], img[1, 0])
+    assert scal.crop(img, 1, 1, 1, 3).shape == (1, 3, 3)
+
+
+def test_crop_outside_image():
+    with pytest.raises(ValueError):
+        scal.crop(np.zeros((4, 4)), 2, 0, 3, 1)
+
+
+def test_exif_orientations():
+    img = np.arange(6).reshape(2, 3)
+    # Stored images that, once upright, all read [[0, 1, 2], [3, 4, 5]]
+    stored = {
+        1: img, 2: img[:, ::-1], 3: img[::-1, ::-1], 4: img[::-1],
+        5: img.T, 6: np.rot90(img, 1), 7: np.rot90(img, 2).T, 8: np.rot90(img, -1),
+    }
+    for orientation, image in stored.items():
+        assert np.array_equal(scal.apply_exif_orientation(image, orientation), img), orientation
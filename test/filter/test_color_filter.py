@@ -0,0 +1,26 @@
+import numpy as np
+from root.filter import ColorFilter
+
+
+def get_image():
+    return (np.random.RandomState(0).rand(12, 10, 4) * 255).astype(np.uint8)
+
+
+def test_adjust_with_factor_one_keeps_image():
+    img = get_image()
+    for adjust in [ColorFilter.adjust_saturation, ColorFilter.adjust_hue, ColorFilter.adjust_intensity]:
+        obtained = adjust(img, 1)
+        assert obtained.dtype == np.uint8
+        assert np.abs(obtained.astype(int) - img).max() <= 1
+
+
+def test_adjust_saturation_zero_gives_gray():
+    obtained = ColorFilter.adjust_saturation(get_image(), 0)
+
+    assert np.abs(obtained[..., 0].astype(int) - obtained[..., 2]).max() <= 1
+
+
+def test_adjust_keeps_alpha():
+    img = get_image()
+
+    assert np.array_equal(ColorFilter.adjust_intensity(img, 2)[..., 3], img[..., 3])
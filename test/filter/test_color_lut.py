@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from root.filter import ColorLut, ColorFilter
+
+
+def get_image():
+    return (np.random.RandomState(0).rand(20, 30, 4) * 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize('interpolation', ['trilinear', 'tetrahedral'])
+def test_identity_lut_keeps_image(interpolation):
+    img = get_image()
+
+    assert np.array_equal(ColorLut.identity(17).apply(img, interpolation), img)
+
+
+@pytest.mark.parametrize('interpolation', ['trilinear', 'tetrahedral'])
+def test_affine_transform_is_exact(interpolation):
+    # Both interpolations reproduce affine colour transforms
+    img = get_image()
+    swap = lambda image: image[..., ::-1] * 0.5 + 20
+    lut = ColorLut.from_function(swap, size=17)
+
+    expected = swap(img[..., :3].astype(float))
+    assert np.abs(lut.apply(img, interpolation)[..., :3] - expected).max() <= 0.5
+
+
+def test_chain_of_adjustments():
+    img = get_image()[..., :3]
+    lut = ColorLut.from_function(lambda image: ColorFilter.adjust_saturation(image, 1.5),
+                                 lambda image: ColorFilter.adjust_intensity(image, 0.8))
+    expected = ColorFilter.adjust_intensity(ColorFilter.adjust_saturation(img, 1.5), 0.8)
+
+    assert np.abs(lut.apply(img).astype(int) - expected).mean() < 1
+
+
+def test_cube_round_trip(tmp_path):
+    lut = ColorLut.from_function(lambda image: 255 - image, size=5)
+    lut.title = 'negative'
+    path = str(tmp_path / 'negative.cube')
+    lut.save(path)
+    loaded = ColorLut.load(path)
+
+    assert loaded.title == 'negative'
+    assert np.allclose(loaded.table, lut.table, atol=1e-6)
+    # Red changes fastest in the file
+    with open(path) as cube:
+        rows = [line for line in cube if line[0].isdigit()]
+    assert [float(value) for value in rows[1].split()] == pytest.approx([0.75, 1, 1])
+
+
+def test_load_rejects_incomplete_cube(tmp_path):
+    path = tmp_path / 'broken.cube'
+    path.write_text('LUT_3D_SIZE 2\n0 0 0\n1 1 1\n')
+
+    with pytest.raises(ValueError):
+        ColorLut.load(str(path))
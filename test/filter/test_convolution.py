@@ -0,0 +1,46 @@
+import numpy as np
+from root.filter import ImageFilter as filter
+
+
+def reference_correlation(image, kernel):
+    kh, kw = kernel.shape
+    padded = np.zeros((image.shape[0] + kh - 1, image.shape[1] + kw - 1))
+    padded[kh // 2:kh // 2 + image.shape[0], kw // 2:kw // 2 + image.shape[1]] = image
+    out = np.zeros(image.shape)
+    for y in range(image.shape[0]):
+        for x in range(image.shape[1]):
+            out[y, x] = (kernel * padded[y:y + kh, x:x + kw]).sum()
+    return out
+
+
+def test_convolution_3x3_keeps_dtype():
+    image = np.random.RandomState(0).rand(7, 9)
+    kernel = np.arange(9).reshape(3, 3)
+    obtained = filter.apply_convolution(image, kernel)
+    assert obtained.dtype == image.dtype
+    assert np.allclose(obtained, reference_correlation(image, kernel))
+
+
+def test_convolution_any_kernel_size():
+    image = np.random.RandomState(1).rand(12, 10)
+    kernel = np.random.RandomState(2).rand(5, 7)
+    assert np.allclose(filter.apply_convolution(image, kernel), reference_correlation(image, kernel))
+
+
+def test_large_kernel_uses_same_semantics():
+    image = np.random.RandomState(3).rand(40, 30)
+    kernel = np.random.RandomState(4).rand(15, 13)
+    obtained = filter.apply_convolution(image, kernel)
+    assert np.allclose(obtained, filter.apply_direct_convolution(image, kernel))
+    assert np.allclose(obtained, reference_correlation(image, kernel))
+
+
+def test_convolution_colour_image():
+    image = np.random.RandomState(5).randint(0, 256, (6, 8, 4)).astype(np.uint8)
+    kernel = np.ones((3, 3)) / 9
+    obtained = filter.apply_convolution(image, kernel)
+    assert obtained.shape == (6, 8, 3)
+    assert obtained.dtype == np.uint8
+    expected = reference_correlation(image[:, :, 1].astype(float), kernel)
+    # Truncation to uint8 may differ by one with the summation order
+    assert np.abs(obtained[:, :, 1] - expected).max() < 1 + 1e-9
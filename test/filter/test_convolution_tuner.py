@@ -0,0 +1,59 @@
+import json
+import numpy as np
+import pytest
+from root.filter import ImageFilter as filter
+from root.filter.convolution_tuner import ConvolutionTuner
+
+
+def test_kernel_structure():
+    assert ConvolutionTuner.get_structure(np.ones((3, 5)) / 15)[0] == 'box'
+    structure, (column, row) = ConvolutionTuner.get_structure(filter.create_gaussian_kernel(5, 1))
+    assert structure == 'separable'
+    assert np.allclose(np.outer(column, row), filter.create_gaussian_kernel(5, 1))
+    assert ConvolutionTuner.get_structure(np.arange(9.).reshape(3, 3) ** 2)[0] == 'general'
+
+
+@pytest.mark.parametrize('algorithm', ['direct', 'separable', 'integral', 'fft'])
+def test_algorithms_agree(algorithm):
+    image = np.random.RandomState(0).rand(20, 15, 3)
+    kernel = np.full((4, 5), 0.5)
+    parameters = ConvolutionTuner.get_structure(kernel)[1]
+    expected = filter.apply_direct_convolution(image, kernel)
+    obtained = ConvolutionTuner.run(algorithm, image, kernel, 'box', parameters)
+    assert np.allclose(obtained, expected)
+
+
+def test_winner_is_saved_and_reused(tmp_path):
+    path = str(tmp_path / 'tuning.json')
+    tuner = ConvolutionTuner(path)
+    image = np.random.RandomState(1).rand(16, 16)
+    kernel = filter.create_gaussian_kernel(3, 1)
+    tuner.convolve(image, kernel)
+    with open(path) as cache:
+        winners = json.load(cache)['winners']
+    assert list(winners) == [ConvolutionTuner.get_key(image.shape, (3, 3), 'separable', image.dtype)]
+
+    reloaded = ConvolutionTuner(path)
+    assert reloaded.winners == winners
+    reloaded.tune = None  # no timing when the winner is cached
+    assert np.allclose(reloaded.convolve(image, kernel), filter.apply_direct_convolution(image, kernel))
+
+
+def test_cache_from_other_machine_is_ignored(tmp_path):
+    path = tmp_path / 'tuning.json'
+    path.write_text(json.dumps({'machine': {'cpus': -1}, 'winners': {'key': 'fft'}}))
+    assert ConvolutionTuner(str(path)).winners == {}
+
+
+def test_default_tuner_saves_to_user_cache(tmp_path, monkeypatch):
+    monkeypatch.delenv('ROOT_TUNING_CACHE')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    tuner = ConvolutionTuner.default()
+    tuner.convolve(np.ones((8, 8)), np.ones((3, 3)))
+    assert (tmp_path / '.root-image-editor' / 'convolution_tuning.json').exists()
+
+    monkeypatch.setattr(ConvolutionTuner, 'instance', None)
+    path = tmp_path / 'winners.json'
+    monkeypatch.setenv('ROOT_TUNING_CACHE', str(path))
+    ConvolutionTuner.default().convolve(np.ones((8, 8)), np.ones((3, 3)))
+    assert path.exists()
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from root.filter import FrequencyFilter
+
+
+def test_distance_grid_is_cached():
+    grid = FrequencyFilter.distance_grid((6, 8))
+    assert grid is FrequencyFilter.distance_grid((6, 8))
+    assert grid[3, 4] == 0
+    assert grid[3, 7] == 3
+    assert not grid.flags.writeable
+
+
+@pytest.mark.parametrize('kind', ['ideal', 'butterworth', 'gaussian'])
+def test_high_pass_complements_low_pass(kind):
+    low = FrequencyFilter.low_pass((16, 16), 4, kind)
+    high = FrequencyFilter.high_pass((16, 16), 4, kind)
+    assert low.dtype == np.float32
+    assert np.allclose(low + high, 1)
+    assert low[8, 8] == 1
+
+
+def test_ideal_band_pass_keeps_ring():
+    mask = FrequencyFilter.band_pass((21, 21), 2, 5)
+    distance = FrequencyFilter.distance_grid((21, 21))
+    assert np.array_equal(mask == 1, (distance > 2) & (distance <= 5))
+    reject = FrequencyFilter.band_reject((21, 21), 2, 5)
+    assert np.array_equal(reject, 1 - mask)
+
+
+def test_butterworth_half_power_at_cutoff():
+    mask = FrequencyFilter.low_pass((1, 21), 5, 'butterworth', order=3)
+    assert mask[0, 15] == pytest.approx(0.5)
+
+
+def test_apply_broadcasts_over_channels():
+    spectrum = np.ones((4, 4, 3), dtype=np.complex64)
+    mask = FrequencyFilter.compose(FrequencyFilter.low_pass((4, 4), 1), FrequencyFilter.high_pass((4, 4), 0))
+    FrequencyFilter.apply(spectrum, mask, out=spectrum)
+    assert np.array_equal(spectrum[:, :, 1].real, mask)
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        FrequencyFilter.low_pass((4, 4), 1, 'box')
@@ -0,0 +1,72 @@
+import os
+import numpy as np
+import pytest
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QApplication
+from root.ui.display_adapter import DisplayAdapter
+
+app = QApplication.instance() or QApplication([])
+
+
+def get_image(channels):
+    shape = (9, 14) if channels == 1 else (9, 14, channels)
+    return np.random.RandomState(channels).randint(0, 256, shape).astype(np.uint8)
+
+
+def read_qimage(qim):
+    pixels = []
+    for y in range(qim.height()):
+        for x in range(qim.width()):
+            if qim.format() == qim.Format_Indexed8:
+                pixels.append(qim.pixelIndex(x, y))
+            else:
+                pixels.append(QColor.fromRgba(qim.pixel(x, y)).getRgb())
+    return np.array(pixels)
+
+
+def expected_pixels(im):
+    im = np.ascontiguousarray(im)
+    if im.ndim == 2:
+        return im.ravel()
+    if im.shape[2] == 3:
+        im = np.dstack((im, np.full(im.shape[:2], 255, np.uint8)))
+    return im.reshape(-1, 4)
+
+
+LAYOUTS = {
+    'contiguous': lambda im: im,
+    'horizontal flip': lambda im: im[:, ::-1],
+    'vertical flip': lambda im: im[::-1],
+    'rotation': lambda im: np.rot90(im),
+    'transpose': lambda im: im.swapaxes(0, 1),
+    'crop': lambda im: im[2:7, 3:11],
+    'strided crop': lambda im: im[::2, 1::3],
+}
+
+
+@pytest.mark.parametrize('channels', [1, 3, 4])
+@pytest.mark.parametrize('layout', list(LAYOUTS))
+def test_qimage_pixels_match(channels, layout):
+    im = LAYOUTS[layout](get_image(channels))
+    qim = DisplayAdapter.to_qimage(im)
+
+    assert (qim.height(), qim.width()) == im.shape[:2]
+    assert np.array_equal(read_qimage(qim), expected_pixels(im))
+
+
+@pytest.mark.parametrize('channels', [1, 3, 4])
+def test_packed_rows_are_not_copied(channels):
+    image = get_image(channels)
+    crop = image[2:7, 3:11]
+
+    assert DisplayAdapter.to_display_array(image) is image
+    assert np.shares_memory(DisplayAdapter.to_display_array(crop), image)
+    assert not np.shares_memory(DisplayAdapter.to_display_array(image[::-1]), image)
+
+
+def test_other_dtypes_are_converted():
+    im = get_image(3).astype(np.float64)
+    qim = DisplayAdapter.to_qimage(im)
+
+    assert np.array_equal(read_qimage(qim), expected_pixels(im.astype(np.uint8)))
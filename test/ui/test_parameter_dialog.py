@@ -0,0 +1,19 @@
+import os
+import numpy as np
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtWidgets import QApplication, QMessageBox
+from root.ui import ParameterDialog
+
+app = QApplication.instance() or QApplication([])
+
+
+def test_preview_error_is_reported(monkeypatch):
+    messages = []
+    monkeypatch.setattr(QMessageBox, 'warning', lambda parent, title, message: messages.append(message))
+
+    def preview(value):
+        raise ValueError("bad value %d" % value)
+    dialog = ParameterDialog('Test', [('Value', 0, 10, 3, 0)], preview, np.zeros((4, 4), dtype=np.uint8))
+    dialog.previewRunner.pool.waitForDone()
+    app.processEvents()
+    assert messages == ["ValueError('bad value 3')"]
@@ -0,0 +1,80 @@
+import os
+import threading
+import numpy as np
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtWidgets import QApplication
+from root.controller import TransformationController
+from root.ui import TaskRunner
+from root.util import TaskContext
+
+app = QApplication.instance() or QApplication([])
+
+
+def finish(runner):
+    runner.pool.waitForDone()
+    app.processEvents()
+
+
+def test_result_reaches_callback():
+    runner = TaskRunner()
+    results = []
+    runner.submit(lambda a, b: a + b, 1, 2, callback=results.append)
+    finish(runner)
+    assert results == [3]
+    assert not runner.isBusy()
+
+
+def test_cancelled_task_stops_at_next_step():
+    runner = TaskRunner()
+    started, steps, results = threading.Event(), [], []
+
+    def long_task():
+        started.set()
+        for done in range(10 ** 6):
+            TaskContext.step(done, 10 ** 6)
+            steps.append(done)
+    runner.submit(long_task, callback=results.append)
+    started.wait()
+    runner.cancel()
+    finish(runner)
+    assert results == [] and len(steps) < 10 ** 6
+    assert not runner.isBusy()
+
+
+def test_superseded_result_is_discarded():
+    runner = TaskRunner()
+    release, results = threading.Event(), []
+
+    def first():
+        # Past its last step, so cancelling does not stop it
+        release.wait()
+        return 'first'
+    runner.submit(first, callback=results.append)
+    runner.submit(lambda: 'second', callback=results.append)
+    release.set()
+    finish(runner)
+    assert results == ['second']
+
+
+def test_superseded_operation_does_not_change_controller():
+    image = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    controller = TransformationController()
+    controller.update_memory_images(image)
+    runner = TaskRunner()
+    release, shown = threading.Event(), []
+
+    def run(function, *args):
+        # Same wiring as Window.runTask
+        runner.submit(controller.stage, function, *args,
+                      callback=lambda staged: shown.append(controller.commit(staged)))
+
+    def slow_negative():
+        release.wait()
+        return controller.negativeTransform()
+    run(slow_negative)
+    run(controller.flip_horizontal)
+    release.set()
+    finish(runner)
+    assert len(shown) == 1
+    assert np.array_equal(controller.current_image, image[:, ::-1])
+    assert np.array_equal(controller.undoAction(), image)
@@ -0,0 +1,24 @@
+#!/usr/bin/python
+import pytest
+import numpy as np
+from root.util import ImageBuffer
+
+
+def test_image_buffer_does_not_copy():
+    input = np.zeros((4, 4), dtype=np.uint8)
+    buffer = ImageBuffer(input)
+    assert np.shares_memory(buffer.array, input)
+
+
+def test_image_buffer_is_read_only():
+    buffer = ImageBuffer(np.zeros((4, 4), dtype=np.uint8))
+    with pytest.raises(ValueError):
+        buffer.array[0, 0] = 1
+
+
+def test_image_buffer_writable_is_a_copy():
+    buffer = ImageBuffer(np.zeros((4, 4), dtype=np.uint8))
+    obtained = buffer.writable()
+    obtained[0, 0] = 1
+    assert buffer.array[0, 0] == 0
+    assert not np.shares_memory(buffer.array, obtained)
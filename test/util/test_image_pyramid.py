@@ -0,0 +1,35 @@
+#!/usr/bin/python
+import pytest
+import numpy as np
+from root.util import ImagePyramid
+
+
+def test_pyramid_level_zero_is_the_image():
+    image = np.zeros((8, 8), dtype=np.uint8)
+    pyramid = ImagePyramid(image)
+    assert pyramid.level(0) is image
+
+
+def test_pyramid_levels_halve_the_size():
+    pyramid = ImagePyramid(np.zeros((16, 8, 3), dtype=np.uint8))
+    assert pyramid.level(1).shape == (8, 4, 3)
+    assert pyramid.level(2).shape == (4, 2, 3)
+
+
+def test_pyramid_odd_size_keeps_last_pixels():
+    pyramid = ImagePyramid(np.full((5, 5), 10, dtype=np.uint8))
+    obtained = pyramid.level(1)
+    assert obtained.shape == (3, 3)
+    assert (obtained == 10).all()
+
+
+def test_pyramid_level_for_size():
+    pyramid = ImagePyramid(np.zeros((64, 64), dtype=np.uint8))
+    assert pyramid.level_for_size(20, 20).shape == (32, 32)
+    assert pyramid.level_for_size(16, 16).shape == (16, 16)
+    assert pyramid.level_for_size(100, 100).shape == (64, 64)
+
+
+def test_pyramid_last_level():
+    pyramid = ImagePyramid(np.zeros((4, 4), dtype=np.uint8))
+    assert pyramid.level(10).shape == (1, 1)
@@ -1,5 +1,6 @@
 #!/usr/bin/python
 import pytest
+import numpy as np
 from root.util import ImageUtil as util
 
 
@@ -43,3 +44,18 @@ def test_format_odd_size():
     expected = original_size
     obtained = util.format_filter_size(original_size)
     assert obtained == expected
+
+
+def test_block_reduce_averages_blocks():
+    input = np.array([
+        [0,    2,    4,    6],
+        [2,    4,    6,    8]], dtype=np.uint8)
+    obtained = util.block_reduce(input, 2)
+    assert obtained.tolist() == [[2, 6]]
+    assert obtained.dtype == np.uint8
+
+
+def test_block_reduce_rgb():
+    input = np.ones((6, 6, 3), dtype=np.uint8)
+    obtained = util.block_reduce(input, 3)
+    assert obtained.shape == (2, 2, 3)
@@ -0,0 +1,24 @@
+import pytest
+from root.util import TaskContext, TaskCancelled
+
+
+def test_step_without_context_does_nothing():
+    TaskContext.step(1, 2)
+
+
+def test_step_reports_each_percentage_once():
+    reported = []
+    with TaskContext(reported.append):
+        for done in range(1000):
+            TaskContext.step(done, 1000)
+    assert reported == list(range(100))
+
+
+def test_step_raises_once_cancelled():
+    context = TaskContext()
+    with context:
+        TaskContext.step(0, 2)
+        context.cancel()
+        with pytest.raises(TaskCancelled):
+            TaskContext.step(1, 2)
+    assert TaskContext.current() is None